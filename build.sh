@@ -4,4 +4,7 @@ set -o errexit
 
 pip install -r requirements.txt
 
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+
+python manage.py build_css
+python manage.py collectstatic --no-input
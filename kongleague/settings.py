@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 from dotenv import load_dotenv
 import dj_database_url
 
@@ -47,6 +48,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack
+    "tournament.middleware.RequestTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -63,18 +66,32 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [],
-        "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "tournament.context_processors.fragment_cache",
+            ],
+            # Templates are parsed once per process; in development the
+            # autoreloader clears this cache whenever a template changes
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
             ],
         },
     },
 ]
 
+# Log how long each template and block takes to render (tournament.profiling)
+TEMPLATE_PROFILING = os.getenv('TEMPLATE_PROFILING', 'False') == 'True'
+
 WSGI_APPLICATION = "kongleague.wsgi.application"
 
 
@@ -89,6 +106,52 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# The data version behind page caching, ETags and Last-Modified lives in the
+# cache, so every gunicorn worker must share it: the default is a directory
+# on this host. Several app instances need a shared backend such as Redis.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'kongleague-cache')),
+    }
+}
+
+# Seconds a rendered public page stays cached; writes invalidate it sooner
+PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', '600'))
+
+# Seconds a process reuses its copy of the current tournament. Writes in this
+# process (or any process, with a shared cache) refresh it sooner
+CURRENT_TOURNAMENT_TTL = int(os.getenv('CURRENT_TOURNAMENT_TTL', '30'))
+
+# Schedule page: match days per page, and how many around the current one render inline
+SCHEDULE_PAGE_SIZE = 10
+SCHEDULE_WINDOW = 1
+
+# Order of the tiebreakers between teams with the same record (see
+# tournament.tiebreakers); run rebuild_standings after changing it
+TIEBREAKERS = [name for name in os.getenv('TIEBREAKERS', 'head_to_head,strength_of_schedule,opponents_win_rate').split(',') if name]
+
+# Seconds between keepalive comments on the /live/ event stream
+LIVE_KEEPALIVE = int(os.getenv('LIVE_KEEPALIVE', '15'))
+
+# Background threads that resize uploaded team logos; 0 processes them inline
+LOGO_WORKERS = int(os.getenv('LOGO_WORKERS', '1'))
+
+# Per-view request timings with Server-Timing headers (tournament.middleware);
+# requests slower than SLOW_REQUEST_MS are logged with their slowest SQL
+REQUEST_METRICS = os.getenv('REQUEST_METRICS', 'True') == 'True'
+SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', '500'))
+
+# /metrics: gunicorn workers share their counters through files in
+# METRICS_DIR (empty keeps them per process). Scrapers authenticate with
+# "Authorization: Bearer <METRICS_TOKEN>"; staff can also open it logged in.
+METRICS_DIR = os.getenv('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'kongleague-metrics'))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -136,6 +199,9 @@ STORAGES = {
     },
 }
 
+# Test-only settings are applied by the runner, see kongleague/test_runner.py
+TEST_RUNNER = "kongleague.test_runner.TestRunner"
+
 # Media files (User uploads)
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
@@ -149,3 +215,23 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 LOGIN_URL = '/admin-login/'
 LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/'
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.0/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'tournament': {
+            'handlers': ['console'],
+            'level': os.getenv('TOURNAMENT_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
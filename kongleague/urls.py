@@ -18,14 +18,23 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 from django.conf import settings
-from django.conf.urls.static import static
-from tournament import views
+from tournament import api, media, views
 
 urlpatterns = [
     # Public pages
     path('', views.standings_view, name='standings'),
     path('schedule/', views.schedule_view, name='schedule'),
+    path('schedule/day/<int:match_day_id>/', views.schedule_day_view, name='schedule_day'),
     path('teams/', views.teams_view, name='teams'),
+    path('head-to-head/', views.head_to_head_view, name='head_to_head'),
+    path('playoffs/', views.playoffs_view, name='playoffs'),
+    path('live/', views.live_view, name='live'),
+
+    # Read-only JSON API
+    path('api/standings/', api.standings_api, name='api_standings'),
+    path('api/schedule/', api.schedule_api, name='api_schedule'),
+    path('api/teams/', api.teams_api, name='api_teams'),
+    path('api/teams/<int:team_id>/ratings/', api.team_ratings_api, name='api_team_ratings'),
 
     # Admin authentication
     path('admin-login/', views.admin_login_view, name='admin_login'),
@@ -35,12 +44,16 @@ urlpatterns = [
     path('dashboard/', views.dashboard_view, name='dashboard'),
     path('dashboard/teams/', views.manage_teams_view, name='manage_teams'),
     path('dashboard/matches/', views.manage_matches_view, name='manage_matches'),
+    path('dashboard/playoffs/', views.manage_playoffs_view, name='manage_playoffs'),
     path('dashboard/settings/', views.tournament_settings_view, name='tournament_settings'),
+    path('dashboard/export/', views.export_tournament_view, name='export_tournament'),
+
+    # Prometheus metrics for staff or a scraper with METRICS_TOKEN
+    path('metrics', views.metrics_view, name='metrics'),
+
+    # Uploaded media, also in production: logos are content addressed and cached for good
+    path(f'{settings.MEDIA_URL.strip("/")}/<path:path>', media.serve_media, name='media'),
 
     # Django admin (optional, for superuser access)
     path("admin/", admin.site.urls),
 ]
-
-# Serve media files in development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
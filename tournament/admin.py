@@ -1,5 +1,22 @@
 from django.contrib import admin
-from .models import Team, MatchDay, Match, Tournament
+from .models import Bracket, BracketMatch, Team, TeamStanding, LogoVariant, MatchDay, Match, Tournament
+
+
+class LogoVariantInline(admin.TabularInline):
+    model = LogoVariant
+    fields = ['size', 'format', 'width', 'height', 'image']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+class BracketMatchInline(admin.TabularInline):
+    model = BracketMatch
+    fields = ['position', 'stage', 'round', 'team_a', 'team_b', 'winner', 'winner_to', 'loser_to']
+    # Rewiring the tree by hand would break advancement, see tournament.brackets
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
 
 
 @admin.register(Team)
@@ -7,6 +24,14 @@ class TeamAdmin(admin.ModelAdmin):
     list_display = ['name', 'captain_name', 'created_at']
     search_fields = ['name', 'captain_name']
     list_filter = ['created_at']
+    inlines = [LogoVariantInline]
+
+
+@admin.register(TeamStanding)
+class TeamStandingAdmin(admin.ModelAdmin):
+    list_display = ['rank', 'team', 'played', 'wins', 'losses', 'win_rate', 'rating', 'updated_at']
+    readonly_fields = ['team', 'wins', 'losses', 'played', 'win_rate', 'rating', 'rank', 'updated_at']
+    ordering = ['rank']
 
 
 @admin.register(MatchDay)
@@ -25,5 +50,12 @@ class MatchAdmin(admin.ModelAdmin):
 
 @admin.register(Tournament)
 class TournamentAdmin(admin.ModelAdmin):
-    list_display = ['name', 'status', 'champion', 'created_at']
-    list_filter = ['status']
+    list_display = ['name', 'status', 'champion', 'is_current', 'created_at']
+    list_filter = ['status', 'is_current']
+
+
+@admin.register(Bracket)
+class BracketAdmin(admin.ModelAdmin):
+    list_display = ['tournament', 'format', 'size', 'created_at']
+    readonly_fields = ['tournament', 'format', 'size']
+    inlines = [BracketMatchInline]
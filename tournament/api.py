@@ -0,0 +1,177 @@
+from functools import wraps
+
+from django.core.files.storage import default_storage
+from django.http import Http404, JsonResponse
+
+from .cache import cache_public_page, conditional_public_page
+from .models import Team, TeamStanding, MatchDay, Match
+from .standings import latest_snapshot
+from .ratings import rating_history
+
+# Public field name -> ORM lookup used in values()
+STANDING_FIELDS = {
+    'rank': 'rank',
+    'team': 'team_id',
+    'name': 'team__name',
+    'played': 'played',
+    'wins': 'wins',
+    'losses': 'losses',
+    'win_rate': 'win_rate',
+    'rating': 'rating',
+}
+
+# Snapshots have no rating history
+SNAPSHOT_FIELDS = {name: lookup for name, lookup in STANDING_FIELDS.items() if name != 'rating'}
+
+TEAM_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'captain': 'captain_name',
+    'logo': 'logo',
+    'wins': 'standing__wins',
+    'losses': 'standing__losses',
+    'played': 'standing__played',
+    'win_rate': 'standing__win_rate',
+    'rating': 'standing__rating',
+}
+
+MATCH_DAY_FIELDS = {
+    'id': 'id',
+    'day_number': 'day_number',
+    'name': 'name',
+    'date': 'date',
+}
+
+MATCH_FIELDS = {
+    'id': 'id',
+    'team_a': 'team_a__name',
+    'team_b': 'team_b__name',
+    'winner': 'winner__name',
+    'played_at': 'played_at',
+}
+
+
+class ParameterError(ValueError):
+    pass
+
+
+class FieldError(ParameterError):
+    pass
+
+
+def select_fields(request, available, param='fields'):
+    """Resolve a ``?fields=a,b`` sparse fieldset to ``{name: lookup}``"""
+    requested = request.GET.get(param)
+    if not requested:
+        return dict(available)
+
+    selected = {}
+    for name in requested.split(','):
+        name = name.strip()
+        if name not in available:
+            raise FieldError(f'Campo desconocido en {param}: {name}')
+        selected[name] = available[name]
+    return selected
+
+
+def project(queryset, fields, extra=()):
+    """Run a values() projection and rename lookups to public field names"""
+    lookups = list(fields.values())
+    names = list(fields)
+    rows = []
+    for values in queryset.values_list(*lookups, *extra):
+        rows.append((dict(zip(names, values)), values[len(lookups):]))
+    return rows
+
+
+def json_response(data):
+    return JsonResponse(data, json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False})
+
+
+def api_view(view_func):
+    """Public JSON endpoint with the same caching and validators as the HTML pages"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view_func(request, *args, **kwargs)
+        except ParameterError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+    return conditional_public_page(cache_public_page(wrapper))
+
+
+@api_view
+def standings_api(request):
+    """Standings rows in rank order, today or as of a match day with ?as_of="""
+    as_of = request.GET.get('as_of')
+    if not as_of:
+        fields = select_fields(request, STANDING_FIELDS)
+        rows = project(TeamStanding.objects.order_by('rank'), fields)
+        return json_response({'standings': [row for row, _ in rows]})
+
+    if not as_of.isdigit():
+        raise ParameterError(f'as_of debe ser un número de jornada: {as_of}')
+    fields = select_fields(request, SNAPSHOT_FIELDS)
+    if not MatchDay.objects.filter(day_number=int(as_of)).exists():
+        raise Http404
+    standings = [row for row, _ in project(latest_snapshot(match_day__day_number__lte=int(as_of)), fields)]
+    if not standings:
+        # Before the first result every team is even, as on the standings page
+        teams = Team.objects.order_by('name').values_list('pk', 'name')
+        standings = [
+            {
+                name: value
+                for name, value in {
+                    'rank': rank, 'team': team_id, 'name': team_name,
+                    'played': 0, 'wins': 0, 'losses': 0, 'win_rate': 0.0,
+                }.items()
+                if name in fields
+            }
+            for rank, (team_id, team_name) in enumerate(teams, start=1)
+        ]
+    return json_response({'as_of': int(as_of), 'standings': standings})
+
+
+@api_view
+def teams_api(request):
+    """Teams with their stats, alphabetically"""
+    fields = select_fields(request, TEAM_FIELDS)
+    teams = []
+    for row, _ in project(Team.objects.order_by('name'), fields):
+        if row.get('logo'):
+            row['logo'] = default_storage.url(row['logo'])
+        teams.append(row)
+    return json_response({'teams': teams})
+
+
+@api_view
+def schedule_api(request):
+    """Match days with their matches, two queries in total"""
+    day_fields = select_fields(request, MATCH_DAY_FIELDS)
+    match_fields = select_fields(request, MATCH_FIELDS, param='match_fields')
+
+    match_days = []
+    by_id = {}
+    for row, (pk,) in project(MatchDay.objects.order_by('day_number'), day_fields, extra=('id',)):
+        row['matches'] = []
+        by_id[pk] = row
+        match_days.append(row)
+
+    matches = Match.objects.order_by('match_day__day_number', 'created_at')
+    for row, (match_day_id,) in project(matches, match_fields, extra=('match_day_id',)):
+        by_id[match_day_id]['matches'].append(row)
+
+    return json_response({'match_days': match_days})
+
+
+@api_view
+def team_ratings_api(request, team_id):
+    """A team's Elo rating after each of its decided matches, as parallel arrays"""
+    match_ids, ratings = rating_history(team_id)
+    if not match_ids and not Team.objects.filter(pk=team_id).exists():
+        raise Http404
+    return json_response({
+        'team': team_id,
+        'matches': match_ids,
+        'ratings': [round(rating, 1) for rating in ratings],
+    })
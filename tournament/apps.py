@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class TournamentConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tournament"
+
+    def ready(self):
+        from django.conf import settings
+        from . import signals  # noqa: F401
+
+        if settings.TEMPLATE_PROFILING:
+            from .profiling import install
+            install()
@@ -0,0 +1,67 @@
+import random
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from .models import Team, TeamStanding, MatchDay, Match
+
+
+def seed_tournament(teams, match_days, matches, completed=0.8, seed=0, batch_size=5000):
+    """Bulk-insert a synthetic season and return ``(team_ids, match_day_ids)``
+
+    ``completed`` is the share of matches that get a winner. Team names are
+    prefixed so seeding never collides with real teams.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    Team.objects.bulk_create(
+        [Team(name=f'Bench {seed}-{i}') for i in range(teams)], batch_size=batch_size,
+    )
+    team_ids = list(
+        Team.objects.filter(name__startswith=f'Bench {seed}-').values_list('pk', flat=True)
+    )
+    TeamStanding.objects.bulk_create(
+        [TeamStanding(team_id=pk) for pk in team_ids], batch_size=batch_size, ignore_conflicts=True,
+    )
+
+    first_day = (MatchDay.objects.order_by('-day_number').values_list('day_number', flat=True).first() or 0) + 1
+    MatchDay.objects.bulk_create(
+        [
+            MatchDay(day_number=first_day + i, name=f'Jornada {first_day + i}', date=(now + timedelta(days=i)).date())
+            for i in range(match_days)
+        ],
+        batch_size=batch_size,
+    )
+    match_day_ids = list(
+        MatchDay.objects.filter(day_number__gte=first_day).order_by('day_number').values_list('pk', flat=True)
+    )
+
+    batch = []
+    for i in range(matches):
+        team_a, team_b = rng.sample(team_ids, 2)
+        winner = None
+        played_at = None
+        if rng.random() < completed:
+            winner = rng.choice((team_a, team_b))
+            played_at = now - timedelta(minutes=matches - i)
+        batch.append(Match(
+            match_day_id=match_day_ids[i * len(match_day_ids) // matches],
+            team_a_id=team_a,
+            team_b_id=team_b,
+            winner_id=winner,
+            played_at=played_at,
+        ))
+        if len(batch) >= batch_size:
+            Match.objects.bulk_create(batch)
+            batch = []
+    Match.objects.bulk_create(batch)
+
+    return team_ids, match_day_ids
+
+
+def analyze():
+    """Refresh planner statistics after a bulk load"""
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
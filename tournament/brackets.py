@@ -0,0 +1,226 @@
+from itertools import groupby
+
+from django.db import transaction
+
+from .cache import bump_data_version
+from .models import Bracket, BracketMatch, TeamStanding, Tournament
+
+MAX_TEAMS = 256
+
+STAGES = [stage for stage, _ in BracketMatch.STAGE_CHOICES]
+# Winners bracket rounds named by how many matches they have
+ROUND_NAMES = {1: 'Final', 2: 'Semifinales', 4: 'Cuartos de final', 8: 'Octavos de final'}
+
+
+class BracketError(Exception):
+    """A bracket can't be created or a result can't be recorded"""
+
+
+def seed_order(size):
+    """Seeds in first round order, so the top seeds only meet late
+
+    For 8 slots: 1 v 8, 4 v 5, 2 v 7, 3 v 6.
+    """
+    order = [1]
+    while len(order) < size:
+        total = 2 * len(order) + 1
+        order = [seed for high in order for seed in (high, total - high)]
+    return order
+
+
+def bracket_layout(size, double=False):
+    """Nodes of a bracket with ``size`` first round slots, each before the nodes it feeds
+
+    Every node is ``(position, stage, round, winner_to, loser_to)``, where
+    the targets are ``2 * position + slot`` of the next node or None. The
+    winners bracket is a heap: the final is position 1 and match ``p``
+    feeds match ``p // 2``, so its target is ``p`` itself. The losers
+    bracket and the grand final follow from position ``size``, round after
+    round. Losers of the first round meet each other; losers of each later
+    winners round drop in, in reverse order to delay rematches.
+    """
+    rounds = size.bit_length() - 1
+    final = 2 * size - 2 if double else None
+
+    losers_start = {}
+    position = size
+    for round in range(1, 2 * rounds - 1 if double else 1):
+        losers_start[round] = position
+        position += size >> ((round + 1) // 2 + 1)
+
+    nodes = []
+    for round in range(1, rounds + 1):
+        first = size >> round
+        for position in range(first, 2 * first):
+            if position > 1:
+                winner_to = position
+            else:
+                winner_to = 2 * final if double else None
+            loser_to = None
+            if double and round == 1:
+                loser_to = 2 * losers_start[1] + position - first
+            elif double:
+                loser_to = 2 * (losers_start[2 * round - 2] + 2 * first - 1 - position) + 1
+            nodes.append((position, 'winners', round, winner_to, loser_to))
+
+    for round, start in losers_start.items():
+        count = size >> ((round + 1) // 2 + 1)
+        for match in range(count):
+            if round == len(losers_start):
+                winner_to = 2 * final + 1
+            elif round % 2:
+                winner_to = 2 * (losers_start[round + 1] + match)
+            else:
+                winner_to = 2 * losers_start[round + 1] + match
+            nodes.append((start + match, 'losers', round, winner_to, None))
+
+    if double:
+        nodes.append((final, 'final', 1, None, None))
+    return nodes
+
+
+def _resolve(nodes, slots):
+    """Keep the nodes that are real matches and point results past the byes
+
+    ``slots`` maps the targets of the first round to team ids (or None for
+    a bye). Whether a slot is ever filled only depends on the byes, not on
+    results, so a node with a single possible team just passes it on and
+    gets no row. Returns the kept nodes as ``(position, stage, round,
+    winner_to, loser_to, team_a, team_b)``.
+    """
+    # target -> ('team', id), ('winner', position), ('loser', position) or None
+    sources = {target: ('team', team) if team is not None else None for target, team in slots.items()}
+    real = {}
+    for position, stage, round, winner_to, loser_to in nodes:
+        inputs = (sources.get(2 * position), sources.get(2 * position + 1))
+        if None not in inputs:
+            real[position] = [position, stage, round, None, None, *inputs]
+            outputs = ('winner', position), ('loser', position)
+        else:
+            outputs = next(filter(None, inputs), None), None
+        for target, source in zip((winner_to, loser_to), outputs):
+            if target is not None:
+                sources[target] = source
+
+    kept = []
+    for node in real.values():
+        position = node[0]
+        for slot in (0, 1):
+            kind, value = node[5 + slot]
+            if kind == 'team':
+                node[5 + slot] = value
+            else:
+                real[value][3 if kind == 'winner' else 4] = 2 * position + slot
+                node[5 + slot] = None
+        kept.append(node)
+    return kept
+
+
+@transaction.atomic
+def create_bracket(teams, double=False):
+    """Replace the current tournament's bracket with the top ``teams`` of the standings
+
+    The bracket is padded to a power of two with byes for the top seeds.
+    Returns the new Bracket.
+    """
+    minimum = 3 if double else 2
+    if not minimum <= teams <= MAX_TEAMS:
+        raise BracketError(f'Un cuadro necesita entre {minimum} y {MAX_TEAMS} equipos')
+    team_ids = list(TeamStanding.objects.order_by('rank', 'team__name').values_list('pk', flat=True)[:teams])
+    if len(team_ids) < teams:
+        raise BracketError(f'Solo hay {len(team_ids)} equipos inscritos')
+
+    size = max(4 if double else 2, 1 << (teams - 1).bit_length())
+    seeds = seed_order(size)
+    # First round match p (from size // 2) takes targets 2p and 2p + 1
+    slots = {size + i: team_ids[seed - 1] if seed <= teams else None for i, seed in enumerate(seeds)}
+
+    tournament = Tournament.get_current()
+    Bracket.objects.filter(tournament=tournament).delete()
+    bracket = Bracket.objects.create(tournament=tournament, format='double' if double else 'single', size=size)
+    BracketMatch.objects.bulk_create([
+        BracketMatch(
+            bracket=bracket, position=position, stage=stage, round=round,
+            winner_to=winner_to, loser_to=loser_to, team_a_id=team_a, team_b_id=team_b,
+        )
+        for position, stage, round, winner_to, loser_to, team_a, team_b in _resolve(
+            bracket_layout(size, double), slots,
+        )
+    ])
+    # bulk_create skips the model signals that invalidate cached pages
+    transaction.on_commit(bump_data_version)
+    return bracket
+
+
+@transaction.atomic
+def set_bracket_winner(match_id, winner_id):
+    """Record the winner of a bracket match and move both teams on
+
+    A fixed number of writes whatever the bracket size: the match, the slot
+    the winner goes to, the slot the loser goes to (double elimination) and,
+    after the final, the tournament champion. A result can be corrected
+    until the next matches of its teams are decided.
+    """
+    match = BracketMatch.objects.select_for_update().select_related('bracket__tournament').get(pk=match_id)
+    if match.team_a_id is None or match.team_b_id is None:
+        raise BracketError('Este partido aún no tiene a sus dos equipos')
+    if winner_id not in (match.team_a_id, match.team_b_id):
+        raise BracketError('El ganador debe ser uno de los equipos del partido')
+
+    targets = [target for target in (match.winner_to, match.loser_to) if target is not None]
+    if match.winner_id is not None and BracketMatch.objects.filter(
+        bracket_id=match.bracket_id, position__in=[target // 2 for target in targets], winner__isnull=False,
+    ).exists():
+        raise BracketError('El siguiente partido ya se jugó, no se puede cambiar este resultado')
+
+    match.winner_id = winner_id
+    match.save(update_fields=['winner'])
+
+    loser_id = match.team_b_id if winner_id == match.team_a_id else match.team_a_id
+    for target, team in ((match.winner_to, winner_id), (match.loser_to, loser_id)):
+        if target is not None:
+            BracketMatch.objects.filter(bracket_id=match.bracket_id, position=target // 2).update(
+                **{'team_b_id' if target % 2 else 'team_a_id': team},
+            )
+
+    if match.winner_to is None:
+        tournament = match.bracket.tournament
+        tournament.champion_id = winner_id
+        tournament.status = 'completed'
+        tournament.save(update_fields=['champion', 'status', 'updated_at'])
+    # The queryset updates skip the model signals
+    transaction.on_commit(bump_data_version)
+    return match
+
+
+def round_name(bracket, stage, round):
+    if stage == 'final':
+        return 'Gran final'
+    if stage == 'winners' and bracket.format == 'single':
+        return ROUND_NAMES.get(bracket.size >> round, f'Ronda {round}')
+    return f'Ronda {round}'
+
+
+def bracket_rounds(tournament):
+    """``(bracket, [(stage label, [(round name, matches)])])`` from one query
+
+    The bracket is None when the tournament has none.
+    """
+    matches = list(
+        BracketMatch.objects.filter(bracket__tournament=tournament)
+        .select_related('bracket', 'team_a', 'team_b', 'winner')
+    )
+    if not matches:
+        return None, []
+    bracket = matches[0].bracket
+    matches.sort(key=lambda match: (STAGES.index(match.stage), match.round, match.position))
+
+    labels = dict(BracketMatch.STAGE_CHOICES)
+    stages = []
+    for stage, stage_matches in groupby(matches, key=lambda match: match.stage):
+        rounds = [
+            (round_name(bracket, stage, round), list(round_matches))
+            for round, round_matches in groupby(stage_matches, key=lambda match: match.round)
+        ]
+        stages.append((labels[stage], rounds))
+    return bracket, stages
@@ -0,0 +1,172 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.views.decorators.http import condition
+
+from .metrics import registry
+
+DATA_VERSION_KEY = 'tournament:data-version'
+# How long the ETag and Last-Modified of a data version are kept
+VALIDATORS_TIMEOUT = 24 * 60 * 60
+
+
+def version_key(scope):
+    return f'tournament:version:{scope}'
+
+
+def get_version(key):
+    """Current value of a version counter, created on first use"""
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses an old version
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    """Move a version counter forward and return its new value"""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        return get_version(key)
+
+
+def get_data_version():
+    """Current tournament data version, bumped on every write"""
+    return get_version(DATA_VERSION_KEY)
+
+
+def bump_data_version():
+    """Invalidate every cached page by moving to a new data version"""
+    data_validators(bump_version(DATA_VERSION_KEY))
+
+
+def data_validators(version=None):
+    """``(etag, last_modified)`` of a data version, stored when it is first seen
+
+    Last-Modified is when the version was bumped, in whole seconds like HTTP
+    dates, and always after the previous version's so an If-Modified-Since
+    from an older page never matches.
+    """
+    if version is None:
+        version = get_data_version()
+    key = f'tournament:validators:{version}'
+    validators = cache.get(key)
+    if validators is None:
+        modified = int(time.time())
+        previous = cache.get(f'tournament:validators:{version - 1}')
+        if previous is not None:
+            modified = max(modified, int(previous[1].timestamp()) + 1)
+        etag = hashlib.md5(f'{DATA_VERSION_KEY}:{version}'.encode(), usedforsecurity=False).hexdigest()
+        validators = (etag, datetime.fromtimestamp(modified, tz=timezone.utc))
+        # Workers that race here all end up with the first one's timestamp
+        cache.add(key, validators, VALIDATORS_TIMEOUT)
+        validators = cache.get(key) or validators
+    return validators
+
+
+def match_day_fragment_versions(match_day_id):
+    """Versions a match day fragment depends on: its own matches, and anything schedule-wide
+
+    Schedule-wide changes are team renames and bulk updates that skip signals.
+    """
+    versions = cache.get_many([version_key(f'day:{match_day_id}'), version_key('schedule')])
+    if len(versions) < 2:
+        return get_version(version_key(f'day:{match_day_id}')), get_version(version_key('schedule'))
+    return versions[version_key(f'day:{match_day_id}')], versions[version_key('schedule')]
+
+
+def match_day_fragment_key(match_day_id):
+    day_version, schedule_version = match_day_fragment_versions(match_day_id)
+    return f'tournament:fragment:day:{match_day_id}:{day_version}:{schedule_version}'
+
+
+def standings_fragment_key(as_of=None):
+    return f'tournament:fragment:standings:{get_data_version()}:{as_of or "now"}'
+
+
+def head_to_head_fragment_key():
+    return f'tournament:fragment:head-to-head:{get_data_version()}'
+
+
+def bump_match_day_version(match_day_id):
+    bump_version(version_key(f'day:{match_day_id}'))
+
+
+def bump_schedule_version():
+    """Invalidate every match day fragment, for changes that touch all of them"""
+    bump_version(version_key('schedule'))
+
+
+def page_cache_key(request, version=None):
+    if version is None:
+        version = get_data_version()
+    return f'tournament:page:{version}:{request.get_full_path()}'
+
+
+def cache_public_page(view_func):
+    """Serve anonymous GETs from a cache keyed on the tournament data version
+
+    Logged-in users and requests carrying flash messages always get a fresh
+    render, so nothing user-specific ends up in the shared cache.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if (
+            request.method not in ('GET', 'HEAD')
+            or request.user.is_authenticated
+            or len(get_messages(request))
+        ):
+            return view_func(request, *args, **kwargs)
+
+        key = page_cache_key(request)
+        cached = cache.get(key)
+        registry.count_cache('page', hit=cached is not None)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        response = view_func(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            cache.set(key, (response.content, response['Content-Type']), settings.PAGE_CACHE_TIMEOUT)
+        return response
+
+    return wrapper
+
+
+def _public_validators(request):
+    """ETag and Last-Modified shared by the public pages, from the data version
+
+    Returns ``None`` when the response must not be validated: logged-in users
+    and pending flash messages always get a full response.
+    """
+    if not hasattr(request, '_public_validators'):
+        validators = None
+        if not request.user.is_authenticated and not len(get_messages(request)):
+            validators = data_validators()
+        request._public_validators = validators
+    return request._public_validators
+
+
+def public_page_etag(request, *args, **kwargs):
+    validators = _public_validators(request)
+    return validators and validators[0]
+
+
+def public_page_last_modified(request, *args, **kwargs):
+    validators = _public_validators(request)
+    return validators and validators[1]
+
+
+# Answer If-None-Match / If-Modified-Since with 304 before any rendering
+conditional_public_page = condition(
+    etag_func=public_page_etag,
+    last_modified_func=public_page_last_modified,
+)
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .cache import get_data_version
+
+
+def fragment_cache(request):
+    """Key and timeout for the ``{% cache %}`` fragments of the public pages
+
+    The data version is only read from the cache by pages that use it.
+    """
+    return {
+        'data_version': SimpleLazyObject(get_data_version),
+        'fragment_cache_timeout': settings.PAGE_CACHE_TIMEOUT,
+    }
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import threading
+import time
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import TeamStanding
+
+# Slow clients drop events instead of growing memory without bound
+CLIENT_QUEUE_SIZE = 32
+
+
+class Broadcaster:
+    """Fans out live events from this process to every connected SSE client
+
+    Views publish from worker threads; each client waits on its own asyncio
+    queue, so events are handed over with ``call_soon_threadsafe``.
+    """
+
+    def __init__(self):
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        """Register the calling coroutine's client and return its queue"""
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        with self._lock:
+            self._clients[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._clients.pop(queue, None)
+
+    @property
+    def client_count(self):
+        return len(self._clients)
+
+    def publish(self, event, data):
+        """Serialize an event once and queue it for every client"""
+        message = f'event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":"))}\n\n'
+        with self._lock:
+            clients = list(self._clients.items())
+        for queue, loop in clients:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, message)
+            except RuntimeError:
+                # The client's loop already shut down
+                self.unsubscribe(queue)
+
+
+def _offer(queue, message):
+    if not queue.full():
+        queue.put_nowait(message)
+
+
+broadcaster = Broadcaster()
+
+
+def standings_diff(team_ids):
+    """Compact standings rows for the teams that changed"""
+    rows = TeamStanding.objects.filter(pk__in=team_ids).values_list(
+        'team_id', 'team__name', 'rank', 'wins', 'losses', 'played', 'win_rate', 'rating',
+    )
+    return [
+        {'team': team_id, 'name': name, 'rank': rank, 'wins': wins, 'losses': losses,
+         'played': played, 'win_rate': win_rate, 'rating': round(rating)}
+        for team_id, name, rank, wins, losses, played, win_rate, rating in rows
+    ]
+
+
+def match_payload(match):
+    """Compact match summary; team_a and team_b must already be loaded"""
+    winner = match.team_a if match.winner_id == match.team_a_id else match.team_b
+    return {
+        'id': match.id,
+        'team_a': match.team_a.name,
+        'team_b': match.team_b.name,
+        'winner': winner.name,
+        'played_at': match.played_at,
+    }
+
+
+def publish_result(match, team_ids):
+    """Push a recorded winner and the standings rows it changed"""
+    broadcaster.publish('result', {
+        'match': match_payload(match),
+        'standings': standings_diff(team_ids),
+        'sent': time.time(),
+    })
+
+
+def publish_results(matches, team_ids):
+    """Push a batch of recorded winners as a single event"""
+    broadcaster.publish('results', {
+        'matches': [match_payload(match) for match in matches],
+        'standings': standings_diff(team_ids),
+        'sent': time.time(),
+    })
+
+
+def publish_match_deleted(match_id, team_ids):
+    broadcaster.publish('match_deleted', {
+        'match': match_id,
+        'standings': standings_diff(team_ids),
+        'sent': time.time(),
+    })
+
+
+def publish_reset():
+    broadcaster.publish('reset', {'sent': time.time()})
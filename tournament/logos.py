@@ -0,0 +1,191 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from .cache import bump_data_version
+from .models import LogoVariant, Team
+from .storage import content_hash
+
+logger = logging.getLogger(__name__)
+
+# Bounding boxes of the generated thumbnails: the 48px and 96px logos on the
+# pages at 1x and 2x
+LOGO_SIZES = (48, 96, 192)
+# Uploads are downscaled to fit this box before anything else
+LOGO_MAX_SIZE = 1024
+LOGO_MAX_UPLOAD = 10 * 1024 * 1024
+# Accepted formats and the extension they are stored under, whatever the file was called
+LOGO_FORMATS = {'PNG': 'png', 'JPEG': 'jpg', 'WEBP': 'webp', 'GIF': 'gif'}
+# Refuse decoding anything bigger than a 40 megapixel photo
+LOGO_MAX_PIXELS = 40_000_000
+
+_executor = None
+
+
+def validate_logo(upload):
+    """Raise ValidationError unless the upload is an image Pillow can read
+
+    The upload is renamed after the detected format, so a PNG sent as
+    ``logo.html`` is stored and served as a PNG.
+    """
+    if upload.size > LOGO_MAX_UPLOAD:
+        raise ValidationError(f'El logo no puede superar {LOGO_MAX_UPLOAD // (1024 * 1024)} MB')
+    try:
+        with Image.open(upload) as image:
+            if image.format not in LOGO_FORMATS:
+                raise ValidationError('Formato de imagen no soportado (usa PNG, JPEG, WebP o GIF)')
+            if image.width * image.height > LOGO_MAX_PIXELS:
+                raise ValidationError('La imagen es demasiado grande')
+            image.verify()
+            upload.name = f'logo.{LOGO_FORMATS[image.format]}'
+    except (OSError, SyntaxError, Image.DecompressionBombError):
+        raise ValidationError('El archivo no es una imagen válida')
+    finally:
+        upload.seek(0)
+
+
+def _load(file):
+    """Decode an image upright and in a mode every encoder accepts"""
+    with Image.open(file) as image:
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        return image.convert('RGBA' if has_alpha else 'RGB')
+
+
+def _encode(image, fmt):
+    out = BytesIO()
+    if fmt == 'webp':
+        image.save(out, 'WEBP', quality=80)
+    elif fmt == 'png':
+        image.save(out, 'PNG', optimize=True)
+    else:
+        image.save(out, 'JPEG', quality=85, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def _extension(fmt):
+    return 'jpg' if fmt == 'jpeg' else fmt
+
+
+def _fallback_format(image):
+    """PNG keeps transparency; opaque logos are usually photos and much smaller as JPEG"""
+    return 'png' if image.mode == 'RGBA' else 'jpeg'
+
+
+def process_logo(team_id, force=False):
+    """Downscale a team's logo and generate its thumbnails
+
+    Safe to call repeatedly: a logo whose variants are already up to date is
+    left alone unless ``force`` is set. Returns True when work was done.
+    """
+    team = Team.objects.filter(pk=team_id).first()
+    if team is None:
+        return False
+    existing = list(team.logo_variants.all())
+
+    if not team.logo:
+        if not existing:
+            return False
+        LogoVariant.objects.filter(team=team).delete()
+        transaction.on_commit(bump_data_version)
+        return True
+    up_to_date = existing and all(v.source == team.logo.name for v in existing)
+    if up_to_date and content_hash(team.logo.name) and not force:
+        return False
+
+    logo = team.logo
+    source = logo.name
+    with logo.open('rb') as f:
+        data = f.read()
+    image = _load(BytesIO(data))
+    if max(image.size) > LOGO_MAX_SIZE:
+        image.thumbnail((LOGO_MAX_SIZE, LOGO_MAX_SIZE), Image.LANCZOS)
+        fmt = _fallback_format(image)
+        logo.save(f'logo.{_extension(fmt)}', ContentFile(_encode(image, fmt)), save=False)
+    elif not content_hash(source):
+        # Uploaded before logos were content addressed, store it again under its hash
+        logo.save(os.path.basename(source), ContentFile(data), save=False)
+
+    fallback = _fallback_format(image)
+    variants = []
+    previous = None
+    for size in LOGO_SIZES:
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size), Image.LANCZOS)
+        if thumbnail.size == previous:
+            # A small logo stops shrinking, don't store the same pixels twice
+            continue
+        previous = thumbnail.size
+        for fmt in ('webp', fallback):
+            variant = LogoVariant(
+                team=team, source=logo.name, size=size, format=fmt,
+                width=thumbnail.width, height=thumbnail.height,
+            )
+            content = ContentFile(_encode(thumbnail, fmt))
+            variant.image.save(f'logo.{_extension(fmt)}', content, save=False)
+            variants.append(variant)
+
+    with transaction.atomic():
+        # Only keep the result if nobody uploaded another logo meanwhile
+        if not Team.objects.select_for_update().filter(pk=team.pk, logo=source).exists():
+            transaction.on_commit(lambda: delete_unreferenced([logo.name] + [v.image.name for v in variants]))
+            return False
+        if logo.name != source:
+            Team.objects.filter(pk=team.pk).update(logo=logo.name)
+            transaction.on_commit(lambda: delete_unreferenced([source]))
+        LogoVariant.objects.filter(team=team).delete()
+        LogoVariant.objects.bulk_create(variants)
+        transaction.on_commit(bump_data_version)
+    return True
+
+
+def delete_unreferenced(names):
+    """Delete logo files that no team or variant points at anymore
+
+    Files are content addressed and shared between identical uploads, so a
+    file is only removed once nothing refers to it.
+    """
+    names = {name for name in names if name}
+    if not names:
+        return
+    referenced = set(Team.objects.filter(logo__in=names).values_list('logo', flat=True))
+    referenced.update(LogoVariant.objects.filter(image__in=names).values_list('image', flat=True))
+    storage = Team._meta.get_field('logo').storage
+    for name in names - referenced:
+        storage.delete(name)
+
+
+def _process_in_worker(team_id):
+    try:
+        process_logo(team_id)
+    except Exception:
+        logger.exception('Processing the logo of team %s failed', team_id)
+    finally:
+        # The worker thread opened its own connections
+        connections.close_all()
+
+
+def schedule_logo_processing(team_id):
+    """Process a team's logo once the current transaction commits
+
+    Runs on a background thread so uploads return immediately, or inline when
+    ``LOGO_WORKERS`` is 0. A logo left unprocessed by a restart is picked up by
+    the ``process_logos`` command; pages show the original file until then.
+    """
+    def run():
+        global _executor
+        if not settings.LOGO_WORKERS:
+            process_logo(team_id)
+            return
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.LOGO_WORKERS, thread_name_prefix='logos')
+        _executor.submit(_process_in_worker, team_id)
+
+    transaction.on_commit(run)
@@ -0,0 +1,85 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from tournament.benchmarks import analyze, seed_tournament
+from tournament.models import Team, Match
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a large synthetic season, then compare query plans and timings of the '
+        'Match hot paths with and without the Match indexes. Everything is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teams', type=int, default=200)
+        parser.add_argument('--match-days', type=int, default=500)
+        parser.add_argument('--matches', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query, best time is reported')
+        parser.add_argument('--plans', action='store_true', help='Print the full query plans')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Database: {connection.vendor}')
+        self.stdout.write(f'Seeding {options["teams"]} teams, {options["matches"]} matches...')
+
+        with transaction.atomic():
+            team_ids, match_day_ids = seed_tournament(
+                options['teams'], options['match_days'], options['matches'],
+            )
+            analyze()
+            queries = self.hot_paths(team_ids, match_day_ids)
+
+            self.stdout.write(self.style.MIGRATE_HEADING('\nWith indexes'))
+            after = self.run(queries, options)
+
+            # Plain DROP INDEX works on every backend inside the rolled-back transaction
+            with connection.cursor() as cursor:
+                for index in Match._meta.indexes:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+            analyze()
+
+            self.stdout.write(self.style.MIGRATE_HEADING('\nWithout indexes'))
+            before = self.run(queries, options)
+
+            self.stdout.write(self.style.MIGRATE_HEADING('\nSummary'))
+            for name in queries:
+                speedup = before[name] / after[name] if after[name] else float('inf')
+                self.stdout.write(
+                    f'{name:<20} {before[name] * 1000:9.2f} ms -> {after[name] * 1000:9.2f} ms  ({speedup:.1f}x)'
+                )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('\n✓ Benchmark data and index changes rolled back'))
+
+    def hot_paths(self, team_ids, match_day_ids):
+        """Querysets (or callables) matching what the views run"""
+        pair = team_ids[:2]
+        middle_day = match_day_ids[len(match_day_ids) // 2]
+        return {
+            'standings': lambda: Team.objects.with_stats(),
+            'refresh two teams': lambda: Team.objects.with_stats().filter(pk__in=pair),
+            'recent matches': lambda: Match.objects.filter(winner__isnull=False).order_by(
+                '-played_at', '-created_at'
+            )[:5],
+            'match day schedule': lambda: Match.objects.filter(match_day_id=middle_day),
+        }
+
+    def run(self, queries, options):
+        timings = {}
+        for name, build in queries.items():
+            queryset = build()
+            plan = queryset.explain()
+            if options['plans']:
+                self.stdout.write(f'\n-- {name}\n{plan}')
+            else:
+                self.stdout.write(f'-- {name}: {plan.splitlines()[0] if plan else ""}')
+
+            best = float('inf')
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                list(build())
+                best = min(best, time.perf_counter() - start)
+            timings[name] = best
+        return timings
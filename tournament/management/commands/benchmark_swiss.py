@@ -0,0 +1,54 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from tournament.benchmarks import seed_tournament
+from tournament.models import Team, Match, MatchDay
+from tournament.scheduling import generate_swiss_round
+from tournament.standings import refresh_standings
+
+
+class Command(BaseCommand):
+    help = (
+        'Time Swiss rounds (pairing and writing the match day) across field sizes, '
+        'with random results in between. Everything is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[64, 256, 1024, 2048], help='Numbers of teams')
+        parser.add_argument('--rounds', type=int, default=10, help='Rounds to pair per field size')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.stdout.write(f'{"teams":>6} {"rounds":>6} {"mean ms":>9} {"worst ms":>9} {"rematches":>9}')
+
+        for size in options['sizes']:
+            with transaction.atomic():
+                # Only the synthetic field gets paired; rolled back below
+                MatchDay.objects.all().delete()
+                Team.objects.all().delete()
+                team_ids, _ = seed_tournament(size, 0, 0, seed=options['seed'])
+
+                timings, rematches = [], 0
+                for _ in range(options['rounds']):
+                    start = time.perf_counter()
+                    match_day, _, _, repeated = generate_swiss_round()
+                    timings.append(time.perf_counter() - start)
+                    rematches += repeated
+
+                    matches = list(Match.objects.filter(match_day=match_day))
+                    for match in matches:
+                        match.winner_id = rng.choice((match.team_a_id, match.team_b_id))
+                    Match.objects.bulk_update(matches, ['winner'], batch_size=2000)
+                    refresh_standings(team_ids)
+
+                self.stdout.write(
+                    f'{size:>6} {len(timings):>6} {statistics.mean(timings) * 1000:>9.1f} '
+                    f'{max(timings) * 1000:>9.1f} {rematches:>9}'
+                )
+                transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('\n✓ Benchmark data rolled back'))
@@ -0,0 +1,154 @@
+import json
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import URLPattern, get_resolver, reverse
+from tournament.models import Team, TeamStanding, MatchDay
+
+# Long-lived or non-page endpoints that can't be timed as a single request
+SKIPPED_URLS = {'live', 'admin_logout'}
+# Staff-only URLs outside /dashboard/
+STAFF_URLS = {'metrics'}
+# A real value for each URL argument, the busiest object so timings are the worst case
+URL_ARGUMENTS = {
+    'match_day_id': lambda: (
+        MatchDay.objects.annotate(size=Count('matches')).order_by('-size').values_list('pk', flat=True).first()
+    ),
+    'team_id': lambda: TeamStanding.objects.order_by('-played').values_list('pk', flat=True).first(),
+    'path': lambda: Team.objects.exclude(logo='').exclude(logo__isnull=True).values_list('logo', flat=True).first(),
+}
+# The run gets a cache of its own so clearing it never touches a shared cache
+BENCHMARK_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark-views'},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Request every URL in kongleague/urls.py through the test client and record wall time, '
+        'query count and peak memory per view as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='bench_output.json', help='Where to write the JSON results')
+        parser.add_argument('--repeat', type=int, default=5, help='Requests per view, the median time is reported')
+        parser.add_argument('--warm-cache', action='store_true', help='Keep the page cache between requests')
+        parser.add_argument('--compare', help='Earlier results file to print the differences against')
+        parser.add_argument('--views', nargs='+', help='Only benchmark these URL names')
+
+    def handle(self, *args, **options):
+        results = {
+            'commit': self.git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'database': connection.vendor,
+            'views': {},
+        }
+
+        # Everything, including the throwaway staff user and its session, is rolled back
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=['*'], CACHES=BENCHMARK_CACHES):
+            staff = User.objects.create_user('benchmark-staff', is_staff=True)
+            for name, path, login in self.urls():
+                if options['views'] and name not in options['views']:
+                    continue
+                client = Client()
+                if login:
+                    client.force_login(staff)
+                results['views'][name] = self.measure(client, path, options)
+                row = results['views'][name]
+                self.stdout.write(
+                    f'{name:<22} {row["status"]}  {row["wall_ms"]:9.2f} ms  '
+                    f'{row["queries"]:5d} queries  {row["peak_kb"]:9.1f} KB'
+                )
+            transaction.set_rollback(True)
+
+        with open(options['output'], 'w') as f:
+            json.dump(results, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'\n✓ Results written to {options["output"]}'))
+
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+    def urls(self):
+        """(name, path, needs_login) for every named URL, arguments filled from real objects"""
+        for pattern in get_resolver().url_patterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name or pattern.name in SKIPPED_URLS:
+                continue
+            kwargs = {name: URL_ARGUMENTS[name]() for name in pattern.pattern.converters}
+            if None in kwargs.values():
+                self.stdout.write(self.style.WARNING(f'⚠ {pattern.name}: nothing in the database to fill it, skipped'))
+                continue
+            path = reverse(pattern.name, kwargs=kwargs)
+            yield pattern.name, path, path.startswith('/dashboard/') or pattern.name in STAFF_URLS
+
+    def measure(self, client, path, options):
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        timings = []
+        for _ in range(options['repeat']):
+            if not options['warm_cache']:
+                cache.clear()
+            queries = 0
+            with connection.execute_wrapper(count_queries):
+                start = time.perf_counter()
+                response = client.get(path)
+                size = self.consume(response)
+                timings.append(time.perf_counter() - start)
+
+        # tracemalloc slows everything down, so memory gets a run of its own
+        if not options['warm_cache']:
+            cache.clear()
+        tracemalloc.start()
+        self.consume(client.get(path))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        return {
+            'path': path,
+            'status': response.status_code,
+            'wall_ms': statistics.median(timings) * 1000,
+            'queries': queries,
+            'peak_kb': peak / 1024,
+            'bytes': size,
+        }
+
+    def consume(self, response):
+        """Body size in bytes, reading streamed responses chunk by chunk like a client would"""
+        if not response.streaming:
+            return len(response.content)
+        return sum(len(chunk) for chunk in response.streaming_content)
+
+    def compare(self, path, results):
+        with open(path) as f:
+            previous = json.load(f)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\nCompared with {previous.get("commit") or path}'))
+        for name, row in results['views'].items():
+            before = previous['views'].get(name)
+            if not before:
+                continue
+            self.stdout.write(
+                f'{name:<22} {before["wall_ms"]:9.2f} -> {row["wall_ms"]:9.2f} ms  '
+                f'{before["queries"]:5d} -> {row["queries"]:5d} queries  '
+                f'{before["peak_kb"]:9.1f} -> {row["peak_kb"]:9.1f} KB'
+            )
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
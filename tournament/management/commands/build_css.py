@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from tournament import stylesheet
+
+
+class Command(BaseCommand):
+    help = 'Build the site stylesheet with only the utility classes the templates use'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Fail if the committed stylesheet is out of date or a template uses an '
+                                 'unknown class instead of writing it')
+
+    def handle(self, *args, **options):
+        templates = list(stylesheet.template_files([stylesheet.TEMPLATES_DIR]))
+        css, count = stylesheet.build(templates)
+        current = stylesheet.OUTPUT.read_text(encoding='utf-8') if stylesheet.OUTPUT.exists() else None
+
+        unknown = stylesheet.unknown_classes(templates)
+        for class_name, files in unknown.items():
+            self.stdout.write(self.style.WARNING(f'⚠ Unknown class "{class_name}" in {", ".join(files)}'))
+
+        if options['check']:
+            if unknown:
+                raise CommandError(f'{len(unknown)} unknown classes, add them to tournament/stylesheet.py or fix them')
+            if css != current:
+                raise CommandError(f'{stylesheet.OUTPUT.name} is out of date, run "python manage.py build_css"')
+            self.stdout.write(self.style.SUCCESS(f'✓ {stylesheet.OUTPUT.name} is up to date'))
+            return
+
+        stylesheet.OUTPUT.parent.mkdir(parents=True, exist_ok=True)
+        stylesheet.OUTPUT.write_text(css, encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Wrote {stylesheet.OUTPUT.name}: {count} utilities from {len(templates)} templates, '
+            f'{len(css.encode()) / 1024:.1f} KB'
+        ))
@@ -0,0 +1,44 @@
+import posixpath
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from tournament.models import Team, LogoVariant
+
+LOGO_DIRECTORIES = ['team_logos', 'team_logos/variants']
+
+
+class Command(BaseCommand):
+    help = 'Delete logo files that no team or logo variant refers to anymore'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only list the files that would be deleted')
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Keep files younger than this many seconds, they may belong to an upload in progress',
+        )
+
+    def handle(self, *args, **options):
+        storage = Team._meta.get_field('logo').storage
+        referenced = set(Team.objects.exclude(logo='').exclude(logo__isnull=True).values_list('logo', flat=True))
+        referenced.update(LogoVariant.objects.values_list('image', flat=True))
+        cutoff = timezone.now() - timedelta(seconds=options['min_age'])
+
+        deleted = freed = 0
+        for directory in LOGO_DIRECTORIES:
+            if not storage.exists(directory):
+                continue
+            for filename in storage.listdir(directory)[1]:
+                name = posixpath.join(directory, filename)
+                if name in referenced or storage.get_modified_time(name) > cutoff:
+                    continue
+                size = storage.size(name)
+                if options['dry_run']:
+                    self.stdout.write(f'{name} ({size / 1024:.1f} KB)')
+                else:
+                    storage.delete(name)
+                deleted += 1
+                freed += size
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'✓ {verb} {deleted} orphaned file(s), {freed / 1024:.1f} KB'))
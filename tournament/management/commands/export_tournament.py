@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from tournament.transfer import FORMATS, export_lines, guess_format
+
+
+class Command(BaseCommand):
+    help = 'Export teams, match days and matches as CSV or JSON lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', nargs='?', help='File to write, standard output when omitted')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the output file extension, or json')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        fmt = options['format'] or (guess_format(output) if output else 'json')
+
+        if not output:
+            for line in export_lines(fmt):
+                self.stdout.write(line, ending='')
+            return
+
+        rows = 0
+        with open(output, 'w', encoding='utf-8', newline='') as f:
+            for line in export_lines(fmt):
+                f.write(line)
+                rows += 1
+        if fmt == 'csv':
+            rows -= 1
+        self.stderr.write(self.style.SUCCESS(f'✓ Exported {rows} rows to {output}'))
@@ -0,0 +1,33 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from tournament.scheduling import generate_round_robin
+
+
+class Command(BaseCommand):
+    help = 'Generate a single or double round-robin schedule for all teams'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--double', action='store_true', help='Every pair plays twice, sides swapped')
+        parser.add_argument('--start-date', type=date.fromisoformat, help='Date of the first new match day (YYYY-MM-DD)')
+        parser.add_argument('--days-between', type=int, default=7, help='Days between consecutive match days')
+
+    def handle(self, *args, **options):
+        if options['days_between'] < 0:
+            raise CommandError('--days-between must not be negative')
+
+        start = time.perf_counter()
+        match_days, matches = generate_round_robin(
+            double=options['double'],
+            start_date=options['start_date'],
+            days_between=options['days_between'],
+        )
+        elapsed = time.perf_counter() - start
+
+        if not matches:
+            self.stdout.write(self.style.WARNING('⚠ Every pairing is already scheduled, nothing to do'))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Created {match_days} match days and {matches} matches in {elapsed:.2f}s'
+        ))
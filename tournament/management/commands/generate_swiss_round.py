@@ -0,0 +1,29 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from tournament.models import Team
+from tournament.scheduling import PairingError, generate_swiss_round
+
+
+class Command(BaseCommand):
+    help = 'Create the next match day with Swiss pairings from the current standings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, help='Date of the new match day (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            match_day, matches, bye, rematches = generate_swiss_round(date=options['date'])
+        except PairingError as error:
+            raise CommandError(error)
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Created {match_day.name} with {matches} matches in {elapsed:.2f}s'
+        ))
+        if bye is not None:
+            self.stdout.write(f'Bye: {Team.objects.get(pk=bye).name}')
+        if rematches:
+            self.stdout.write(self.style.WARNING(f'⚠ {rematches} rematch(es), every other pairing was already played'))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from tournament.transfer import FORMATS, guess_format, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Import teams, match days and matches from a CSV or JSON lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='File written by export_tournament or in the same layout')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+
+    def handle(self, *args, **options):
+        path = options['input']
+        fmt = options['format'] or guess_format(path)
+
+        start = time.perf_counter()
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as f:
+                result = import_rows(read_rows(f, fmt))
+        except OSError as e:
+            raise CommandError(f'Could not read {path}: {e}')
+        except UnicodeDecodeError:
+            raise CommandError(f'{path} must be UTF-8 encoded')
+        elapsed = time.perf_counter() - start
+
+        for line, message in result.errors:
+            self.stdout.write(self.style.WARNING(f'⚠ Line {line}: {message}'))
+        if result.error_count > len(result.errors):
+            self.stdout.write(self.style.WARNING(f'⚠ ... {result.error_count - len(result.errors)} more'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Imported {result.teams} teams, {result.match_days} match days and '
+            f'{result.matches} matches in {elapsed:.2f}s'
+        ))
@@ -0,0 +1,98 @@
+import asyncio
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from tournament.live import broadcaster
+
+
+class Command(BaseCommand):
+    help = (
+        'Open many concurrent /live/ connections against the ASGI application in-process, '
+        'broadcast events and report the delivery latency'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=1000)
+        parser.add_argument('--events', type=int, default=20)
+        parser.add_argument('--interval', type=float, default=0.2, help='Seconds between broadcasts')
+
+    def handle(self, *args, **options):
+        asyncio.run(self.run(options['clients'], options['events'], options['interval']))
+
+    async def run(self, clients, events, interval):
+        from kongleague.asgi import application
+
+        latencies = []
+        received = asyncio.Event()
+        delivered = [0]
+        disconnect = asyncio.Event()
+
+        async def client(number):
+            request_sent = False
+
+            async def receive():
+                nonlocal request_sent
+                if not request_sent:
+                    request_sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await disconnect.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] != 'http.response.body':
+                    return
+                body = message.get('body', b'')
+                if body.startswith(b'event: result'):
+                    now = time.time()
+                    sent = float(body.split(b'"sent":')[1].split(b'}')[0])
+                    latencies.append(now - sent)
+                    delivered[0] += 1
+                    if delivered[0] % clients == 0:
+                        received.set()
+
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': '/live/',
+                'raw_path': b'/live/',
+                'query_string': b'',
+                'root_path': '',
+                'headers': [(b'host', b'localhost'), (b'accept', b'text/event-stream')],
+                'client': ('127.0.0.1', 10000 + number),
+                'server': ('127.0.0.1', 8000),
+            }
+            await application(scope, receive, send)
+
+        self.stdout.write(f'Connecting {clients} clients...')
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(client(n)) for n in range(clients)]
+        while broadcaster.client_count < clients:
+            await asyncio.sleep(0.05)
+        self.stdout.write(f'✓ {clients} clients connected in {time.perf_counter() - start:.2f}s')
+
+        for _ in range(events):
+            received.clear()
+            # Publish from another thread, like a sync view would
+            payload = {'match': {'id': 1, 'team_a': 'A', 'team_b': 'B', 'winner': 'A'},
+                       'standings': [], 'sent': time.time()}
+            threading.Thread(target=broadcaster.publish, args=('result', payload)).start()
+            await asyncio.wait_for(received.wait(), timeout=30)
+            await asyncio.sleep(interval)
+
+        disconnect.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        latencies.sort()
+        ms = [value * 1000 for value in latencies]
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✓ {len(ms)} deliveries to {clients} clients over {events} broadcasts'
+        ))
+        self.stdout.write(f'p50 {statistics.median(ms):.2f} ms')
+        self.stdout.write(f'p95 {ms[int(len(ms) * 0.95) - 1]:.2f} ms')
+        self.stdout.write(f'p99 {ms[int(len(ms) * 0.99) - 1]:.2f} ms')
+        self.stdout.write(f'max {ms[-1]:.2f} ms')
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from tournament.logos import process_logo
+from tournament.models import Team
+
+
+class Command(BaseCommand):
+    help = 'Downscale team logos and generate their thumbnails, skipping the ones already processed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate every logo, even if up to date')
+
+    def handle(self, *args, **options):
+        processed = failed = 0
+        for team_id, name in Team.objects.order_by('name').values_list('pk', 'name'):
+            try:
+                if process_logo(team_id, force=options['force']):
+                    processed += 1
+            except (OSError, SyntaxError) as e:
+                # Missing or unreadable files shouldn't stop the rest of the backfill
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'⚠ {name}: {e}'))
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Processed {processed} logo(s)'))
+        if failed:
+            self.stdout.write(self.style.WARNING(f'⚠ {failed} logo(s) could not be read'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from tournament.standings import rebuild_standings
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized standings from match results and report any drift'
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            drift = rebuild_standings()
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('✓ Standings are in sync with match results'))
+            return
+
+        for team, field, stored, actual in drift:
+            if field is None:
+                self.stdout.write(self.style.WARNING(f'⚠ {team.name}: missing standings row (created)'))
+            else:
+                self.stdout.write(self.style.WARNING(f'⚠ {team.name}: {field} was {stored}, now {actual}'))
+
+        teams = len({team.pk for team, *_ in drift})
+        self.stdout.write(self.style.SUCCESS(f'\n✓ Standings rebuilt, fixed drift in {teams} team(s)'))
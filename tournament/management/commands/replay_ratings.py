@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from tournament.ratings import replay_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recompute every Elo rating and rating history from all match results, in order'
+
+    def handle(self, *args, **kwargs):
+        start = time.perf_counter()
+        with transaction.atomic():
+            changed = replay_ratings()
+        elapsed = (time.perf_counter() - start) * 1000
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Ratings replayed in {elapsed:.0f} ms, {len(changed)} team(s) changed'
+        ))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from tournament.benchmarks import seed_tournament
+from tournament.cache import bump_data_version
+from tournament.ratings import replay_ratings
+from tournament.standings import rebuild_standings
+
+
+class Command(BaseCommand):
+    help = 'Bulk-insert a synthetic season (teams, match days, matches with results) for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teams', type=int, default=100)
+        parser.add_argument('--match-days', type=int, default=50)
+        parser.add_argument('--matches', type=int, default=5000)
+        parser.add_argument('--completed', type=float, default=0.8, help='Share of matches with a winner')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, also used to name the teams')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with transaction.atomic():
+            seed_tournament(
+                options['teams'], options['match_days'], options['matches'],
+                completed=options['completed'], seed=options['seed'],
+            )
+            # bulk_create skips the signals that keep standings and ratings current
+            rebuild_standings()
+            replay_ratings()
+            transaction.on_commit(bump_data_version)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Seeded {options["teams"]} teams, {options["match_days"]} match days and '
+            f'{options["matches"]} matches in {time.perf_counter() - start:.2f}s'
+        ))
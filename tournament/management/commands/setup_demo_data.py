@@ -23,7 +23,10 @@ class Command(BaseCommand):
         # Create tournament
         tournament, created = Tournament.objects.get_or_create(
             name='KongLeague Season 1',
-            defaults={'status': 'in_progress'}
+            defaults={
+                'status': 'in_progress',
+                'is_current': not Tournament.objects.filter(is_current=True).exists(),
+            }
         )
         if created:
             self.stdout.write(self.style.SUCCESS('✓ Tournament created'))
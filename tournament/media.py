@@ -0,0 +1,105 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags
+from django.views.decorators.http import require_safe
+
+from .storage import content_hash
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+# Files uploaded before content addressing can still change under the same name
+REVALIDATE_CACHE = 'public, max-age=3600'
+
+_single_range = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def byte_range(header, size):
+    """Parse a single-range ``Range`` header into inclusive ``(start, end)``
+
+    Returns None when the header should be ignored and the whole file sent
+    (multiple ranges, bad syntax) and False when it can't be satisfied.
+    """
+    match = _single_range.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # bytes=-N is the last N bytes
+        length = int(last)
+        return (max(size - length, 0), size - 1) if length and size else False
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        return False
+    end = int(last) if last else size - 1
+    return start, min(end, size - 1)
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve an uploaded file with ETag, byte-range and long-lived cache headers
+
+    Content-addressed files (see ``HashedFileSystemStorage``) never change, so
+    browsers and CDNs may keep them for a year without revalidating.
+    """
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        stat = os.stat(fullpath)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+
+    digest = content_hash(path)
+    etag = f'"{digest}"' if digest else f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    headers = {
+        'ETag': etag,
+        'Cache-Control': IMMUTABLE_CACHE if digest else REVALIDATE_CACHE,
+    }
+
+    if_none_match = [tag.removeprefix('W/') for tag in parse_etags(request.headers.get('If-None-Match', ''))]
+    if etag in if_none_match or '*' in if_none_match:
+        response = HttpResponseNotModified()
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    headers['Last-Modified'] = http_date(stat.st_mtime)
+    headers['Accept-Ranges'] = 'bytes'
+    content_type = mimetypes.guess_type(fullpath)[0] or ''
+    if not content_type.startswith('image/') or content_type == 'image/svg+xml':
+        # Only images are uploaded; anything else is a download, never a page of this site
+        content_type = 'application/octet-stream'
+    headers['X-Content-Type-Options'] = 'nosniff'
+
+    requested = None
+    # If-Range: only send a part when the client's copy is still the current file
+    if 'Range' in request.headers and request.headers.get('If-Range', etag) == etag:
+        requested = byte_range(request.headers['Range'], stat.st_size)
+
+    if requested is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+
+    if requested:
+        start, end = requested
+        with open(fullpath, 'rb') as f:
+            f.seek(start)
+            response = HttpResponse(f.read(end - start + 1), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    else:
+        response = FileResponse(open(fullpath, 'rb'), content_type=content_type)
+
+    for header, value in headers.items():
+        response[header] = value
+    return response
@@ -0,0 +1,248 @@
+import atexit
+import bisect
+import json
+import os
+import socket
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from django.conf import settings
+
+# Upper bounds of the request duration buckets, in milliseconds
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Durations kept per view for the rolling histogram and percentiles
+WINDOW_SIZE = 1000
+# Seconds between writes of a process's totals to the shared metrics directory
+FLUSH_INTERVAL = 1
+# ViewHistogram fields that add up across processes
+VIEW_TOTALS = ('count', 'total_ms', 'queries', 'db_ms', 'template_ms', 'bytes', 'buckets')
+
+
+class ViewHistogram:
+    """Durations of one view: totals since startup plus a window of recent requests"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.bytes = 0
+        # Requests per bucket (not cumulative), the last one being +Inf
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.recent = deque(maxlen=WINDOW_SIZE)
+
+    def observe(self, stats):
+        self.count += 1
+        self.total_ms += stats.total_ms
+        self.queries += stats.queries
+        self.db_ms += stats.db_ms
+        self.template_ms += stats.template_ms
+        self.bytes += stats.size or 0
+        self.buckets[bisect.bisect_left(BUCKETS_MS, stats.total_ms)] += 1
+        self.recent.append(stats.total_ms)
+
+    def totals(self):
+        return {field: list(self.buckets) if field == 'buckets' else getattr(self, field) for field in VIEW_TOTALS}
+
+    def percentile(self, durations, fraction):
+        return durations[min(int(len(durations) * fraction), len(durations) - 1)]
+
+    def snapshot(self):
+        durations = sorted(self.recent)
+        window = [0] * (len(BUCKETS_MS) + 1)
+        for duration in durations:
+            window[bisect.bisect_left(BUCKETS_MS, duration)] += 1
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'queries': self.queries,
+            'db_ms': round(self.db_ms, 3),
+            'template_ms': round(self.template_ms, 3),
+            'bytes': self.bytes,
+            'buckets': list(self.buckets),
+            'window': {
+                'count': len(durations),
+                'buckets': window,
+                'p50_ms': round(self.percentile(durations, 0.5), 3) if durations else None,
+                'p95_ms': round(self.percentile(durations, 0.95), 3) if durations else None,
+                'p99_ms': round(self.percentile(durations, 0.99), 3) if durations else None,
+                'max_ms': round(durations[-1], 3) if durations else None,
+            },
+        }
+
+
+class Registry:
+    """Request histograms and cache counters of this process
+
+    With ``METRICS_DIR`` set, the cumulative numbers are also written to one
+    file per process at most every ``FLUSH_INTERVAL`` seconds, so any worker
+    can report the totals of all of them (see ``collect()``).
+    """
+
+    def __init__(self):
+        self._views = {}
+        self._caches = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._flusher_pid = None
+
+    def observe(self, view_name, stats):
+        with self._lock:
+            histogram = self._views.get(view_name)
+            if histogram is None:
+                histogram = self._views[view_name] = ViewHistogram()
+            histogram.observe(stats)
+            self._changed()
+
+    def count_cache(self, name, hit):
+        """Record a lookup in one of the page or fragment caches"""
+        with self._lock:
+            counts = self._caches.setdefault(name, {'hit': 0, 'miss': 0})
+            counts['hit' if hit else 'miss'] += 1
+            self._changed()
+
+    def snapshot(self):
+        """``{view_name: ViewHistogram.snapshot()}``; bucket bounds are ``BUCKETS_MS``"""
+        with self._lock:
+            return {name: histogram.snapshot() for name, histogram in sorted(self._views.items())}
+
+    def totals(self):
+        """The cumulative numbers of this process, as stored in its metrics file"""
+        with self._lock:
+            return {
+                'views': {name: histogram.totals() for name, histogram in self._views.items()},
+                'caches': {name: dict(counts) for name, counts in self._caches.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+            self._caches.clear()
+
+    def _changed(self):
+        self._dirty = True
+        # Started lazily, and again in a forked gunicorn worker
+        if settings.METRICS_DIR and self._flusher_pid != os.getpid():
+            self._flusher_pid = os.getpid()
+            threading.Thread(target=self._flush_periodically, name='metrics', daemon=True).start()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            if self._dirty:
+                self.flush()
+
+    def flush(self):
+        """Write this process's totals to its file in ``METRICS_DIR``"""
+        if not settings.METRICS_DIR:
+            return
+        self._dirty = False
+        data = {**worker_identity(), 'updated': time.time(), **self.totals()}
+        directory = Path(settings.METRICS_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f'{data["hostname"]}-{data["pid"]}.json'
+        # Readers never see a half written file
+        temporary = path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(data), encoding='utf-8')
+        os.replace(temporary, path)
+
+
+registry = Registry()
+atexit.register(registry.flush)
+
+
+def worker_identity():
+    return {'hostname': socket.gethostname(), 'pid': os.getpid(), 'ppid': os.getppid()}
+
+
+def collect():
+    """Totals of every process that wrote to ``METRICS_DIR``, this one included
+
+    Files of workers that have exited are kept: their requests still count.
+    Returns ``{'views': ..., 'caches': ..., 'workers': [...]}``.
+    """
+    if not settings.METRICS_DIR:
+        return {**registry.totals(), 'workers': [{**worker_identity(), 'updated': time.time()}]}
+
+    registry.flush()
+    merged = {'views': {}, 'caches': {}, 'workers': []}
+    for path in sorted(Path(settings.METRICS_DIR).glob('*.json')):
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            continue
+        merged['workers'].append({field: data[field] for field in ('hostname', 'pid', 'ppid', 'updated')})
+        for name, totals in data['views'].items():
+            view = merged['views'].setdefault(name, ViewHistogram().totals())
+            for field in VIEW_TOTALS:
+                if field == 'buckets':
+                    view[field] = [a + b for a, b in zip(view[field], totals[field])]
+                else:
+                    view[field] += totals[field]
+        for name, counts in data['caches'].items():
+            cache = merged['caches'].setdefault(name, {'hit': 0, 'miss': 0})
+            cache['hit'] += counts['hit']
+            cache['miss'] += counts['miss']
+    return merged
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(data):
+    """Prometheus text exposition format (version 0.0.4) of ``collect()``"""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for suffix, labels, value in samples:
+            lines.append(f'{name}{suffix}{_labels(**labels)} {_number(value)}')
+
+    views = sorted(data['views'].items())
+    metric('kongleague_http_requests_total', 'counter', 'Requests handled, by view',
+           [('', {'view': name}, view['count']) for name, view in views])
+
+    samples = []
+    for name, view in views:
+        cumulative = 0
+        for bound, count in zip(BUCKETS_MS + (None,), view['buckets']):
+            cumulative += count
+            le = '+Inf' if bound is None else _number(bound / 1000)
+            samples.append(('_bucket', {'view': name, 'le': le}, cumulative))
+        samples.append(('_sum', {'view': name}, view['total_ms'] / 1000))
+        samples.append(('_count', {'view': name}, view['count']))
+    metric('kongleague_http_request_duration_seconds', 'histogram', 'Request wall time, by view', samples)
+
+    metric('kongleague_db_queries_total', 'counter', 'Database queries run by requests, by view',
+           [('', {'view': name}, view['queries']) for name, view in views])
+    metric('kongleague_db_duration_seconds_total', 'counter', 'Time spent in database queries, by view',
+           [('', {'view': name}, view['db_ms'] / 1000) for name, view in views])
+    metric('kongleague_template_duration_seconds_total', 'counter', 'Time spent rendering templates, by view',
+           [('', {'view': name}, view['template_ms'] / 1000) for name, view in views])
+    metric('kongleague_response_bytes_total', 'counter', 'Response body bytes with a known size, by view',
+           [('', {'view': name}, view['bytes']) for name, view in views])
+
+    metric('kongleague_cache_requests_total', 'counter', 'Page and fragment cache lookups, by cache and result',
+           [('', {'cache': name, 'result': result}, counts[result])
+            for name, counts in sorted(data['caches'].items()) for result in ('hit', 'miss')])
+
+    workers = data['workers']
+    metric('kongleague_worker_info', 'gauge', 'Processes that reported metrics',
+           [('', {'hostname': w['hostname'], 'pid': w['pid'], 'ppid': w['ppid']}, 1) for w in workers])
+    metric('kongleague_worker_last_update_timestamp_seconds', 'gauge', 'When each process last wrote its metrics',
+           [('', {'hostname': w['hostname'], 'pid': w['pid']}, w['updated']) for w in workers])
+    current = worker_identity()
+    metric('kongleague_scrape_worker_info', 'gauge', 'Process that answered this scrape',
+           [('', current, 1)])
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,166 @@
+import heapq
+import logging
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Slowest statements kept per request for the slow request log
+SLOWEST_QUERIES = 3
+MAX_SQL_LENGTH = 500
+
+# Stats of the request being handled in this thread or task
+_current = ContextVar('request_stats', default=None)
+_template_timer_installed = False
+
+
+class RequestStats:
+    """What one request spent its time on
+
+    Instances are also database execute wrappers, so every query run while
+    they are installed is counted and timed.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.total_ms = 0.0
+        self.queries = 0
+        self.db_ms = 0.0
+        self.slowest = []
+        self.template_ms = 0.0
+        self.rendering = False
+        self.size = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            self.queries += 1
+            self.db_ms += duration
+            entry = (duration, self.queries, sql)
+            if len(self.slowest) < SLOWEST_QUERIES:
+                heapq.heappush(self.slowest, entry)
+            else:
+                heapq.heappushpop(self.slowest, entry)
+
+    def capture_queries(self):
+        """Install this as execute wrapper on this thread's connections until the stack closes"""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+    def server_timing(self):
+        return ', '.join([
+            f'total;dur={self.total_ms:.1f}',
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_ms:.1f}',
+        ])
+
+
+def install_template_timer():
+    """Add the time of every top-level template render to the current request's stats"""
+    global _template_timer_installed
+    if _template_timer_installed:
+        return
+    _template_timer_installed = True
+    template_render = Template.render
+
+    def render(self, context):
+        stats = _current.get()
+        # Includes and extended templates are part of the outer render
+        if stats is None or stats.rendering:
+            return template_render(self, context)
+        stats.rendering = True
+        start = time.perf_counter()
+        try:
+            return template_render(self, context)
+        finally:
+            stats.template_ms += (time.perf_counter() - start) * 1000
+            stats.rendering = False
+
+    Template.render = render
+
+
+class RequestTimingMiddleware:
+    """Time every request and record it in the per-view histograms
+
+    Adds a ``Server-Timing`` header (total, database and template time) and
+    logs requests slower than ``SLOW_REQUEST_MS`` with their slowest SQL.
+    Streaming responses are timed up to the moment their body starts.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        install_template_timer()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            with stats.capture_queries():
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            # Sync views run on the request's thread-sensitive executor thread
+            # and use that thread's connections, so install the wrappers there
+            stack = await sync_to_async(stats.capture_queries)()
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats)
+
+    def finish(self, request, response, stats):
+        stats.total_ms = (time.perf_counter() - stats.start) * 1000
+        if not response.streaming:
+            stats.size = len(response.content)
+        elif response.has_header('Content-Length'):
+            stats.size = int(response['Content-Length'])
+
+        match = request.resolver_match
+        view_name = match.view_name if match else '<unresolved>'
+        registry.observe(view_name, stats)
+        response['Server-Timing'] = stats.server_timing()
+
+        if stats.total_ms >= settings.SLOW_REQUEST_MS:
+            slowest = '\n'.join(
+                f'  {duration:.1f} ms  {sql[:MAX_SQL_LENGTH]}'
+                for duration, _, sql in sorted(stats.slowest, reverse=True)
+            )
+            logger.warning(
+                'Slow request %s %s (%s): %.1f ms, %d queries in %.1f ms, templates %.1f ms, %s bytes%s',
+                request.method, request.get_full_path(), view_name, stats.total_ms, stats.queries,
+                stats.db_ms, stats.template_ms, stats.size if stats.size is not None else '?',
+                f'\nSlowest SQL:\n{slowest}' if slowest else '',
+            )
+        return response
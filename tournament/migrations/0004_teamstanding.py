@@ -0,0 +1,84 @@
+# Generated by Django 5.0.14 on 2026-10-17 22:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_standings(apps, schema_editor):
+    Team = apps.get_model("tournament", "Team")
+    Match = apps.get_model("tournament", "Match")
+    TeamStanding = apps.get_model("tournament", "TeamStanding")
+
+    wins = dict(
+        Match.objects.filter(winner__isnull=False)
+        .order_by()
+        .values("winner")
+        .annotate(n=models.Count("pk"))
+        .values_list("winner", "n")
+    )
+    played = {}
+    for side in ("team_a", "team_b"):
+        rows = (
+            Match.objects.filter(winner__isnull=False)
+            .order_by()
+            .values(side)
+            .annotate(n=models.Count("pk"))
+            .values_list(side, "n")
+        )
+        for team_id, n in rows:
+            played[team_id] = played.get(team_id, 0) + n
+
+    names = dict(Team.objects.values_list("pk", "name"))
+    standings = []
+    for team_id in names:
+        team_wins = wins.get(team_id, 0)
+        team_played = played.get(team_id, 0)
+        win_rate = round(team_wins / team_played * 100, 1) if team_played else 0
+        standings.append(
+            TeamStanding(
+                team_id=team_id,
+                wins=team_wins,
+                losses=team_played - team_wins,
+                played=team_played,
+                win_rate=win_rate,
+            )
+        )
+    standings.sort(key=lambda s: (-s.wins, -s.win_rate, names[s.team_id]))
+    for rank, standing in enumerate(standings, start=1):
+        standing.rank = rank
+    TeamStanding.objects.bulk_create(standings)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tournament", "0003_remove_team_logo_url_team_logo"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TeamStanding",
+            fields=[
+                (
+                    "team",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="standing",
+                        serialize=False,
+                        to="tournament.team",
+                    ),
+                ),
+                ("wins", models.PositiveIntegerField(default=0)),
+                ("losses", models.PositiveIntegerField(default=0)),
+                ("played", models.PositiveIntegerField(default=0)),
+                ("win_rate", models.FloatField(default=0)),
+                ("rank", models.PositiveIntegerField(db_index=True, default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["rank"],
+            },
+        ),
+        migrations.RunPython(populate_standings, migrations.RunPython.noop),
+    ]
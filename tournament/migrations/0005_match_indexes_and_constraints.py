@@ -0,0 +1,60 @@
+# Generated by Django 5.0.14 on 2026-10-17 22:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tournament", "0004_teamstanding"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(
+                fields=["team_a", "winner"], name="match_team_a_winner_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(
+                fields=["team_b", "winner"], name="match_team_b_winner_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(
+                condition=models.Q(("winner__isnull", False)),
+                fields=["-played_at", "-created_at"],
+                name="match_recent_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(
+                fields=["match_day", "created_at"], name="match_day_created_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="match",
+            constraint=models.CheckConstraint(
+                check=models.Q(("team_a", models.F("team_b")), _negated=True),
+                name="match_distinct_teams",
+                violation_error_message="Un equipo no puede jugar contra sí mismo",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="match",
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    ("winner__isnull", True),
+                    ("winner", models.F("team_a")),
+                    ("winner", models.F("team_b")),
+                    _connector="OR",
+                ),
+                name="match_winner_is_player",
+                violation_error_message="El ganador debe ser uno de los equipos que juega",
+            ),
+        ),
+    ]
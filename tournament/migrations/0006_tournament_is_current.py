@@ -0,0 +1,38 @@
+# Generated by Django 5.0.14 on 2026-10-17 22:51
+
+from django.db import migrations, models
+
+
+def mark_current_tournament(apps, schema_editor):
+    Tournament = apps.get_model("tournament", "Tournament")
+    active = Tournament.objects.filter(status__in=["upcoming", "in_progress"])
+    current = active.order_by("-created_at").first()
+    if current is None:
+        current = Tournament.objects.order_by("-created_at").first()
+    if current is not None:
+        Tournament.objects.filter(pk=current.pk).update(is_current=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tournament", "0005_match_indexes_and_constraints"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tournament",
+            name="is_current",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_current_tournament, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="tournament",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("is_current", True)),
+                fields=("is_current",),
+                name="tournament_single_current",
+                violation_error_message="Solo puede haber un torneo actual",
+            ),
+        ),
+    ]
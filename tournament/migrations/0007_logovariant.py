@@ -0,0 +1,72 @@
+# Generated by Django 5.0.14 on 2026-10-17 23:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tournament", "0006_tournament_is_current"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LogoVariant",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "source",
+                    models.CharField(
+                        help_text="Logo file this variant was generated from",
+                        max_length=100,
+                    ),
+                ),
+                (
+                    "size",
+                    models.PositiveSmallIntegerField(
+                        help_text="Bounding box in pixels"
+                    ),
+                ),
+                (
+                    "format",
+                    models.CharField(
+                        choices=[("webp", "WebP"), ("png", "PNG"), ("jpeg", "JPEG")],
+                        max_length=4,
+                    ),
+                ),
+                (
+                    "image",
+                    models.ImageField(max_length=150, upload_to="team_logos/variants/"),
+                ),
+                ("width", models.PositiveSmallIntegerField()),
+                ("height", models.PositiveSmallIntegerField()),
+                (
+                    "team",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="logo_variants",
+                        to="tournament.team",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["size"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="logovariant",
+            constraint=models.UniqueConstraint(
+                fields=("team", "size", "format"),
+                name="logo_variant_unique_size_format",
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.14 on 2026-10-17 23:17
+
+import tournament.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tournament", "0007_logovariant"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="logovariant",
+            name="image",
+            field=models.ImageField(
+                max_length=150,
+                storage=tournament.storage.HashedFileSystemStorage(),
+                upload_to="team_logos/variants/",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="team",
+            name="logo",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=tournament.storage.HashedFileSystemStorage(),
+                upload_to="team_logos/",
+            ),
+        ),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.0.14 on 2026-10-17 23:35
+
+import sys
+from array import array
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_ratings(apps, schema_editor):
+    Match = apps.get_model("tournament", "Match")
+    TeamStanding = apps.get_model("tournament", "TeamStanding")
+    RatingHistory = apps.get_model("tournament", "RatingHistory")
+
+    # Elo with K = 32 over every decided match, as in tournament.ratings
+    rows = (
+        Match.objects.filter(winner__isnull=False)
+        .order_by(
+            models.F("played_at").asc(nulls_first=True),
+            "match_day__day_number",
+            "pk",
+        )
+        .values_list("pk", "team_a_id", "team_b_id", "winner_id")
+    )
+    ratings = {}
+    history = {}
+    for match_id, team_a, team_b, winner in rows.iterator(chunk_size=5000):
+        rating_a = ratings.get(team_a, 1500)
+        rating_b = ratings.get(team_b, 1500)
+        change = 32 * (
+            (winner == team_a) - 1 / (1 + 10 ** ((rating_b - rating_a) / 400))
+        )
+        ratings[team_a] = rating_a + change
+        ratings[team_b] = rating_b - change
+        for team in (team_a, team_b):
+            ids, values = history.setdefault(team, (array("q"), array("f")))
+            ids.append(match_id)
+            values.append(ratings[team])
+
+    standings = list(TeamStanding.objects.filter(pk__in=ratings))
+    for standing in standings:
+        standing.rating = ratings[standing.pk]
+    TeamStanding.objects.bulk_update(standings, ["rating"], batch_size=5000)
+
+    def pack(values):
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values.tobytes()
+
+    RatingHistory.objects.bulk_create(
+        [
+            RatingHistory(team_id=team, match_ids=pack(ids), ratings=pack(values))
+            for team, (ids, values) in history.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tournament", "0008_hashed_logo_storage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RatingHistory",
+            fields=[
+                (
+                    "team",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="rating_history",
+                        serialize=False,
+                        to="tournament.team",
+                    ),
+                ),
+                ("match_ids", models.BinaryField(default=bytes)),
+                ("ratings", models.BinaryField(default=bytes)),
+            ],
+            options={
+                "verbose_name_plural": "Rating histories",
+            },
+        ),
+        migrations.AddField(
+            model_name="teamstanding",
+            name="rating",
+            field=models.FloatField(default=1500),
+        ),
+        migrations.RunPython(populate_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.0.14 on 2026-10-17 23:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tournament", "0009_ratings"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StandingSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("wins", models.PositiveIntegerField(default=0)),
+                ("losses", models.PositiveIntegerField(default=0)),
+                ("played", models.PositiveIntegerField(default=0)),
+                ("win_rate", models.FloatField(default=0)),
+                ("rank", models.PositiveIntegerField(default=0)),
+                (
+                    "match_day",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="snapshots",
+                        to="tournament.matchday",
+                    ),
+                ),
+                (
+                    "team",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="snapshots",
+                        to="tournament.team",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["match_day", "rank"],
+                "indexes": [
+                    models.Index(
+                        fields=["match_day", "rank"], name="snapshot_day_rank_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="standingsnapshot",
+            constraint=models.UniqueConstraint(
+                fields=("match_day", "team"), name="snapshot_unique_day_team"
+            ),
+        ),
+    ]
@@ -0,0 +1,127 @@
+# Generated by Django 5.0.14 on 2026-10-18 00:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tournament", "0010_standing_snapshots"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Bracket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "format",
+                    models.CharField(
+                        choices=[
+                            ("single", "Eliminación simple"),
+                            ("double", "Doble eliminación"),
+                        ],
+                        default="single",
+                        max_length=6,
+                    ),
+                ),
+                ("size", models.PositiveSmallIntegerField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "tournament",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="bracket",
+                        to="tournament.tournament",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="BracketMatch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("position", models.PositiveSmallIntegerField()),
+                (
+                    "stage",
+                    models.CharField(
+                        choices=[
+                            ("winners", "Cuadro principal"),
+                            ("losers", "Cuadro de perdedores"),
+                            ("final", "Gran final"),
+                        ],
+                        default="winners",
+                        max_length=7,
+                    ),
+                ),
+                ("round", models.PositiveSmallIntegerField()),
+                ("winner_to", models.PositiveSmallIntegerField(blank=True, null=True)),
+                ("loser_to", models.PositiveSmallIntegerField(blank=True, null=True)),
+                (
+                    "bracket",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="matches",
+                        to="tournament.bracket",
+                    ),
+                ),
+                (
+                    "team_a",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="tournament.team",
+                    ),
+                ),
+                (
+                    "team_b",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="tournament.team",
+                    ),
+                ),
+                (
+                    "winner",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="tournament.team",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Bracket matches",
+                "ordering": ["bracket", "position"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="bracketmatch",
+            constraint=models.UniqueConstraint(
+                fields=("bracket", "position"), name="bracket_match_unique_position"
+            ),
+        ),
+    ]
@@ -1,14 +1,56 @@
-from django.db import models
+import copy
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, F, FloatField, Func, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator
+from django.utils.functional import cached_property
+
+from .storage import HashedFileSystemStorage
+
+
+class TeamQuerySet(models.QuerySet):
+    def with_stats(self):
+        """Annotate wins, losses, played and win ratio, sorted like the standings table.
+
+        Every counter is a correlated subquery, so the whole table comes back
+        in one SELECT regardless of how many teams exist.
+        """
+        def count_matches(*filters, **lookups):
+            matches = Match.objects.filter(*filters, **lookups).order_by()
+            return Coalesce(
+                Subquery(matches.annotate(c=Func(F('pk'), function='COUNT')).values('c')[:1]),
+                0,
+            )
+
+        # One count per side so each can use its (team, winner) index
+        return self.annotate(
+            win_count=count_matches(winner=OuterRef('pk')),
+            played_count=(
+                count_matches(team_a=OuterRef('pk'), winner__isnull=False)
+                + count_matches(team_b=OuterRef('pk'), winner__isnull=False)
+            ),
+        ).annotate(
+            loss_count=F('played_count') - F('win_count'),
+            win_ratio=Case(
+                When(played_count=0, then=Value(0.0)),
+                default=F('win_count') * Value(1.0) / F('played_count'),
+                output_field=FloatField(),
+            ),
+        ).order_by('-win_count', '-win_ratio', 'name')
 
 
 class Team(models.Model):
     """Represents a tournament team"""
     name = models.CharField(max_length=100, unique=True)
-    logo = models.ImageField(upload_to='team_logos/', blank=True, null=True)
+    logo = models.ImageField(upload_to='team_logos/', storage=HashedFileSystemStorage(), blank=True, null=True)
     captain_name = models.CharField(max_length=100, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = TeamQuerySet.as_manager()
+
     class Meta:
         ordering = ['name']
 
@@ -39,9 +81,119 @@ class Team(models.Model):
     @property
     def win_rate(self):
         """Calculate win rate percentage"""
-        if self.total_matches == 0:
+        total_matches = self.total_matches
+        if total_matches == 0:
             return 0
-        return round((self.wins / self.total_matches) * 100, 1)
+        return round((self.wins / total_matches) * 100, 1)
+
+    @cached_property
+    def logo_thumbnails(self):
+        """Processed logo variants as ``{'webp': [...], 'fallback': [...]}``, smallest first
+
+        Empty until the background worker has processed the current logo, so
+        templates fall back to the original file meanwhile.
+        """
+        variants = [v for v in self.logo_variants.all() if self.logo and v.source == self.logo.name]
+        if not variants:
+            return {}
+        return {
+            'webp': [v for v in variants if v.format == 'webp'],
+            'fallback': [v for v in variants if v.format != 'webp'],
+        }
+
+
+class LogoVariant(models.Model):
+    """A downscaled copy of a team logo in one size and format"""
+    FORMAT_CHOICES = [
+        ('webp', 'WebP'),
+        ('png', 'PNG'),
+        ('jpeg', 'JPEG'),
+    ]
+
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='logo_variants')
+    source = models.CharField(max_length=100, help_text="Logo file this variant was generated from")
+    size = models.PositiveSmallIntegerField(help_text="Bounding box in pixels")
+    format = models.CharField(max_length=4, choices=FORMAT_CHOICES)
+    image = models.ImageField(upload_to='team_logos/variants/', storage=HashedFileSystemStorage(), max_length=150)
+    width = models.PositiveSmallIntegerField()
+    height = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['size']
+        constraints = [
+            models.UniqueConstraint(fields=['team', 'size', 'format'], name='logo_variant_unique_size_format'),
+        ]
+
+    def __str__(self):
+        return f"{self.team.name} {self.width}x{self.height} {self.format}"
+
+
+# Rating of a team that hasn't played yet
+INITIAL_RATING = 1500
+
+
+class TeamStanding(models.Model):
+    """Denormalized standings row for a team, kept in sync with match results"""
+    team = models.OneToOneField(Team, on_delete=models.CASCADE, primary_key=True, related_name='standing')
+    wins = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    played = models.PositiveIntegerField(default=0)
+    win_rate = models.FloatField(default=0)
+    rank = models.PositiveIntegerField(default=0, db_index=True)
+    # Elo rating after every decided match so far, see tournament.ratings
+    rating = models.FloatField(default=INITIAL_RATING)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['rank']
+
+    def __str__(self):
+        return f"{self.rank}. {self.team.name} ({self.wins}-{self.losses})"
+
+
+class RatingHistory(models.Model):
+    """A team's rating after each of its matches, in match order
+
+    Stored as two packed little-endian arrays (int64 match ids, float32
+    ratings) so a rating-over-time chart is a single primary key read.
+    """
+    team = models.OneToOneField(Team, on_delete=models.CASCADE, primary_key=True, related_name='rating_history')
+    match_ids = models.BinaryField(default=bytes)
+    ratings = models.BinaryField(default=bytes)
+
+    class Meta:
+        verbose_name_plural = "Rating histories"
+
+    def __str__(self):
+        return f"{self.team_id}: {len(self.ratings) // 4} ratings"
+
+
+class StandingSnapshot(models.Model):
+    """A team's cumulative standings at the end of a match day with results
+
+    Kept for every team on every such match day, so "standings as of
+    match day N" is a single indexed read. See tournament.standings.
+    """
+    match_day = models.ForeignKey('MatchDay', on_delete=models.CASCADE, related_name='snapshots')
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='snapshots')
+    wins = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    played = models.PositiveIntegerField(default=0)
+    win_rate = models.FloatField(default=0)
+    rank = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['match_day', 'rank']
+        indexes = [
+            # Standings as of a match day, in rank order
+            models.Index(fields=['match_day', 'rank'], name='snapshot_day_rank_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['match_day', 'team'], name='snapshot_unique_day_team'),
+        ]
+
+    def __str__(self):
+        return f"{self.match_day_id}: {self.rank}. {self.team_id} ({self.wins}-{self.losses})"
 
 
 class MatchDay(models.Model):
@@ -69,6 +221,30 @@ class Match(models.Model):
     class Meta:
         ordering = ['match_day__day_number', 'created_at']
         verbose_name_plural = "Matches"
+        indexes = [
+            # Standings: per-side played counts filter on the team and a non-null winner
+            models.Index(fields=['team_a', 'winner'], name='match_team_a_winner_idx'),
+            models.Index(fields=['team_b', 'winner'], name='match_team_b_winner_idx'),
+            # "Recent results" list; partial where the backend supports it
+            models.Index(
+                fields=['-played_at', '-created_at'], condition=Q(winner__isnull=False), name='match_recent_idx',
+            ),
+            # Schedule: matches of a match day in default order
+            models.Index(fields=['match_day', 'created_at'], name='match_day_created_idx'),
+        ]
+        constraints = [
+            # Database-level mirror of Match.clean
+            models.CheckConstraint(
+                check=~Q(team_a=F('team_b')),
+                name='match_distinct_teams',
+                violation_error_message="Un equipo no puede jugar contra sí mismo",
+            ),
+            models.CheckConstraint(
+                check=Q(winner__isnull=True) | Q(winner=F('team_a')) | Q(winner=F('team_b')),
+                name='match_winner_is_player',
+                violation_error_message="El ganador debe ser uno de los equipos que juega",
+            ),
+        ]
 
     def __str__(self):
         winner_text = f" (Ganador: {self.winner.name})" if self.winner else ""
@@ -94,20 +270,120 @@ class Tournament(models.Model):
     name = models.CharField(max_length=200, default="KongLeague Aram chaos")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='upcoming')
     champion = models.ForeignKey(Team, on_delete=models.SET_NULL, null=True, blank=True, related_name='championships')
+    is_current = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['is_current'],
+                condition=Q(is_current=True),
+                name='tournament_single_current',
+                violation_error_message="Solo puede haber un torneo actual",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.get_status_display()})"
 
     @classmethod
     def get_current(cls):
-        """Get or create the current tournament"""
-        tournament, created = cls.objects.get_or_create(
-            status__in=['upcoming', 'in_progress'],
-            defaults={'name': 'KongLeague Aram chaos'}
-        )
+        """Get the current tournament, cached in-process until the data version changes
+
+        The copy also expires after CURRENT_TOURNAMENT_TTL seconds, since with
+        a per-process cache other workers' writes never bump this process's
+        version. Each caller gets its own copy, so views can modify and save it
+        freely.
+        """
+        from .cache import get_data_version
+
+        global _current_tournament
+        version = get_data_version()
+        now = time.monotonic()
+        if (
+            _current_tournament is None
+            or _current_tournament[0] != version
+            or now - _current_tournament[1] >= settings.CURRENT_TOURNAMENT_TTL
+        ):
+            _current_tournament = (version, now, cls._load_current())
+        return copy.copy(_current_tournament[2])
+
+    @classmethod
+    def _load_current(cls):
+        tournament = cls.objects.filter(is_current=True).first()
+        if tournament is None:
+            # The partial unique constraint lets only one concurrent worker create it
+            try:
+                with transaction.atomic():
+                    tournament = cls.objects.create(name='KongLeague Aram chaos', is_current=True)
+            except IntegrityError:
+                tournament = cls.objects.get(is_current=True)
         return tournament
+
+    @classmethod
+    def clear_current_cache(cls):
+        global _current_tournament
+        _current_tournament = None
+
+
+# (data version, monotonic load time, Tournament) read by Tournament.get_current
+_current_tournament = None
+
+
+class Bracket(models.Model):
+    """The playoff bracket of a tournament, seeded from the standings"""
+    FORMAT_CHOICES = [
+        ('single', 'Eliminación simple'),
+        ('double', 'Doble eliminación'),
+    ]
+
+    tournament = models.OneToOneField(Tournament, on_delete=models.CASCADE, related_name='bracket')
+    format = models.CharField(max_length=6, choices=FORMAT_CHOICES, default='single')
+    # Slots in the first round, a power of two; missing seeds are byes
+    size = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.tournament.name}: {self.get_format_display()} ({self.size})"
+
+
+class BracketMatch(models.Model):
+    """One node of a bracket tree, see tournament.brackets
+
+    ``position`` indexes the node in the bracket's array layout. Where the
+    winner and the loser go next is precomputed as ``2 * position + slot``
+    of the next match (slot 0 is team A), so advancing a team is a single
+    indexed write. Matches that are only byes have no row.
+    """
+    STAGE_CHOICES = [
+        ('winners', 'Cuadro principal'),
+        ('losers', 'Cuadro de perdedores'),
+        ('final', 'Gran final'),
+    ]
+
+    bracket = models.ForeignKey(Bracket, on_delete=models.CASCADE, related_name='matches')
+    position = models.PositiveSmallIntegerField()
+    stage = models.CharField(max_length=7, choices=STAGE_CHOICES, default='winners')
+    round = models.PositiveSmallIntegerField()
+    team_a = models.ForeignKey(Team, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    team_b = models.ForeignKey(Team, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    winner = models.ForeignKey(Team, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    winner_to = models.PositiveSmallIntegerField(null=True, blank=True)
+    loser_to = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['bracket', 'position']
+        verbose_name_plural = "Bracket matches"
+        constraints = [
+            models.UniqueConstraint(fields=['bracket', 'position'], name='bracket_match_unique_position'),
+        ]
+
+    def __str__(self):
+        return f"{self.bracket_id}#{self.position}: {self.team_a_id} vs {self.team_b_id}"
+
+    @property
+    def teams(self):
+        """Both slots in order, None where the team isn't known yet"""
+        return self.team_a, self.team_b
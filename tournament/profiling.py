@@ -0,0 +1,72 @@
+import logging
+import time
+from contextvars import ContextVar
+
+from django.template.base import Template
+from django.template.loader_tags import BLOCK_CONTEXT_KEY, BlockNode
+
+logger = logging.getLogger(__name__)
+
+# Timings of the render in progress in this thread or task: {name: [seconds, calls]}
+_timings = ContextVar('template_timings', default=None)
+_installed = False
+
+
+class RenderTimer:
+    """Times template and block renders while one top-level render runs
+
+    Times are inclusive: a template's time contains its blocks and includes,
+    and an extended template's time contains its parent's.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.timings = _timings.get()
+        self.outermost = self.timings is None
+        if self.outermost:
+            self.timings = {}
+            self.token = _timings.set(self.timings)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        entry = self.timings.setdefault(self.name, [0.0, 0])
+        entry[0] += elapsed
+        entry[1] += 1
+        if self.outermost:
+            _timings.reset(self.token)
+            log_timings(self.name, elapsed, self.timings)
+
+
+def log_timings(name, elapsed, timings):
+    rows = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)
+    lines = [f'{seconds * 1000:8.2f} ms {calls:5d}x  {part}' for part, (seconds, calls) in rows]
+    logger.info('Rendered %s in %.2f ms\n%s', name, elapsed * 1000, '\n'.join(lines))
+
+
+def install():
+    """Wrap template and block rendering with timers, enabled by ``TEMPLATE_PROFILING``"""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    template_render = Template.render
+    block_render = BlockNode.render
+
+    def render_template(self, context):
+        with RenderTimer(self.name or '<string>'):
+            return template_render(self, context)
+
+    def render_block(self, context):
+        # Label the block with the template whose override actually renders
+        block_context = context.render_context.get(BLOCK_CONTEXT_KEY)
+        block = (block_context and block_context.get_block(self.name)) or self
+        with RenderTimer(f'{block.origin.template_name or "<string>"}#{self.name}'):
+            return block_render(self, context)
+
+    Template.render = render_template
+    BlockNode.render = render_block
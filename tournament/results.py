@@ -0,0 +1,83 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_data_version, bump_match_day_version
+from .live import publish_results
+from .models import Match
+from .ratings import update_ratings
+from .standings import refresh_snapshots, refresh_standings
+
+
+def parse_result_pairs(data):
+    """Read ``winner_<match_id>=<team_id>`` fields into ``(match_id, winner_id)`` strings
+
+    Empty selections are skipped, so a form can list every pending match.
+    """
+    pairs = []
+    for key, value in data.items():
+        if key.startswith('winner_') and value:
+            pairs.append((key[len('winner_'):], value))
+    return pairs
+
+
+@transaction.atomic
+def record_results(pairs):
+    """Validate and apply many match results at once
+
+    ``pairs`` is an iterable of ``(match_id, winner_id)``. Valid rows are all
+    saved with one bulk_update, then standings, caches and live clients are
+    refreshed once. Returns ``(updated_matches, errors)`` where ``errors`` is a
+    list of ``(match_id, message)`` for the rows that were rejected.
+    """
+    errors = []
+    wanted = {}
+    for match_id, winner_id in pairs:
+        try:
+            match_id, winner_id = int(match_id), int(winner_id)
+        except (TypeError, ValueError):
+            errors.append((match_id, 'Información incompleta'))
+            continue
+        if match_id in wanted:
+            errors.append((match_id, 'Partido repetido en el lote'))
+            continue
+        wanted[match_id] = winner_id
+
+    matches = (
+        Match.objects.select_for_update(of=('self',))
+        .select_related('team_a', 'team_b')
+        .order_by()
+        .in_bulk(wanted)
+    )
+    now = timezone.now()
+    updated = []
+    corrected = False
+    for match_id, winner_id in wanted.items():
+        match = matches.get(match_id)
+        if match is None:
+            errors.append((match_id, 'El partido no existe'))
+        elif winner_id not in (match.team_a_id, match.team_b_id):
+            errors.append((match_id, 'El ganador debe ser uno de los equipos del partido'))
+        elif match.winner_id != winner_id:
+            corrected = corrected or match.winner_id is not None
+            match.winner_id = winner_id
+            match.played_at = now
+            updated.append(match)
+
+    if not updated:
+        return updated, errors
+
+    # bulk_update skips the model signals, so invalidate everything explicitly, once
+    Match.objects.bulk_update(updated, ['winner', 'played_at'])
+    changed = refresh_standings({team for m in updated for team in (m.team_a_id, m.team_b_id)})
+    changed |= update_ratings(updated, corrected=corrected)
+    match_day_ids = {m.match_day_id for m in updated}
+    refresh_snapshots(match_day_ids)
+
+    def after_commit():
+        bump_data_version()
+        for match_day_id in match_day_ids:
+            bump_match_day_version(match_day_id)
+        publish_results(updated, changed)
+
+    transaction.on_commit(after_commit)
+    return updated, errors
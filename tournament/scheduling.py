@@ -0,0 +1,278 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+
+from .cache import bump_data_version
+from .models import Team, TeamStanding, MatchDay, Match
+
+
+class PairingError(Exception):
+    """The next Swiss round can't be paired yet"""
+
+
+def round_robin_rounds(team_ids, double=False):
+    """Pairings per round using the circle method
+
+    With an odd number of teams one team rests each round. A double round
+    robin repeats every round with home and away swapped.
+    """
+    teams = list(team_ids)
+    if len(teams) % 2:
+        teams.append(None)
+    n = len(teams)
+
+    rounds = []
+    for r in range(n - 1):
+        pairs = []
+        for i in range(n // 2):
+            team_a, team_b = teams[i], teams[n - 1 - i]
+            if team_a is None or team_b is None:
+                continue
+            # Alternate sides for the fixed team so it isn't always team A
+            if i == 0 and r % 2:
+                team_a, team_b = team_b, team_a
+            pairs.append((team_a, team_b))
+        rounds.append(pairs)
+        # Keep the first team fixed and rotate everyone else one seat
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+
+    if double:
+        rounds += [[(b, a) for a, b in pairs] for pairs in rounds]
+    return rounds
+
+
+def _pair_key(team_a, team_b, double):
+    return (team_a, team_b) if double else frozenset((team_a, team_b))
+
+
+@transaction.atomic
+def generate_round_robin(team_ids=None, double=False, start_date=None, days_between=7):
+    """Create the missing match days and matches of a round robin
+
+    Pairings that already exist as matches are skipped, so running it again
+    creates nothing. Returns ``(match_days_created, matches_created)``.
+    """
+    if team_ids is None:
+        team_ids = list(Team.objects.order_by('name').values_list('pk', flat=True))
+    team_set = set(team_ids)
+
+    existing = Counter(
+        _pair_key(team_a, team_b, double)
+        for team_a, team_b in Match.objects.filter(
+            team_a__in=team_set, team_b__in=team_set
+        ).order_by().values_list('team_a_id', 'team_b_id')
+    )
+
+    rounds = []
+    for pairs in round_robin_rounds(team_ids, double=double):
+        missing = []
+        for team_a, team_b in pairs:
+            key = _pair_key(team_a, team_b, double)
+            if existing[key]:
+                existing[key] -= 1
+            else:
+                missing.append((team_a, team_b))
+        if missing:
+            rounds.append(missing)
+
+    if not rounds:
+        return 0, 0
+
+    last_day = MatchDay.objects.order_by('-day_number').values_list('day_number', flat=True).first() or 0
+    first_day = last_day + 1
+    MatchDay.objects.bulk_create([
+        MatchDay(
+            day_number=first_day + i,
+            name=f'Jornada {first_day + i}',
+            date=start_date + timedelta(days=i * days_between) if start_date else None,
+        )
+        for i in range(len(rounds))
+    ])
+    day_ids = list(
+        MatchDay.objects.filter(day_number__gte=first_day).order_by('day_number').values_list('pk', flat=True)
+    )
+
+    matches = [
+        Match(match_day_id=day_id, team_a_id=team_a, team_b_id=team_b)
+        for day_id, pairs in zip(day_ids, rounds)
+        for team_a, team_b in pairs
+    ]
+    Match.objects.bulk_create(matches, batch_size=2000)
+
+    # bulk_create skips the model signals that invalidate cached pages
+    transaction.on_commit(bump_data_version)
+    return len(rounds), len(matches)
+
+
+def swiss_pairs(team_ids, opponents, rests=None):
+    """Pairings of the next Swiss round, with as few rematches as possible
+
+    ``team_ids`` are in standings order and ``opponents`` maps each team to
+    the set of teams it has already played. With an odd number of teams the
+    lowest ranked of those that rested least (``rests``: team -> rounds
+    without a match) gets the bye. Returns ``(pairs, bye)``, each pair being
+    ``(higher ranked, lower ranked)``.
+
+    Every team, from the top, first takes the highest ranked team below it
+    that is still free and new to it. Teams left without one are then
+    matched through augmenting paths over the graph of matches not played
+    yet (Edmonds' blossom algorithm), which re-pairs as few teams as needed
+    and finds a rematch-free round whenever one exists. Only teams that no
+    such round can place meet again, in standings order.
+    """
+    teams = list(team_ids)
+    bye = None
+    if len(teams) % 2:
+        rests = rests or {}
+        bye = min(reversed(teams), key=lambda team: rests.get(team, 0))
+        teams.remove(bye)
+
+    n = len(teams)
+    played = [opponents.get(team, ()) for team in teams]
+    mate = _greedy_pairs(teams, played)
+
+    def new_opponents(i):
+        # Closest ranks first, so re-paired teams stay near their level
+        for distance in range(1, n):
+            for j in (i + distance, i - distance):
+                if 0 <= j < n and teams[j] not in played[i]:
+                    yield j
+
+    for i in range(n):
+        if mate[i] is None:
+            _augment(i, mate, new_opponents)
+
+    stuck = [i for i in range(n) if mate[i] is None]
+    for i, j in zip(stuck[::2], stuck[1::2]):
+        mate[i], mate[j] = j, i
+    pairs = [(teams[i], teams[mate[i]]) for i in range(n) if i < mate[i]]
+    return pairs, bye
+
+
+def _greedy_pairs(teams, played):
+    """Each team's partner index (or None) pairing from the top, skipping rematches
+
+    Free teams are a doubly linked list so paired ones are never scanned
+    again; index n is the sentinel before the first and after the last.
+    """
+    n = len(teams)
+    following = list(range(1, n + 1)) + [0]
+    preceding = [n] + list(range(n))
+
+    def take(i):
+        following[preceding[i]] = following[i]
+        preceding[following[i]] = preceding[i]
+
+    mate = [None] * n
+    while following[n] != n:
+        i = following[n]
+        take(i)
+        j = following[i]
+        while j != n and teams[j] in played[i]:
+            j = following[j]
+        if j != n:
+            take(j)
+            mate[i], mate[j] = j, i
+    return mate
+
+
+def _augment(root, mate, neighbours):
+    """Grow the matching ``mate`` by an augmenting path from the unmatched ``root``
+
+    One search of Edmonds' blossom algorithm: odd cycles are contracted
+    into their base as they are found. Returns whether a path was found.
+    """
+    n = len(mate)
+    parent = [None] * n
+    base = list(range(n))
+    in_tree = [False] * n
+    in_tree[root] = True
+    queue = [root]
+
+    def common_base(a, b):
+        seen = set()
+        while True:
+            a = base[a]
+            seen.add(a)
+            if mate[a] is None:
+                break
+            a = parent[mate[a]]
+        while base[b] not in seen:
+            b = parent[mate[base[b]]]
+        return base[b]
+
+    def mark_blossom(v, blossom_base, child, blossom):
+        while base[v] != blossom_base:
+            blossom.add(base[v])
+            blossom.add(base[mate[v]])
+            parent[v] = child
+            child = mate[v]
+            v = parent[mate[v]]
+
+    for v in queue:
+        for to in neighbours(v):
+            if base[v] == base[to] or mate[v] == to:
+                continue
+            if to == root or (mate[to] is not None and parent[mate[to]] is not None):
+                blossom_base = common_base(v, to)
+                blossom = set()
+                mark_blossom(v, blossom_base, to, blossom)
+                mark_blossom(to, blossom_base, v, blossom)
+                for i in range(n):
+                    if base[i] in blossom:
+                        base[i] = blossom_base
+                        if not in_tree[i]:
+                            in_tree[i] = True
+                            queue.append(i)
+            elif parent[to] is None:
+                parent[to] = v
+                if mate[to] is None:
+                    # Flip the path back to the root
+                    while to is not None:
+                        previous = parent[to]
+                        next_to = mate[previous]
+                        mate[to], mate[previous] = previous, to
+                        to = next_to
+                    return True
+                in_tree[mate[to]] = True
+                queue.append(mate[to])
+    return False
+
+
+@transaction.atomic
+def generate_swiss_round(date=None):
+    """Create the next match day with Swiss pairings from the current standings
+
+    Every result must be in first. Returns ``(match_day, matches_created,
+    bye_team_id, rematches)``.
+    """
+    if Match.objects.filter(winner__isnull=True).exists():
+        raise PairingError('Hay partidos sin resultado: regístralos antes de emparejar la siguiente ronda')
+    team_ids = list(TeamStanding.objects.order_by('rank', 'team__name').values_list('pk', flat=True))
+    if len(team_ids) < 2:
+        raise PairingError('Se necesitan al menos dos equipos')
+
+    opponents = defaultdict(set)
+    days_played = defaultdict(set)
+    for match_day, team_a, team_b in Match.objects.order_by().values_list('match_day_id', 'team_a_id', 'team_b_id'):
+        opponents[team_a].add(team_b)
+        opponents[team_b].add(team_a)
+        days_played[team_a].add(match_day)
+        days_played[team_b].add(match_day)
+    rounds = len(set().union(*days_played.values()))
+    rests = {team: rounds - len(days_played[team]) for team in team_ids}
+
+    pairs, bye = swiss_pairs(team_ids, opponents, rests)
+
+    day_number = (MatchDay.objects.order_by('-day_number').values_list('day_number', flat=True).first() or 0) + 1
+    match_day = MatchDay.objects.create(day_number=day_number, name=f'Jornada {day_number}', date=date)
+    Match.objects.bulk_create(
+        [Match(match_day=match_day, team_a_id=team_a, team_b_id=team_b) for team_a, team_b in pairs],
+        batch_size=2000,
+    )
+
+    # bulk_create skips the model signals that invalidate cached pages
+    transaction.on_commit(bump_data_version)
+    rematches = sum(team_b in opponents[team_a] for team_a, team_b in pairs)
+    return match_day, len(pairs), bye, rematches
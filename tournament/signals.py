@@ -0,0 +1,91 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_data_version, bump_match_day_version, bump_schedule_version
+from .logos import delete_unreferenced, schedule_logo_processing
+from .models import Team, TeamStanding, LogoVariant, MatchDay, Match, Tournament
+from .standings import add_to_snapshots, refresh_ranks
+
+
+@receiver(post_save, sender=Team)
+def create_team_standing(sender, instance, created, raw=False, **kwargs):
+    """Give every new team an empty standings row, today and in every snapshot"""
+    if created and not raw:
+        TeamStanding.objects.get_or_create(team=instance)
+        refresh_ranks()
+        add_to_snapshots(instance)
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+@receiver(post_save, sender=Match)
+@receiver(post_delete, sender=Match)
+@receiver(post_save, sender=MatchDay)
+@receiver(post_delete, sender=MatchDay)
+@receiver(post_save, sender=Tournament)
+@receiver(post_delete, sender=Tournament)
+def invalidate_public_pages(sender, **kwargs):
+    """Bump the data version once the write is committed"""
+    transaction.on_commit(bump_data_version)
+
+
+@receiver(post_save, sender=Tournament)
+@receiver(post_delete, sender=Tournament)
+def clear_current_tournament(sender, **kwargs):
+    """Drop this process's cached current tournament"""
+    Tournament.clear_current_cache()
+
+
+@receiver(post_save, sender=Match)
+@receiver(post_delete, sender=Match)
+def invalidate_match_day_fragment(sender, instance, **kwargs):
+    """Only the match day the match belongs to needs re-rendering"""
+    match_day_id = instance.match_day_id
+    transaction.on_commit(lambda: bump_match_day_version(match_day_id))
+
+
+@receiver(post_save, sender=MatchDay)
+@receiver(post_delete, sender=MatchDay)
+def invalidate_own_fragment(sender, instance, **kwargs):
+    # Read the id now, deletion clears it before the commit callbacks run
+    match_day_id = instance.pk
+    transaction.on_commit(lambda: bump_match_day_version(match_day_id))
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+def invalidate_schedule_fragments(sender, **kwargs):
+    """Team names appear in every match day"""
+    transaction.on_commit(bump_schedule_version)
+
+
+@receiver(pre_save, sender=Team)
+def remember_previous_logo(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Note the stored logo so a replaced or removed file can be cleaned up"""
+    if raw or instance.pk is None or (update_fields is not None and 'logo' not in update_fields):
+        return
+    instance._previous_logo = Team.objects.filter(pk=instance.pk).values_list('logo', flat=True).first()
+
+
+@receiver(post_save, sender=Team)
+def process_team_logo(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Generate thumbnails for a new or changed logo in the background"""
+    if raw or (update_fields is not None and 'logo' not in update_fields):
+        return
+    previous = getattr(instance, '_previous_logo', None)
+    if previous and previous != instance.logo.name:
+        transaction.on_commit(lambda: delete_unreferenced([previous]))
+
+    if instance.logo:
+        schedule_logo_processing(instance.pk)
+    elif previous:
+        LogoVariant.objects.filter(team=instance).delete()
+
+
+@receiver(post_delete, sender=Team)
+@receiver(post_delete, sender=LogoVariant)
+def delete_logo_file(sender, instance, **kwargs):
+    """Remove the file of a deleted team or variant unless another row shares it"""
+    name = instance.logo.name if sender is Team else instance.image.name
+    transaction.on_commit(lambda: delete_unreferenced([name]))
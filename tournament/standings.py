@@ -0,0 +1,296 @@
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min, Q, Subquery
+
+from .cache import bump_data_version
+from .models import MatchDay, StandingSnapshot, Team, TeamStanding
+from .tiebreakers import CHUNK_SIZE, ResultMatrix, break_ties, decided_results
+
+STANDING_FIELDS = ['wins', 'losses', 'played', 'win_rate']
+
+
+def win_rate(wins, played):
+    """Win rate percentage rounded to one decimal, 0 when nothing was played"""
+    if played == 0:
+        return 0
+    return round((wins / played) * 100, 1)
+
+
+def compute_standings(team_ids=None):
+    """Recompute standings from the Match table, one unsaved TeamStanding per team"""
+    teams = Team.objects.with_stats()
+    if team_ids is not None:
+        teams = teams.filter(pk__in=team_ids)
+
+    return [
+        TeamStanding(
+            team=team,
+            wins=team.win_count,
+            losses=team.loss_count,
+            played=team.played_count,
+            win_rate=win_rate(team.win_count, team.played_count),
+        )
+        for team in teams
+    ]
+
+
+def refresh_ranks():
+    """Renumber ranks, writing only the rows whose position changed
+
+    Teams are ranked by wins and win rate; teams with the same record are
+    ordered by ``settings.TIEBREAKERS``, then by name. Returns the ids of the
+    teams that moved.
+    """
+    rows = list(
+        TeamStanding.objects.order_by('-wins', '-win_rate', 'losses', 'team__name')
+        .values_list('pk', 'wins', 'losses', 'rank')
+    )
+    ranks = {pk: rank for pk, _, _, rank in rows}
+    order = break_ties([row[:3] for row in rows], settings.TIEBREAKERS)
+    moved = [
+        TeamStanding(pk=pk, rank=position)
+        for position, pk in enumerate(order, start=1)
+        if ranks[pk] != position
+    ]
+    TeamStanding.objects.bulk_update(moved, ['rank'])
+    return {standing.pk for standing in moved}
+
+
+def refresh_standings(team_ids):
+    """Recompute the standings of the given teams only, then fix up ranks
+
+    Must run inside the transaction that changed the matches so readers
+    never see results and standings disagree. Returns the ids of every team
+    whose row changed, including the ones that only moved in rank.
+    """
+    team_ids = set(team_ids)
+    if not team_ids:
+        return set()
+
+    fresh = compute_standings(team_ids)
+    existing = set(TeamStanding.objects.filter(pk__in=team_ids).values_list('pk', flat=True))
+    TeamStanding.objects.bulk_update([s for s in fresh if s.pk in existing], STANDING_FIELDS)
+    TeamStanding.objects.bulk_create([s for s in fresh if s.pk not in existing])
+    return team_ids | refresh_ranks()
+
+
+def reset_standings():
+    """Zero every standing after all match results were cleared"""
+    TeamStanding.objects.update(wins=0, losses=0, played=0, win_rate=0)
+    refresh_ranks()
+    StandingSnapshot.objects.all().delete()
+
+
+class _GrowingMatrix:
+    """Result matrix of the match days replayed so far, loaded on first use
+
+    Only needed when some teams are tied, which a replay might never hit.
+    """
+
+    def __init__(self, first_day):
+        self.first_day = first_day
+        self.pending = []
+        self.matrix = None
+
+    def add(self, results):
+        if self.matrix is None:
+            self.pending.extend(results)
+        else:
+            self.matrix.add(results)
+
+    def get(self, teams=None, depth=None):
+        """The matrix of every result so far, whichever teams are tied"""
+        if self.matrix is None:
+            if self.first_day is None:
+                # A full replay starts from nothing, the replayed days are all pending
+                self.matrix = ResultMatrix(Team.objects.order_by('pk').values_list('pk', flat=True), [])
+            else:
+                self.matrix = ResultMatrix.load(before_day=self.first_day)
+            self.matrix.add(self.pending)
+            self.pending = None
+        return self.matrix
+
+
+def refresh_snapshots(match_day_ids=None):
+    """Recompute the standings snapshots from the earliest of ``match_day_ids`` on
+
+    Snapshots are prefix sums over the match days in order: each one starts
+    from the previous snapshot and adds the results of its own day, so only
+    the given days and the ones after them are touched, and only rows that
+    changed are written. Without ``match_day_ids`` every snapshot is
+    recomputed. Must run inside the transaction that changed the matches.
+    """
+    first_day = None
+    if match_day_ids is not None:
+        first_day = MatchDay.objects.filter(pk__in=match_day_ids).aggregate(first=Min('day_number'))['first']
+        if first_day is None:
+            return
+
+    # Totals at the end of the last snapshot before the first recomputed day
+    previous = {}
+    if first_day is not None:
+        rows = latest_snapshot(match_day__day_number__lt=first_day).values_list('team_id', 'wins', 'losses')
+        previous = {team: [wins, losses] for team, wins, losses in rows}
+        if not previous and decided_results().filter(match_day__day_number__lt=first_day).exists():
+            # Earlier results were never snapshotted (a database from before
+            # snapshots existed), so there is nothing to start from
+            first_day = None
+    names = dict(Team.objects.values_list('pk', 'name'))
+    totals = {team: previous.get(team, [0, 0]) for team in names}
+
+    results = decided_results().order_by('match_day__day_number')
+    stored = StandingSnapshot.objects.all()
+    if first_day is not None:
+        results = results.filter(match_day__day_number__gte=first_day)
+        stored = stored.filter(match_day__day_number__gte=first_day)
+    results = results.values_list('match_day_id', 'winner_id', 'loser').iterator(chunk_size=CHUNK_SIZE)
+    stored = {
+        (day, team): (pk, values)
+        for pk, day, team, *values in stored.values_list(
+            'pk', 'match_day_id', 'team_id', 'wins', 'losses', 'played', 'win_rate', 'rank',
+        ).iterator(chunk_size=CHUNK_SIZE)
+    }
+
+    matrix = _GrowingMatrix(first_day)
+    created, changed, kept_days = [], [], set()
+    for day, day_results in groupby(results, key=lambda row: row[0]):
+        day_results = [(winner, loser) for _, winner, loser in day_results]
+        for winner, loser in day_results:
+            totals[winner][0] += 1
+            totals[loser][1] += 1
+        matrix.add(day_results)
+        kept_days.add(day)
+
+        rows = sorted(
+            ((team, wins, losses) for team, (wins, losses) in totals.items()),
+            key=lambda row: (-row[1], -win_rate(row[1], row[1] + row[2]), row[2], names[row[0]]),
+        )
+        order = break_ties(rows, settings.TIEBREAKERS, matrix.get)
+        for rank, team in enumerate(order, start=1):
+            wins, losses = totals[team]
+            snapshot = StandingSnapshot(
+                match_day_id=day, team_id=team, wins=wins, losses=losses, played=wins + losses,
+                win_rate=win_rate(wins, wins + losses), rank=rank,
+            )
+            pk, values = stored.pop((day, team), (None, None))
+            if pk is None:
+                created.append(snapshot)
+            elif values != [wins, losses, wins + losses, snapshot.win_rate, rank]:
+                snapshot.pk = pk
+                changed.append(snapshot)
+
+    StandingSnapshot.objects.bulk_update(
+        changed, ['wins', 'losses', 'played', 'win_rate', 'rank'], batch_size=CHUNK_SIZE,
+    )
+    StandingSnapshot.objects.bulk_create(created, batch_size=CHUNK_SIZE)
+    # Days that no longer have results, and teams that are gone
+    StandingSnapshot.objects.filter(pk__in=[pk for pk, _ in stored.values()]).delete()
+
+
+def add_to_snapshots(team):
+    """Give a new team an empty row in every existing snapshot
+
+    An empty record ranks after every team with a win and before every team
+    with only losses, by name among the other empty ones, and no tiebreaker
+    applies to it. So the rows behind it move down one place instead of
+    every snapshot being recomputed.
+    """
+    behind = Q(wins=0) & (Q(losses__gt=0) | Q(losses=0, team__name__gt=team.name))
+    days = StandingSnapshot.objects.order_by().values('match_day').annotate(ahead=Count('pk', filter=~behind))
+    rows = [StandingSnapshot(match_day_id=day['match_day'], team=team, rank=day['ahead'] + 1) for day in days]
+    StandingSnapshot.objects.filter(behind).update(rank=F('rank') + 1)
+    StandingSnapshot.objects.bulk_create(rows, batch_size=CHUNK_SIZE)
+
+
+def latest_snapshot(**day_filter):
+    """Snapshot rows of the latest match day matching ``day_filter``, in rank order
+
+    Match days without results have no snapshot of their own: the standings
+    as of one of them are those of the last day with results before it.
+    """
+    days = StandingSnapshot.objects.filter(**day_filter).order_by('-match_day__day_number')
+    return StandingSnapshot.objects.filter(
+        match_day__day_number=Subquery(days.values('match_day__day_number')[:1]),
+    ).order_by('rank')
+
+
+def snapshot_standings(day_number):
+    """Standings rows as of the end of match day ``day_number``, like get_standings()
+
+    Served from the snapshots in a single query; before the first result
+    every team is listed with an empty record.
+    """
+    rows = list(latest_snapshot(match_day__day_number__lte=day_number).select_related('team'))
+    if not rows:
+        rows = [
+            StandingSnapshot(team=team, rank=rank)
+            for rank, team in enumerate(Team.objects.order_by('name'), start=1)
+        ]
+    return [
+        {
+            'team': row.team,
+            'wins': row.wins,
+            'losses': row.losses,
+            'total_matches': row.played,
+            'win_rate': row.win_rate,
+            'rank': row.rank,
+        }
+        for row in rows
+    ]
+
+
+def rebuild_standings():
+    """Recompute every standing from scratch and return the rows that had drifted
+
+    Each drift entry is ``(team, field, stored, actual)``; a missing row is
+    reported with ``field=None``.
+    """
+    stored = {s.pk: s for s in TeamStanding.objects.all()}
+    fresh = compute_standings()
+
+    drift = []
+    missing = []
+    for standing in fresh:
+        current = stored.get(standing.pk)
+        if current is None:
+            missing.append(standing)
+            drift.append((standing.team, None, None, None))
+            continue
+        for field in STANDING_FIELDS:
+            if getattr(current, field) != getattr(standing, field):
+                drift.append((standing.team, field, getattr(current, field), getattr(standing, field)))
+
+    drifted = {team.pk for team, field, _, _ in drift if field is not None}
+    TeamStanding.objects.bulk_update([s for s in fresh if s.pk in drifted], STANDING_FIELDS)
+    TeamStanding.objects.bulk_create(missing)
+    refresh_ranks()
+    refresh_snapshots()
+    if drift:
+        # Cached pages and fragments still show the drifted numbers
+        transaction.on_commit(bump_data_version)
+    return drift
+
+
+def get_standings(ordering=None):
+    """Standings rows read from the materialized table in a single query
+
+    Rows come in rank order unless another ``ordering`` is given.
+    """
+    rows = TeamStanding.objects.select_related('team')
+    if ordering:
+        rows = rows.order_by(*ordering)
+
+    standings = []
+    for row in rows:
+        standings.append({
+            'team': row.team,
+            'wins': row.wins,
+            'losses': row.losses,
+            'total_matches': row.played,
+            'win_rate': row.win_rate,
+            'rank': row.rank,
+            'rating': row.rating,
+        })
+    return standings
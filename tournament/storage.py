@@ -0,0 +1,40 @@
+import hashlib
+import posixpath
+import re
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+HASH_LENGTH = 32
+_hashed_name = re.compile(rf'^[0-9a-f]{{{HASH_LENGTH}}}(\.[a-z0-9]+)?$')
+
+
+def content_hash(name):
+    """The content hash a stored file is named after, or None for older uploads"""
+    filename = posixpath.basename(name)
+    if not _hashed_name.match(filename):
+        return None
+    return filename[:HASH_LENGTH]
+
+
+@deconstructible
+class HashedFileSystemStorage(FileSystemStorage):
+    """Stores files under a name derived from their content
+
+    Identical uploads share one file and a name never points at different
+    bytes, so the files can be cached forever. The original file name only
+    contributes its extension.
+    """
+
+    def save(self, name, content, max_length=None):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+
+        directory, filename = posixpath.split(name.replace('\\', '/'))
+        extension = posixpath.splitext(filename)[1].lower()
+        name = posixpath.join(directory, digest.hexdigest()[:HASH_LENGTH] + extension)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
@@ -0,0 +1,464 @@
+"""Build the site stylesheet from the utility classes the templates use
+
+The pages are written with Tailwind CSS class names. Instead of running the
+Tailwind compiler in every visitor's browser, ``build_css`` scans the
+templates, keeps only the class names that map to a utility below and writes
+them after the base reset in ``assets/``. The rules follow Tailwind v3.
+"""
+import re
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent
+ASSETS_DIR = APP_DIR / 'assets'
+TEMPLATES_DIR = APP_DIR / 'templates'
+OUTPUT = APP_DIR / 'static' / 'tournament' / 'css' / 'kongleague.css'
+
+# Theme from the former inline tailwind.config in base.html
+THEME_COLORS = {
+    'kong-gold': '#FFD700',
+    'kong-purple': '#1a1a2e',
+    'kong-dark': '#16213e',
+    'kong-darker': '#0f1419',
+}
+
+PALETTE = {
+    'gray': ['#f9fafb', '#f3f4f6', '#e5e7eb', '#d1d5db', '#9ca3af', '#6b7280', '#4b5563', '#374151', '#1f2937',
+             '#111827', '#030712'],
+    'red': ['#fef2f2', '#fee2e2', '#fecaca', '#fca5a5', '#f87171', '#ef4444', '#dc2626', '#b91c1c', '#991b1b',
+            '#7f1d1d', '#450a0a'],
+    'orange': ['#fff7ed', '#ffedd5', '#fed7aa', '#fdba74', '#fb923c', '#f97316', '#ea580c', '#c2410c', '#9a3412',
+               '#7c2d12', '#431407'],
+    'yellow': ['#fefce8', '#fef9c3', '#fef08a', '#fde047', '#facc15', '#eab308', '#ca8a04', '#a16207', '#854d0e',
+               '#713f12', '#422006'],
+    'green': ['#f0fdf4', '#dcfce7', '#bbf7d0', '#86efac', '#4ade80', '#22c55e', '#16a34a', '#15803d', '#166534',
+              '#14532d', '#052e16'],
+    'blue': ['#eff6ff', '#dbeafe', '#bfdbfe', '#93c5fd', '#60a5fa', '#3b82f6', '#2563eb', '#1d4ed8', '#1e40af',
+             '#1e3a8a', '#172554'],
+    'purple': ['#faf5ff', '#f3e8ff', '#e9d5ff', '#d8b4fe', '#c084fc', '#a855f7', '#9333ea', '#7e22ce', '#6b21a8',
+               '#581c87', '#3b0764'],
+}
+SHADES = ['50', '100', '200', '300', '400', '500', '600', '700', '800', '900', '950']
+
+COLORS = {'white': '#ffffff', 'black': '#000000', **THEME_COLORS}
+for family, hexes in PALETTE.items():
+    COLORS.update({f'{family}-{shade}': value for shade, value in zip(SHADES, hexes)})
+
+SCREENS = {'sm': '640px', 'md': '768px', 'lg': '1024px', 'xl': '1280px'}
+PSEUDO_CLASSES = {'hover': ':hover', 'focus': ':focus', 'active': ':active', 'disabled': ':disabled'}
+
+FONT_SIZES = {
+    'xs': ('0.75rem', '1rem'), 'sm': ('0.875rem', '1.25rem'), 'base': ('1rem', '1.5rem'),
+    'lg': ('1.125rem', '1.75rem'), 'xl': ('1.25rem', '1.75rem'), '2xl': ('1.5rem', '2rem'),
+    '3xl': ('1.875rem', '2.25rem'), '4xl': ('2.25rem', '2.5rem'), '5xl': ('3rem', '1'),
+    '6xl': ('3.75rem', '1'), '7xl': ('4.5rem', '1'), '8xl': ('6rem', '1'),
+}
+FONT_WEIGHTS = {'normal': '400', 'medium': '500', 'semibold': '600', 'bold': '700', 'extrabold': '800'}
+MAX_WIDTHS = {
+    'xs': '20rem', 'sm': '24rem', 'md': '28rem', 'lg': '32rem', 'xl': '36rem', '2xl': '42rem', '3xl': '48rem',
+    '4xl': '56rem', '5xl': '64rem', '6xl': '72rem', '7xl': '80rem', 'full': '100%', 'none': 'none',
+}
+RADII = {'': '0.25rem', 'none': '0px', 'sm': '0.125rem', 'md': '0.375rem', 'lg': '0.5rem', 'xl': '0.75rem',
+         '2xl': '1rem', 'full': '9999px'}
+SHADOWS = {
+    '': ('0 1px 3px 0 rgb(0 0 0 / 0.1), 0 1px 2px -1px rgb(0 0 0 / 0.1)',
+         '0 1px 3px 0 var(--tw-shadow-color), 0 1px 2px -1px var(--tw-shadow-color)'),
+    'md': ('0 4px 6px -1px rgb(0 0 0 / 0.1), 0 2px 4px -2px rgb(0 0 0 / 0.1)',
+           '0 4px 6px -1px var(--tw-shadow-color), 0 2px 4px -2px var(--tw-shadow-color)'),
+    'lg': ('0 10px 15px -3px rgb(0 0 0 / 0.1), 0 4px 6px -4px rgb(0 0 0 / 0.1)',
+           '0 10px 15px -3px var(--tw-shadow-color), 0 4px 6px -4px var(--tw-shadow-color)'),
+    'xl': ('0 20px 25px -5px rgb(0 0 0 / 0.1), 0 8px 10px -6px rgb(0 0 0 / 0.1)',
+           '0 20px 25px -5px var(--tw-shadow-color), 0 8px 10px -6px var(--tw-shadow-color)'),
+    '2xl': ('0 25px 50px -12px rgb(0 0 0 / 0.25)', '0 25px 50px -12px var(--tw-shadow-color)'),
+    'none': ('0 0 #0000', '0 0 #0000'),
+}
+GRADIENT_DIRECTIONS = {
+    't': 'top', 'tr': 'top right', 'r': 'right', 'br': 'bottom right',
+    'b': 'bottom', 'bl': 'bottom left', 'l': 'left', 'tl': 'top left',
+}
+TRANSFORM = (
+    'translate(var(--tw-translate-x), var(--tw-translate-y)) rotate(var(--tw-rotate)) '
+    'scaleX(var(--tw-scale-x)) scaleY(var(--tw-scale-y))'
+)
+TRANSITION_COLORS = 'color, background-color, border-color, text-decoration-color, fill, stroke'
+TRANSITION_DEFAULT = f'{TRANSITION_COLORS}, opacity, box-shadow, transform, filter, backdrop-filter'
+EASE = 'cubic-bezier(0.4, 0, 0.2, 1)'
+
+# Utilities without a value
+STATIC = {
+    'block': 'display: block', 'inline-block': 'display: inline-block', 'inline': 'display: inline',
+    'flex': 'display: flex', 'inline-flex': 'display: inline-flex', 'grid': 'display: grid',
+    'table': 'display: table', 'hidden': 'display: none',
+    'static': 'position: static', 'fixed': 'position: fixed', 'absolute': 'position: absolute',
+    'relative': 'position: relative', 'sticky': 'position: sticky',
+    'flex-1': 'flex: 1 1 0%', 'flex-auto': 'flex: 1 1 auto', 'flex-none': 'flex: none',
+    'shrink-0': 'flex-shrink: 0', 'grow': 'flex-grow: 1',
+    'flex-row': 'flex-direction: row', 'flex-col': 'flex-direction: column', 'flex-wrap': 'flex-wrap: wrap',
+    'items-start': 'align-items: flex-start', 'items-end': 'align-items: flex-end',
+    'items-center': 'align-items: center', 'items-baseline': 'align-items: baseline',
+    'justify-start': 'justify-content: flex-start', 'justify-end': 'justify-content: flex-end',
+    'justify-center': 'justify-content: center', 'justify-between': 'justify-content: space-between',
+    'justify-around': 'justify-content: space-around',
+    'overflow-hidden': 'overflow: hidden', 'overflow-auto': 'overflow: auto',
+    'overflow-x-auto': 'overflow-x: auto', 'overflow-y-auto': 'overflow-y: auto',
+    'truncate': 'overflow: hidden; text-overflow: ellipsis; white-space: nowrap',
+    'whitespace-nowrap': 'white-space: nowrap',
+    'object-cover': 'object-fit: cover', 'object-contain': 'object-fit: contain',
+    'cursor-pointer': 'cursor: pointer',
+    'text-left': 'text-align: left', 'text-center': 'text-align: center', 'text-right': 'text-align: right',
+    'uppercase': 'text-transform: uppercase', 'italic': 'font-style: italic', 'underline': 'text-decoration-line: underline',
+    'tracking-tight': 'letter-spacing: -0.025em', 'tracking-wide': 'letter-spacing: 0.025em',
+    'tracking-wider': 'letter-spacing: 0.05em',
+    'leading-none': 'line-height: 1', 'leading-tight': 'line-height: 1.25', 'leading-relaxed': 'line-height: 1.625',
+    'outline-none': 'outline: 2px solid transparent; outline-offset: 2px',
+    'transform': f'transform: {TRANSFORM}',
+    'transition': f'transition-property: {TRANSITION_DEFAULT}; transition-timing-function: {EASE}; '
+                  'transition-duration: 150ms',
+    'transition-all': f'transition-property: all; transition-timing-function: {EASE}; transition-duration: 150ms',
+    'transition-colors': f'transition-property: {TRANSITION_COLORS}; transition-timing-function: {EASE}; '
+                         'transition-duration: 150ms',
+}
+
+# Groups of utilities in the order Tailwind emits them; a later group wins a conflict
+ORDER = [
+    'position', 'inset', 'z', 'margin', 'margin-axis', 'margin-side', 'display', 'height', 'max-height',
+    'min-height', 'width', 'min-width', 'max-width', 'flex', 'transform', 'cursor', 'grid', 'flexbox', 'gap',
+    'space', 'divide', 'overflow', 'rounded', 'border-width', 'border-side', 'border-color', 'background',
+    'bg-opacity', 'gradient', 'gradient-stops', 'object', 'padding', 'padding-axis', 'padding-side', 'text-align',
+    'font-size', 'font-weight', 'typography', 'text-color', 'placeholder', 'opacity', 'shadow', 'shadow-color',
+    'outline', 'transition', 'duration',
+]
+STATIC_GROUPS = {
+    'position': ['static', 'fixed', 'absolute', 'relative', 'sticky'],
+    'display': ['block', 'inline-block', 'inline', 'flex', 'inline-flex', 'grid', 'table', 'hidden'],
+    'flex': ['flex-1', 'flex-auto', 'flex-none', 'shrink-0', 'grow'],
+    'transform': ['transform'],
+    'cursor': ['cursor-pointer'],
+    'flexbox': ['flex-row', 'flex-col', 'flex-wrap', 'items-start', 'items-end', 'items-center', 'items-baseline',
+                'justify-start', 'justify-end', 'justify-center', 'justify-between', 'justify-around'],
+    'overflow': ['overflow-hidden', 'overflow-auto', 'overflow-x-auto', 'overflow-y-auto', 'truncate',
+                 'whitespace-nowrap'],
+    'object': ['object-cover', 'object-contain'],
+    'text-align': ['text-left', 'text-center', 'text-right'],
+    'typography': ['uppercase', 'italic', 'underline', 'tracking-tight', 'tracking-wide', 'tracking-wider',
+                   'leading-none', 'leading-tight', 'leading-relaxed'],
+    'outline': ['outline-none'],
+    'transition': ['transition', 'transition-all', 'transition-colors'],
+}
+STATIC_ORDER = {name: group for group, names in STATIC_GROUPS.items() for name in names}
+
+SIDES = {'t': ['top'], 'r': ['right'], 'b': ['bottom'], 'l': ['left'],
+         'x': ['left', 'right'], 'y': ['top', 'bottom']}
+
+_candidate = re.compile(r'[^\s"\'`<>{}=]+')
+_template_tag = re.compile(r'{%.*?%}|{{.*?}}|{#.*?#}')
+_class_attribute = re.compile(r'\bclass="([^"]*)"')
+_css_class = re.compile(r'\.([a-zA-Z][\w-]*)')
+# Tailwind's dark mode marker on <html>, it has no rule of its own
+MARKER_CLASSES = {'dark'}
+
+
+def _number(value):
+    return f'{value:g}'
+
+
+def spacing(value):
+    """Tailwind spacing scale: 4 -> 1rem, px -> 1px, [3px] -> 3px"""
+    if value.startswith('[') and value.endswith(']'):
+        return value[1:-1].replace('_', ' ')
+    if value == 'px':
+        return '1px'
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    return '0px' if number == 0 else f'{_number(number * 0.25)}rem'
+
+
+def size(value, screen):
+    """Width/height values: spacing, fractions, full, screen, auto"""
+    if value == 'full':
+        return '100%'
+    if value == 'screen':
+        return screen
+    if value in ('auto', 'min', 'max', 'fit'):
+        return value if value == 'auto' else f'{value}-content'
+    if re.fullmatch(r'\d+/\d+', value):
+        numerator, denominator = map(int, value.split('/'))
+        return f'{_number(numerator / denominator * 100)}%'
+    return spacing(value)
+
+
+def color(value):
+    """``(r, g, b, alpha)`` for ``name`` or ``name/opacity``, alpha None when opaque"""
+    name, _, opacity = value.partition('/')
+    hex_value = COLORS.get(name)
+    if hex_value is None:
+        return None
+    alpha = None
+    if opacity:
+        if not opacity.isdigit():
+            return None
+        alpha = int(opacity) / 100
+    return tuple(int(hex_value[i:i + 2], 16) for i in (1, 3, 5)) + (alpha,)
+
+
+def rgb(value, alpha):
+    r, g, b, _ = value
+    return f'rgb({r} {g} {b} / {alpha})'
+
+
+def color_declarations(prop, var, value):
+    """Opaque colors go through an opacity variable so ``bg-opacity-*`` can change them"""
+    c = color(value)
+    if c is None:
+        return None
+    if value == 'transparent':
+        return f'{prop}: transparent'
+    if c[3] is not None:
+        return f'{prop}: {rgb(c, _number(c[3]))}'
+    return f'{var}: 1; {prop}: {rgb(c, f"var({var})")}'
+
+
+def utility(name):
+    """``(group, declarations, selector_suffix)`` for a utility class, or None"""
+    negative = name.startswith('-')
+    base = name[1:] if negative else name
+
+    if name in STATIC:
+        return STATIC_ORDER[name], STATIC[name], ''
+
+    def signed(value):
+        return f'-{value}' if negative and value not in ('0px', None) else value
+
+    prefix, _, value = base.partition('-')
+    if not value:
+        if base == 'border':
+            return 'border-width', 'border-width: 1px', ''
+        if base == 'rounded':
+            return 'rounded', f'border-radius: {RADII[""]}', ''
+        if base == 'shadow':
+            return shadow('')
+        return None
+
+    if prefix == 'inset' and value in ('0', 'x-0', 'y-0'):
+        sides = {'0': ['top', 'right', 'bottom', 'left'], 'x-0': ['left', 'right'], 'y-0': ['top', 'bottom']}[value]
+        return 'inset', '; '.join(f'{side}: 0px' for side in sides), ''
+    if prefix in ('top', 'right', 'bottom', 'left'):
+        v = signed(spacing(value) if value != 'full' else '100%')
+        return ('inset', f'{prefix}: {v}', '') if v else None
+    if prefix == 'z' and value.isdigit():
+        return 'z', f'z-index: {value}', ''
+
+    if prefix in ('m', 'mx', 'my', 'mt', 'mr', 'mb', 'ml', 'p', 'px', 'py', 'pt', 'pr', 'pb', 'pl'):
+        v = 'auto' if value == 'auto' and prefix[0] == 'm' else spacing(value)
+        if v is None:
+            return None
+        v = signed(v)
+        kind = 'margin' if prefix[0] == 'm' else 'padding'
+        if len(prefix) == 1:
+            return kind, f'{kind}: {v}', ''
+        group = f'{kind}-axis' if prefix[1] in 'xy' else f'{kind}-side'
+        return group, '; '.join(f'{kind}-{side}: {v}' for side in SIDES[prefix[1]]), ''
+
+    if prefix in ('w', 'h'):
+        v = size(value, '100vw' if prefix == 'w' else '100vh')
+        return ('width' if prefix == 'w' else 'height', f'{"width" if prefix == "w" else "height"}: {v}', '') if v else None
+    if prefix in ('min', 'max'):
+        axis, _, value = value.partition('-')
+        if axis == 'w' and prefix == 'max' and value in MAX_WIDTHS:
+            return 'max-width', f'max-width: {MAX_WIDTHS[value]}', ''
+        if axis in ('w', 'h'):
+            v = size(value, '100vw' if axis == 'w' else '100vh')
+            if v is None and value == '0':
+                v = '0px'
+            prop = f'{prefix}-{"width" if axis == "w" else "height"}'
+            return (prop, f'{prop}: {v}', '') if v else None
+        return None
+
+    if prefix == 'grid' and value.startswith('cols-'):
+        count = value[len('cols-'):]
+        if count.isdigit():
+            return 'grid', f'grid-template-columns: repeat({count}, minmax(0, 1fr))', ''
+        return None
+    if prefix == 'col' and value.startswith('span-') and value[5:].isdigit():
+        return 'grid', f'grid-column: span {value[5:]} / span {value[5:]}', ''
+    if prefix == 'gap':
+        v = spacing(value)
+        return ('gap', f'gap: {v}', '') if v else None
+    if prefix == 'space' and value[:2] in ('x-', 'y-'):
+        v = spacing(value[2:])
+        if v is None:
+            return None
+        prop = 'margin-left' if value[0] == 'x' else 'margin-top'
+        return 'space', f'{prop}: {signed(v)}', ' > :not([hidden]) ~ :not([hidden])'
+    if prefix == 'divide':
+        sibling = ' > :not([hidden]) ~ :not([hidden])'
+        if value in ('y', 'x'):
+            side = 'top' if value == 'y' else 'left'
+            other = 'bottom' if value == 'y' else 'right'
+            return 'divide', f'border-{side}-width: 1px; border-{other}-width: 0px', sibling
+        declarations = color_declarations('border-color', '--tw-divide-opacity', value)
+        return ('divide', declarations, sibling) if declarations else None
+
+    if prefix == 'rounded':
+        return ('rounded', f'border-radius: {RADII[value]}', '') if value in RADII else None
+    if prefix == 'border':
+        if value.isdigit():
+            return 'border-width', f'border-width: {value}px', ''
+        side, _, width = value.partition('-')
+        if side in ('t', 'r', 'b', 'l', 'x', 'y') and (width == '' or width.isdigit()):
+            px = f'{width or 1}px'
+            return 'border-side', '; '.join(f'border-{s}-width: {px}' for s in SIDES[side]), ''
+        declarations = color_declarations('border-color', '--tw-border-opacity', value)
+        return ('border-color', declarations, '') if declarations else None
+
+    if prefix == 'bg':
+        if value.startswith('gradient-to-'):
+            direction = GRADIENT_DIRECTIONS.get(value[len('gradient-to-'):])
+            if direction:
+                return 'gradient', f'background-image: linear-gradient(to {direction}, var(--tw-gradient-stops))', ''
+            return None
+        if value.startswith('opacity-') and value[len('opacity-'):].isdigit():
+            return 'bg-opacity', f'--tw-bg-opacity: {_number(int(value[len("opacity-"):]) / 100)}', ''
+        declarations = color_declarations('background-color', '--tw-bg-opacity', value)
+        return ('background', declarations, '') if declarations else None
+    if prefix in ('from', 'via', 'to'):
+        c = color(value)
+        if c is None:
+            return None
+        stop = rgb(c, _number(c[3]) if c[3] is not None else '1')
+        transparent = rgb(c, '0')
+        if prefix == 'from':
+            declarations = (f'--tw-gradient-from: {stop}; --tw-gradient-to: {transparent}; '
+                            '--tw-gradient-stops: var(--tw-gradient-from), var(--tw-gradient-to)')
+        elif prefix == 'via':
+            declarations = (f'--tw-gradient-to: {transparent}; '
+                            f'--tw-gradient-stops: var(--tw-gradient-from), {stop}, var(--tw-gradient-to)')
+        else:
+            declarations = f'--tw-gradient-to: {stop}'
+        return 'gradient-stops', declarations, ''
+
+    if prefix == 'text':
+        if value in FONT_SIZES:
+            font_size, line_height = FONT_SIZES[value]
+            return 'font-size', f'font-size: {font_size}; line-height: {line_height}', ''
+        declarations = color_declarations('color', '--tw-text-opacity', value)
+        return ('text-color', declarations, '') if declarations else None
+    if prefix == 'font' and value in FONT_WEIGHTS:
+        return 'font-weight', f'font-weight: {FONT_WEIGHTS[value]}', ''
+    if prefix == 'placeholder':
+        declarations = color_declarations('color', '--tw-placeholder-opacity', value)
+        return ('placeholder', declarations, '::placeholder') if declarations else None
+    if prefix == 'opacity' and value.isdigit():
+        return 'opacity', f'opacity: {_number(int(value) / 100)}', ''
+
+    if prefix == 'shadow':
+        if value in SHADOWS:
+            return shadow(value)
+        c = color(value)
+        if c is None:
+            return None
+        return ('shadow-color', f'--tw-shadow-color: {rgb(c, _number(c[3]) if c[3] is not None else "1")}; '
+                                '--tw-shadow: var(--tw-shadow-colored)', '')
+
+    if prefix == 'scale' and value.isdigit():
+        v = _number(int(value) / 100)
+        return 'transform', f'--tw-scale-x: {v}; --tw-scale-y: {v}; transform: {TRANSFORM}', ''
+    if prefix == 'translate' and value[:2] in ('x-', 'y-'):
+        v = size(value[2:], '100%')
+        if v is None:
+            return None
+        return 'transform', f'--tw-translate-{value[0]}: {signed(v)}; transform: {TRANSFORM}', ''
+    if prefix == 'rotate' and value.isdigit():
+        return 'transform', f'--tw-rotate: {signed(value + "deg")}; transform: {TRANSFORM}', ''
+    if prefix == 'duration' and value.isdigit():
+        return 'duration', f'transition-duration: {value}ms', ''
+    return None
+
+
+def shadow(value):
+    plain, colored = SHADOWS[value]
+    return ('shadow', f'--tw-shadow: {plain}; --tw-shadow-colored: {colored}; '
+                      'box-shadow: var(--tw-ring-offset-shadow, 0 0 #0000), var(--tw-ring-shadow, 0 0 #0000), '
+                      'var(--tw-shadow)', '')
+
+
+def escape(class_name):
+    return re.sub(r'([^a-zA-Z0-9_-])', r'\\\1', class_name)
+
+
+def rule(class_name):
+    """``(sort_key, css)`` for a class name with its variants, or None if it isn't a utility"""
+    *variants, name = class_name.split(':')
+    found = utility(name)
+    if found is None:
+        return None
+    group, declarations, suffix = found
+
+    screen = None
+    pseudo_element = ''
+    pseudo_classes = ''
+    for variant in variants:
+        if variant in SCREENS and screen is None:
+            screen = variant
+        elif variant in PSEUDO_CLASSES:
+            pseudo_classes += PSEUDO_CLASSES[variant]
+        elif variant == 'file' and not pseudo_element:
+            pseudo_element = '::file-selector-button'
+        else:
+            return None
+
+    selector = f'.{escape(class_name)}{pseudo_element}{pseudo_classes}{suffix}'
+    css = f'{selector} {{ {declarations} }}'
+    screen_order = list(SCREENS).index(screen) + 1 if screen else 0
+    key = (screen_order, bool(pseudo_element or pseudo_classes), ORDER.index(group), class_name)
+    return key, css, screen
+
+
+def scan(paths):
+    """Every class-like token in the given files"""
+    tokens = set()
+    for path in paths:
+        text = Path(path).read_text(encoding='utf-8')
+        tokens.update(_candidate.findall(_template_tag.sub(' ', text)))
+    return tokens
+
+
+def unknown_classes(paths):
+    """``{class name: [file names]}`` for class attributes that are neither a utility nor in base.css
+
+    These would be silently missing from the stylesheet, usually a typo or
+    a Tailwind utility this module doesn't implement yet.
+    """
+    known = MARKER_CLASSES | set(_css_class.findall((ASSETS_DIR / 'base.css').read_text(encoding='utf-8')))
+    unknown = {}
+    for path in paths:
+        text = _template_tag.sub(' ', Path(path).read_text(encoding='utf-8'))
+        for attribute in _class_attribute.findall(text):
+            for class_name in attribute.split():
+                if class_name not in known and rule(class_name) is None:
+                    unknown.setdefault(class_name, set()).add(Path(path).name)
+    return {class_name: sorted(files) for class_name, files in sorted(unknown.items())}
+
+
+def template_files(directories):
+    for directory in directories:
+        yield from sorted(Path(directory).rglob('*.html'))
+
+
+def build(paths):
+    """The stylesheet for the classes used in ``paths``, and how many utilities it holds"""
+    rules = sorted(filter(None, (rule(token) for token in scan(paths))))
+
+    parts = [(ASSETS_DIR / 'base.css').read_text(encoding='utf-8').strip(), '']
+    current_screen = None
+    for _, css, screen in rules:
+        if screen != current_screen:
+            if current_screen:
+                parts.append('}')
+            parts.append(f'@media (min-width: {SCREENS[screen]}) {{')
+            current_screen = screen
+        parts.append(f'  {css}' if screen else css)
+    if current_screen:
+        parts.append('}')
+    return '\n'.join(parts) + '\n', len(rules)
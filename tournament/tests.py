@@ -1,3 +1,1672 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from collections import Counter, defaultdict
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.template.base import Template
+from django.template.loader_tags import BlockNode
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from .models import Bracket, BracketMatch, Team, TeamStanding, LogoVariant, MatchDay, Match, RatingHistory, StandingSnapshot, Tournament
+from .benchmarks import seed_tournament
+from .brackets import BracketError, bracket_layout, bracket_rounds, create_bracket, seed_order, set_bracket_winner
+from .live import broadcaster
+from .ratings import rating_history, replay_ratings
+from .tiebreakers import TIEBREAKERS, ResultMatrix, break_ties
+from . import metrics, profiling, stylesheet
+from .cache import bump_data_version
+from .scheduling import PairingError, generate_round_robin, generate_swiss_round, round_robin_rounds, swiss_pairs
+from .standings import get_standings, rebuild_standings, refresh_snapshots, snapshot_standings
+from .transfer import import_rows, read_rows
+
+
+def make_match(match_day, team_a, team_b, winner=None):
+    return Match.objects.create(match_day=match_day, team_a=team_a, team_b=team_b, winner=winner)
+
+
+class StandingsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.match_day = MatchDay.objects.create(day_number=1, name='Jornada 1')
+        self.ratas = Team.objects.create(name='Las ratas')
+        self.papois = Team.objects.create(name='Papois')
+        self.fa1 = Team.objects.create(name='FA1')
+
+    def test_stats_match_team_properties(self):
+        make_match(self.match_day, self.ratas, self.papois, winner=self.ratas)
+        make_match(self.match_day, self.ratas, self.fa1, winner=self.fa1)
+        make_match(self.match_day, self.papois, self.fa1, winner=self.fa1)
+        make_match(self.match_day, self.papois, self.ratas)
+        rebuild_standings()
+
+        standings = get_standings()
+
+        self.assertEqual([row['team'] for row in standings], [self.fa1, self.ratas, self.papois])
+        for row in standings:
+            team = row['team']
+            self.assertEqual(row['wins'], team.wins)
+            self.assertEqual(row['losses'], team.losses)
+            self.assertEqual(row['total_matches'], team.total_matches)
+            self.assertEqual(row['win_rate'], team.win_rate)
+
+    def test_query_count_does_not_grow_with_teams(self):
+        Tournament.get_current()
+        day_two = MatchDay.objects.create(day_number=2, name='Jornada 2')
+        for i in range(30):
+            team = Team.objects.create(name=f'Equipo {i}')
+            make_match(day_two, team, self.ratas, winner=team)
+
+        Tournament.get_current()
+
+        # standings + match days to pick from + recent matches
+        with self.assertNumQueries(3):
+            self.client.get(reverse('standings'))
+        cache.clear()
+        Tournament.get_current()
+        # standings
+        with self.assertNumQueries(1):
+            self.client.get(reverse('teams'))
+
+
+class CurrentTournamentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_creates_a_single_current_tournament(self):
+        first = Tournament.get_current()
+        Tournament.clear_current_cache()
+
+        self.assertEqual(Tournament.get_current(), first)
+        self.assertEqual(Tournament.objects.filter(is_current=True).count(), 1)
+
+    def test_cached_in_process(self):
+        Tournament.get_current()
+
+        with self.assertNumQueries(0):
+            Tournament.get_current()
+
+    def test_cached_copy_expires(self):
+        Tournament.get_current()
+        # Another worker renames it without this process seeing a new data version
+        Tournament.objects.filter(is_current=True).update(name='Otro nombre')
+
+        self.assertNotEqual(Tournament.get_current().name, 'Otro nombre')
+        with override_settings(CURRENT_TOURNAMENT_TTL=0):
+            self.assertEqual(Tournament.get_current().name, 'Otro nombre')
+
+    def test_saving_refreshes_the_cached_tournament(self):
+        tournament = Tournament.get_current()
+        tournament.status = 'completed'
+        tournament.save()
+
+        current = Tournament.get_current()
+        self.assertEqual(current.pk, tournament.pk)
+        self.assertEqual(current.status, 'completed')
+
+    def test_only_one_current_tournament_allowed(self):
+        Tournament.get_current()
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Tournament.objects.create(name='Otro torneo', is_current=True)
+
+
+class MatchConstraintTests(TestCase):
+    def setUp(self):
+        self.match_day = MatchDay.objects.create(day_number=1, name='Jornada 1')
+        self.ratas = Team.objects.create(name='Las ratas')
+        self.papois = Team.objects.create(name='Papois')
+        self.fa1 = Team.objects.create(name='FA1')
+
+    def test_team_cannot_play_itself(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            make_match(self.match_day, self.ratas, self.ratas)
+
+    def test_winner_must_be_one_of_the_teams(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            make_match(self.match_day, self.ratas, self.papois, winner=self.fa1)
+
+
+class TeamStandingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.match_day = MatchDay.objects.create(day_number=1, name='Jornada 1')
+        self.ratas = Team.objects.create(name='Las ratas')
+        self.papois = Team.objects.create(name='Papois')
+        self.fa1 = Team.objects.create(name='FA1')
+        self.match = make_match(self.match_day, self.ratas, self.papois)
+        staff = User.objects.create_user('staff', password='secret', is_staff=True)
+        self.client.force_login(staff)
+
+    def standing(self, team):
+        return TeamStanding.objects.get(team=team)
+
+    def post_matches(self, **data):
+        return self.client.post(reverse('manage_matches'), data)
+
+    def test_new_team_gets_standing_row(self):
+        self.assertEqual(TeamStanding.objects.count(), 3)
+        self.assertEqual(self.standing(self.fa1).played, 0)
+
+    def test_set_winner_updates_both_teams_and_ranks(self):
+        self.post_matches(action='set_winner', match_id=self.match.id, winner_id=self.papois.id)
+
+        papois, ratas = self.standing(self.papois), self.standing(self.ratas)
+        self.assertEqual((papois.wins, papois.losses, papois.played, papois.win_rate), (1, 0, 1, 100.0))
+        self.assertEqual((ratas.wins, ratas.losses, ratas.played, ratas.win_rate), (0, 1, 1, 0))
+        self.assertEqual(papois.rank, 1)
+        self.assertEqual(rebuild_standings(), [])
+
+    def test_delete_match_reverts_standings(self):
+        self.post_matches(action='set_winner', match_id=self.match.id, winner_id=self.ratas.id)
+        self.post_matches(action='delete_match', match_id=self.match.id)
+
+        self.assertEqual(self.standing(self.ratas).wins, 0)
+        self.assertEqual(self.standing(self.papois).played, 0)
+        self.assertEqual(rebuild_standings(), [])
+
+    def test_reset_clears_standings(self):
+        self.post_matches(action='set_winner', match_id=self.match.id, winner_id=self.ratas.id)
+        self.client.post(reverse('tournament_settings'), {'action': 'reset'})
+
+        self.assertFalse(TeamStanding.objects.filter(played__gt=0).exists())
+        self.assertEqual(rebuild_standings(), [])
+
+    def test_rebuild_command_reports_drift(self):
+        Match.objects.filter(pk=self.match.pk).update(winner=self.ratas)
+
+        out = StringIO()
+        call_command('rebuild_standings', stdout=out)
+
+        self.assertIn('Las ratas: wins was 0, now 1', out.getvalue())
+        self.assertEqual(self.standing(self.ratas).wins, 1)
+        self.assertEqual(self.standing(self.ratas).rank, 1)
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Tournament.get_current()
+        self.match_day = MatchDay.objects.create(day_number=1, name='Jornada 1')
+        self.ratas = Team.objects.create(name='Las ratas')
+        self.papois = Team.objects.create(name='Papois')
+        self.match = make_match(self.match_day, self.ratas, self.papois)
+        self.staff = User.objects.create_user('staff', password='secret', is_staff=True)
+
+    def test_anonymous_pages_are_served_from_cache(self):
+        for name in ('standings', 'schedule', 'teams'):
+            first = self.client.get(reverse(name))
+            with self.assertNumQueries(0):
+                second = self.client.get(reverse(name))
+            self.assertEqual(first.content, second.content)
+
+    def test_recording_a_winner_invalidates_cached_pages(self):
+        self.client.get(reverse('schedule'))
+
+        admin = self.client_class()
+        admin.force_login(self.staff)
+        with self.captureOnCommitCallbacks(execute=True):
+            admin.post(reverse('manage_matches'), {
+                'action': 'set_winner', 'match_id': self.match.id, 'winner_id': self.ratas.id,
+            })
+
+        self.assertContains(self.client.get(reverse('schedule')), 'Completado')
+
+    def test_staff_always_get_a_fresh_render(self):
+        self.client.force_login(self.staff)
+        self.client.get(reverse('standings'))
+        Match.objects.filter(pk=self.match.pk).update(winner=self.papois)
+        with self.captureOnCommitCallbacks(execute=True):
+            rebuild_standings()
+
+        response = self.client.get(reverse('standings'))
+        rows = response.content.decode()
+        self.assertLess(rows.index(f'data-team="{self.papois.id}"'), rows.index(f'data-team="{self.ratas.id}"'))
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.match_day = MatchDay.objects.create(day_number=1, name='Jornada 1')
+        self.ratas = Team.objects.create(name='Las ratas')
+        self.papois = Team.objects.create(name='Papois')
+        self.match = make_match(self.match_day, self.ratas, self.papois)
+
+    def test_matching_etag_returns_304_without_rendering(self):
+        for name in ('standings', 'schedule', 'teams'):
+            etag = self.client.get(reverse(name))['ETag']
+
+            with mock.patch('tournament.views.render') as render:
+                response = self.client.get(reverse(name), HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(response.status_code, 304)
+            render.assert_not_called()
+
+    def test_if_modified_since_returns_304(self):
+        last_modified = self.client.get(reverse('standings'))['Last-Modified']
+
+        response = self.client.get(reverse('standings'), HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_recording_a_result_changes_the_etag(self):
+        etag = self.client.get(reverse('standings'))['ETag']
+
+        Match.objects.filter(pk=self.match.pk).update(winner=self.ratas)
+        bump_data_version()
+
+        response = self.client.get(reverse('standings'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_any_write_moves_last_modified(self):
+        def rename():
+            self.ratas.name = 'Las ratas 2'
+            self.ratas.save()
+
+        for write in (rename, self.match.delete):
+            last_modified = self.client.get(reverse('standings'))['Last-Modified']
+            with self.captureOnCommitCallbacks(execute=True):
+                write()
+
+            response = self.client.get(reverse('standings'), HTTP_IF_MODIFIED_SINCE=last_modified)
+            self.assertEqual(response.status_code, 200)
+
+    def test_logged_in_users_are_not_validated(self):
+        self.client.force_login(User.objects.create_user('staff', password='secret', is_staff=True))
+
+        response = self.client.get(reverse('standings'))
+        self.assertFalse(response.has_header('ETag'))
+
+
+class LiveUpdatesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.match_day = MatchDay.objects.create(day_number=1, name='Jornada 1')
+        self.ratas = Team.objects.create(name='Las ratas')
+        self.papois = Team.objects.create(name='Papois')
+        self.match = make_match(self.match_day, self.ratas, self.papois)
+        self.client.force_login(User.objects.create_user('staff', password='secret', is_staff=True))
+
+    def test_broadcaster_delivers_events_published_from_threads(self):
+        async def listen():
+            queue = broadcaster.subscribe()
+            try:
+                threading.Thread(target=broadcaster.publish, args=('result', {'a': 1})).start()
+                return await asyncio.wait_for(queue.get(), timeout=1)
+            finally:
+                broadcaster.unsubscribe(queue)
+
+        self.assertEqual(asyncio.run(listen()), 'event: result\ndata: {"a":1}\n\n')
+
+    def test_set_winner_publishes_standings_diff_after_commit(self):
+        with mock.patch.object(broadcaster, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse('manage_matches'), {
+                    'action': 'set_winner', 'match_id': self.match.id, 'winner_id': self.ratas.id,
+                })
+
+        event, data = publish.call_args.args
+        self.assertEqual(event, 'result')
+        self.assertEqual(data['match']['winner'], 'Las ratas')
+        self.assertEqual({row['team'] for row in data['standings']}, {self.ratas.id, self.papois.id})
+
+    def test_reset_publishes_reset(self):
+        with mock.patch.object(broadcaster, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse('tournament_settings'), {'action': 'reset'})
+
+        self.assertEqual(publish.call_args.args[0], 'reset')
+
+    def test_wsgi_requests_are_told_not_to_reconnect(self):
+        self.assertEqual(self.client.get(reverse('live')).status_code, 204)
+
+
+class JsonApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Tournament.get_current()
+        self.day_one = MatchDay.objects.create(day_number=1, name='Jornada 1')
+        self.day_two = MatchDay.objects.create(day_number=2, name='Jornada 2')
+        self.ratas = Team.objects.create(name='Las ratas', captain_name='Ana')
+        self.papois = Team.objects.create(name='Papois')
+        for day in (self.day_one, self.day_two):
+            for i in range(5):
+                make_match(day, self.ratas, self.papois, winner=self.ratas if i % 2 else None)
+        rebuild_standings()
+
+    def test_standings(self):
+        with self.assertNumQueries(1):
+            data = self.client.get(reverse('api_standings')).json()
+
+        self.assertEqual(data['standings'][0], {
+            'rank': 1, 'team': self.ratas.id, 'name': 'Las ratas',
+            'played': 4, 'wins': 4, 'losses': 0, 'win_rate': 100.0, 'rating': 1500.0,
+        })
+
+    def test_schedule(self):
+        with self.assertNumQueries(2):
+            data = self.client.get(reverse('api_schedule')).json()
+
+        self.assertEqual([day['name'] for day in data['match_days']], ['Jornada 1', 'Jornada 2'])
+        self.assertEqual(len(data['match_days'][0]['matches']), 5)
+        self.assertEqual(data['match_days'][0]['matches'][1]['winner'], 'Las ratas')
+
+    def test_teams(self):
+        with self.assertNumQueries(1):
+            data = self.client.get(reverse('api_teams')).json()
+
+        self.assertEqual(data['teams'][0]['name'], 'Las ratas')
+        self.assertEqual(data['teams'][0]['captain'], 'Ana')
+        self.assertEqual(data['teams'][1]['losses'], 4)
+
+    def test_sparse_fieldsets(self):
+        standings = self.client.get(reverse('api_standings'), {'fields': 'name,wins'}).json()
+        self.assertEqual(standings['standings'][0], {'name': 'Las ratas', 'wins': 4})
+
+        schedule = self.client.get(reverse('api_schedule'), {'fields': 'name', 'match_fields': 'winner'}).json()
+        self.assertEqual(schedule['match_days'][0]['matches'][1], {'winner': 'Las ratas'})
+        self.assertEqual(set(schedule['match_days'][0]), {'name', 'matches'})
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(reverse('api_teams'), {'fields': 'password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_shares_conditional_get(self):
+        etag = self.client.get(reverse('api_standings'))['ETag']
+
+        response = self.client.get(reverse('api_standings'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class RoundRobinTests(TestCase):
+    def assert_every_pair_once(self, rounds, teams):
+        pairs = [frozenset(pair) for pairs in rounds for pair in pairs]
+        self.assertEqual(len(pairs), len(set(pairs)))
+        self.assertEqual(len(pairs), teams * (teams - 1) // 2)
+        for pairs in rounds:
+            playing = [team for pair in pairs for team in pair]
+            self.assertEqual(len(playing), len(set(playing)))
+
+    def test_circle_method_even_and_odd(self):
+        for teams in (2, 5, 8, 9):
+            rounds = round_robin_rounds(range(teams))
+            self.assertEqual(len(rounds), teams - 1 if teams % 2 == 0 else teams)
+            self.assert_every_pair_once(rounds, teams)
+
+    def test_double_round_robin_swaps_sides(self):
+        rounds = round_robin_rounds(range(4), double=True)
+
+        self.assertEqual(len(rounds), 6)
+        ordered = [pair for pairs in rounds for pair in pairs]
+        self.assertEqual(len(ordered), len(set(ordered)))
+
+    def test_generate_is_idempotent(self):
+        teams = [Team.objects.create(name=f'Equipo {i}') for i in range(6)]
+        match_day = MatchDay.objects.create(day_number=1, name='Jornada 1')
+        make_match(match_day, teams[1], teams[0])
+
+        self.assertEqual(generate_round_robin(), (5, 14))
+        self.assertEqual(generate_round_robin(), (0, 0))
+        self.assertEqual(Match.objects.count(), 15)
+
+    def test_dashboard_action(self):
+        for i in range(4):
+            Team.objects.create(name=f'Equipo {i}')
+        self.client.force_login(User.objects.create_user('staff', password='secret', is_staff=True))
+
+        self.client.post(reverse('manage_matches'), {
+            'action': 'generate_schedule', 'double': '1', 'start_date': '2026-01-05',
+        })
+
+        self.assertEqual(Match.objects.count(), 12)
+        self.assertEqual(MatchDay.objects.order_by('day_number').last().date.isoformat(), '2026-02-09')
+
+        response = self.client.post(reverse('manage_matches'), {
+            'action': 'generate_schedule', 'start_date': '2026-02-30',
+        }, follow=True)
+        self.assertContains(response, 'Fecha de inicio inválida')
+
+
+class SwissTests(TestCase):
+    def test_pairs_by_rank_and_avoids_rematches(self):
+        pairs, bye = swiss_pairs([1, 2, 3, 4], {1: {2}, 2: {1}})
+
+        self.assertEqual(pairs, [(1, 3), (2, 4)])
+        self.assertIsNone(bye)
+
+    def test_stuck_teams_are_paired_again(self):
+        # 3 and 4 already met and are the last free teams
+        pairs, _ = swiss_pairs([1, 2, 3, 4], {3: {4}, 4: {3}})
+
+        self.assertEqual(pairs, [(1, 4), (2, 3)])
+
+    def test_rematch_free_round_found_where_greedy_fails(self):
+        played = [(1, 3), (1, 4), (1, 6), (3, 4), (3, 5), (3, 6), (5, 6)]
+        opponents = defaultdict(set)
+        for team_a, team_b in played:
+            opponents[team_a].add(team_b)
+            opponents[team_b].add(team_a)
+
+        # From the top: 1-2, 3 has no one new left, 4-5, then 6 neither; no single swap fixes it
+        pairs, _ = swiss_pairs([1, 2, 3, 4, 5, 6], opponents)
+
+        self.assertEqual(pairs, [(1, 5), (2, 3), (4, 6)])
+
+    def test_rematch_only_when_unavoidable(self):
+        played = {1: {2}, 2: {1}}
+
+        self.assertEqual(swiss_pairs([1, 2], played), ([(1, 2)], None))
+
+    def test_bye_goes_to_lowest_ranked_with_fewest_rests(self):
+        self.assertEqual(swiss_pairs([1, 2, 3], {})[1], 3)
+        self.assertEqual(swiss_pairs([1, 2, 3], {}, {3: 1}), ([(1, 3)], 2))
+
+    def test_many_rounds_without_rematches(self):
+        teams = list(range(16))
+        opponents = {team: set() for team in teams}
+        for _ in range(8):
+            pairs, _ = swiss_pairs(teams, opponents)
+            self.assertEqual(sorted(team for pair in pairs for team in pair), sorted(teams))
+            for team_a, team_b in pairs:
+                self.assertNotIn(team_b, opponents[team_a])
+                opponents[team_a].add(team_b)
+                opponents[team_b].add(team_a)
+            teams = teams[1:] + teams[:1]
+
+    def test_generate_round(self):
+        teams = [Team.objects.create(name=f'Equipo {i}') for i in range(5)]
+        day = MatchDay.objects.create(day_number=1, name='Jornada 1')
+        make_match(day, teams[0], teams[1], winner=teams[0])
+        make_match(day, teams[2], teams[3], winner=teams[2])
+        rebuild_standings()
+
+        # Six reads and writes inside a savepoint
+        with self.assertNumQueries(8):
+            match_day, created, bye, rematches = generate_swiss_round()
+
+        self.assertEqual((match_day.day_number, created, rematches), (2, 2, 0))
+        # Equipo 4 already rested, the lowest ranked that played does now
+        self.assertEqual(bye, teams[3].pk)
+        self.assertEqual(
+            set(match_day.matches.values_list('team_a__name', 'team_b__name')),
+            {('Equipo 0', 'Equipo 2'), ('Equipo 4', 'Equipo 1')},
+        )
+
+    def test_pending_results_block_the_next_round(self):
+        teams = [Team.objects.create(name=f'Equipo {i}') for i in range(2)]
+        make_match(MatchDay.objects.create(day_number=1, name='Jornada 1'), *teams)
+
+        with self.assertRaises(PairingError):
+            generate_swiss_round()
+        self.assertEqual(MatchDay.objects.count(), 1)
+
+    def test_dashboard_action_and_command(self):
+        for i in range(4):
+            Team.objects.create(name=f'Equipo {i}')
+        self.client.force_login(User.objects.create_user('staff', password='secret', is_staff=True))
+
+        self.client.post(reverse('manage_matches'), {'action': 'generate_swiss', 'date': '2026-01-05'})
+        self.assertEqual(Match.objects.count(), 2)
+        self.assertEqual(MatchDay.objects.get().date.isoformat(), '2026-01-05')
+
+        response = self.client.post(reverse('manage_matches'), {'action': 'generate_swiss'}, follow=True)
+        self.assertContains(response, 'Hay partidos sin resultado')
+        response = self.client.post(reverse('manage_matches'), {'action': 'generate_swiss', 'date': 'mañana'}, follow=True)
+        self.assertContains(response, 'Fecha inválida')
+
+        Match.objects.update(winner=F('team_a'))
+        output = StringIO()
+        call_command('generate_swiss_round', stdout=output)
+        self.assertIn('Jornada 2 with 2 matches', output.getvalue())
+
+    def test_benchmark_command(self):
+        output = StringIO()
+        call_command('benchmark_swiss', sizes=[6, 7], rounds=3, stdout=output)
+
+        self.assertIn('rolled back', output.getvalue())
+        self.assertEqual(Team.objects.count(), 0)
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_seed_and_benchmark_every_view(self):
+        call_command('seed_benchmark', teams=6, match_days=3, matches=20, stdout=StringIO())
+        self.assertEqual(Match.objects.count(), 20)
+        self.assertEqual(rebuild_standings(), [])
+        self.assertEqual(replay_ratings(), set())
+        self.assertTrue(RatingHistory.objects.exists())
+
+        cache.set('unrelated', 1)
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            call_command('benchmark_views', output=output.name, repeat=1, stdout=StringIO())
+            results = json.load(open(output.name))
+
+        # Runs on a cache of its own
+        self.assertEqual(cache.get('unrelated'), 1)
+        for name in ('manage_matches', 'schedule_day', 'api_team_ratings'):
+            self.assertIn(name, results['views'])
+        for name, row in results['views'].items():
+            self.assertEqual(row['status'], 200, name)
+            self.assertGreater(row['wall_ms'], 0)
+
+
+@override_settings(SCHEDULE_PAGE_SIZE=3, SCHEDULE_WINDOW=1)
+class ScheduleFragmentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Tournament.get_current()
+        self.ratas = Team.objects.create(name='Las ratas')
+        self.papois = Team.objects.create(name='Papois')
+        self.days = []
+        for number in range(1, 9):
+            day = MatchDay.objects.create(day_number=number, name=f'Jornada {number}')
+            match = make_match(day, self.ratas, self.papois)
+            if number < 5:
+                Match.objects.filter(pk=match.pk).update(winner=self.ratas)
+            self.days.append(day)
+
+    def test_defaults_to_page_of_current_match_day(self):
+        response = self.client.get(reverse('schedule'))
+
+        # Jornada 5 is the first with pending matches, so page 2 (days 4-6) is shown
+        self.assertEqual(response.context['current_day'], self.days[4])
+        self.assertEqual(response.context['page'].number, 2)
+        inline = [day.day_number for day, fragment in response.context['schedule'] if fragment]
+        self.assertEqual(inline, [4, 5, 6])
+
+    def test_empty_match_days_are_not_pending(self):
+        Match.objects.filter(match_day__in=self.days[4:]).update(winner=self.ratas)
+        MatchDay.objects.create(day_number=20, name='Jornada 20')
+        pending = make_match(MatchDay.objects.create(day_number=30, name='Jornada 30'), self.ratas, self.papois)
+
+        response = self.client.get(reverse('schedule'))
+        self.assertEqual(response.context['current_day'], pending.match_day)
+
+    def test_next_match_day_is_the_earliest_date(self):
+        today = timezone.localdate()
+        MatchDay.objects.filter(pk=self.days[6].pk).update(date=today + timedelta(days=7))
+        MatchDay.objects.filter(pk=self.days[7].pk).update(date=today)
+
+        response = self.client.get(reverse('schedule'))
+        self.assertEqual(response.context['current_day'], self.days[7])
+
+    def test_other_match_days_load_from_fragment_url(self):
+        response = self.client.get(reverse('schedule'), {'page': 1})
+
+        self.assertContains(response, reverse('schedule_day', args=[self.days[0].id]))
+        fragment = self.client.get(reverse('schedule_day', args=[self.days[0].id]))
+        self.assertContains(fragment, 'Las ratas')
+        self.assertContains(fragment, 'Completado')
+
+    def test_query_count_does_not_depend_on_season_length(self):
+        self.client.get(reverse('schedule'))
+        cache.clear()
+        Tournament.get_current()
+        with self.assertNumQueries(8):
+            self.client.get(reverse('schedule'))
+
+        for number in range(9, 40):
+            MatchDay.objects.create(day_number=number, name=f'Jornada {number}')
+        cache.clear()
+        Tournament.get_current()
+        with self.assertNumQueries(8):
+            self.client.get(reverse('schedule'))
+
+    def test_fragment_invalidated_only_for_changed_day(self):
+        day_one, day_two = self.days[0], self.days[1]
+        self.client.get(reverse('schedule_day', args=[day_one.id]))
+        self.client.get(reverse('schedule_day', args=[day_two.id]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            match = day_one.matches.get()
+            match.winner = self.papois
+            match.save()
+
+        with self.assertNumQueries(0):
+            self.client.get(reverse('schedule_day', args=[day_two.id]))
+        response = self.client.get(reverse('schedule_day', args=[day_one.id]))
+        self.assertContains(response, 'Ganador: <span class="text-kong-gold font-semibold">Papois</span>', html=False)
+
+    def test_page_only_renders_the_changed_day_again(self):
+        self.client.get(reverse('schedule'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            match = self.days[4].matches.get()
+            match.winner = self.papois
+            match.save()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('schedule'))
+        day_queries = [q['sql'] for q in queries if q['sql'].endswith('ORDER BY "tournament_match"."created_at" ASC')]
+        self.assertEqual(len(day_queries), 1)
+        self.assertContains(response, 'Ganador: <span class="text-kong-gold font-semibold">Papois</span>', html=False)
+
+    def test_fragment_etag(self):
+        etag = self.client.get(reverse('schedule_day', args=[self.days[0].id]))['ETag']
+
+        response = self.client.get(reverse('schedule_day', args=[self.days[0].id]), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_match_day(self):
+        self.assertEqual(self.client.get(reverse('schedule_day', args=[999])).status_code, 404)
+
+
+class ManageMatchesTests(TestCase):
+    def setUp(self):
+        self.teams = [Team.objects.create(name=f'Equipo {i}') for i in range(4)]
+        self.client.force_login(User.objects.create_user('staff', password='secret', is_staff=True))
+
+    def add_match_days(self, first, count):
+        for number in range(first, first + count):
+            day = MatchDay.objects.create(day_number=number, name=f'Jornada {number}')
+            make_match(day, self.teams[0], self.teams[1], winner=self.teams[0])
+            make_match(day, self.teams[2], self.teams[3])
+
+    def test_query_count_does_not_grow_with_matches(self):
+        self.add_match_days(1, 2)
+        # session + user + match days + their matches + team options
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('manage_matches'))
+        self.assertContains(response, '<option value="%d">Equipo 0</option>' % self.teams[0].id, count=4)
+
+        self.add_match_days(3, 10)
+        with self.assertNumQueries(5):
+            self.client.get(reverse('manage_matches'))
+
+    def test_post_skips_page_queries(self):
+        # session + user + insert, nothing for the page itself
+        with self.assertNumQueries(3):
+            self.client.post(reverse('manage_matches'), {
+                'action': 'add_match_day', 'day_number': 1, 'name': 'Jornada 1',
+            })
+
+
+class BatchResultsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teams = [Team.objects.create(name=f'Equipo {i}') for i in range(4)]
+        self.day = MatchDay.objects.create(day_number=1, name='Jornada 1')
+        self.other_day = MatchDay.objects.create(day_number=2, name='Jornada 2')
+        self.first = make_match(self.day, self.teams[0], self.teams[1])
+        self.second = make_match(self.day, self.teams[2], self.teams[3])
+        self.third = make_match(self.other_day, self.teams[0], self.teams[2])
+        self.client.force_login(User.objects.create_user('staff', password='secret', is_staff=True))
+
+    def post_results(self, data, **extra):
+        return self.client.post(reverse('manage_matches'), {'action': 'set_winners', **data, **extra})
+
+    def test_applies_every_valid_row(self):
+        self.post_results({
+            f'winner_{self.first.id}': self.teams[1].id,
+            f'winner_{self.second.id}': self.teams[2].id,
+            f'winner_{self.third.id}': '',
+        })
+
+        self.assertEqual(Match.objects.get(pk=self.first.pk).winner, self.teams[1])
+        self.assertEqual(Match.objects.get(pk=self.second.pk).winner, self.teams[2])
+        self.assertIsNone(Match.objects.get(pk=self.third.pk).winner)
+        self.assertEqual(rebuild_standings(), [])
+        self.assertEqual(TeamStanding.objects.get(team=self.teams[1]).wins, 1)
+
+    def test_rejected_rows_do_not_block_the_rest(self):
+        from .results import record_results
+
+        updated, errors = record_results([
+            (self.first.id, self.teams[0].id),
+            (self.first.id, self.teams[1].id),
+            (self.second.id, self.teams[0].id),
+            (999999, self.teams[0].id),
+            ('x', self.teams[0].id),
+        ])
+
+        self.assertEqual([match.id for match in updated], [self.first.id])
+        self.assertEqual({match_id for match_id, _ in errors}, {self.first.id, self.second.id, 999999, 'x'})
+        self.assertEqual(Match.objects.get(pk=self.first.pk).winner, self.teams[0])
+        self.assertIsNone(Match.objects.get(pk=self.second.pk).winner)
+
+    def test_only_submits_a_single_row(self):
+        self.post_results({
+            f'winner_{self.first.id}': self.teams[0].id,
+            f'winner_{self.second.id}': self.teams[2].id,
+        }, only=str(self.first.id))
+
+        self.assertEqual(Match.objects.get(pk=self.first.pk).winner, self.teams[0])
+        self.assertIsNone(Match.objects.get(pk=self.second.pk).winner)
+
+    def test_invalidates_once_per_batch(self):
+        from .results import record_results
+
+        with mock.patch('tournament.results.bump_data_version') as bump_data, \
+                mock.patch('tournament.results.bump_match_day_version') as bump_day, \
+                mock.patch('tournament.results.publish_results') as publish, \
+                self.captureOnCommitCallbacks(execute=True):
+            record_results([
+                (self.first.id, self.teams[0].id),
+                (self.second.id, self.teams[3].id),
+                (self.third.id, self.teams[2].id),
+            ])
+
+        bump_data.assert_called_once_with()
+        self.assertEqual(sorted(call.args[0] for call in bump_day.call_args_list), [self.day.id, self.other_day.id])
+        publish.assert_called_once()
+
+    def test_query_count_does_not_grow_with_rows(self):
+        from .results import record_results
+
+        days = [MatchDay.objects.create(day_number=n, name=f'Jornada {n}') for n in range(3, 13)]
+        matches = [make_match(day, self.teams[0], self.teams[1]) for day in days]
+
+        # savepoint + locked select + bulk update + five for the standings refresh
+        # + six for the ratings + seven for the snapshots (nothing snapshotted before
+        # Jornada 3, so one checks there are no earlier results) + release
+        with self.assertNumQueries(22):
+            updated, errors = record_results([(match.id, self.teams[1].id) for match in matches])
+        self.assertEqual((len(updated), errors), (10, []))
+        self.assertEqual(rebuild_standings(), [])
+
+
+class TransferTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ratas = Team.objects.create(name='Las ratas', captain_name='Ana')
+        self.papois = Team.objects.create(name='Papois')
+        day = MatchDay.objects.create(day_number=1, name='Jornada 1')
+        make_match(day, self.ratas, self.papois, winner=self.papois)
+        make_match(day, self.papois, self.ratas)
+
+    def export(self, fmt):
+        out = StringIO()
+        call_command('export_tournament', format=fmt, stdout=out)
+        return out.getvalue()
+
+    def test_round_trip(self):
+        for fmt in ('csv', 'json'):
+            with self.subTest(fmt=fmt):
+                data = self.export(fmt)
+                Team.objects.all().delete()
+                MatchDay.objects.all().delete()
+
+                result = import_rows(read_rows(StringIO(data, newline=''), fmt))
+
+                self.assertEqual((result.teams, result.match_days, result.matches, result.errors), (2, 1, 2, []))
+                self.assertEqual(Team.objects.get(name='Las ratas').captain_name, 'Ana')
+                self.assertEqual(Match.objects.filter(winner__name='Papois').count(), 1)
+                self.assertEqual(rebuild_standings(), [])
+                self.assertEqual(self.export(fmt), data)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        lines = [
+            'type,name,day_number,team_a,team_b,winner',
+            'team,Nuevo,,,,',
+            'match,,2,Nuevo,Papois,Nuevo',
+            'match,,2,Nadie,Papois,',
+            'match,,2,Papois,Papois,',
+            'match,,2,Nuevo,Papois,Las ratas',
+            'match,,x,Nuevo,Papois,',
+            'equipo,Otro,,,,',
+        ]
+
+        result = import_rows(read_rows(lines, 'csv'))
+
+        self.assertEqual((result.teams, result.match_days, result.matches), (1, 1, 1))
+        self.assertEqual([line for line, _ in result.errors], [4, 5, 6, 7, 8])
+        self.assertEqual(MatchDay.objects.get(day_number=2).name, 'Jornada 2')
+        self.assertEqual(TeamStanding.objects.get(team__name='Nuevo').wins, 1)
+
+    def test_values_of_the_wrong_type_are_reported(self):
+        lines = [
+            '{"type": "team", "name": 5}',
+            '{"type": "team", "name": ["Nuevo"]}',
+            '{"type": ["team"], "name": "Nuevo"}',
+            '{"type": "match_day", "day_number": true}',
+            '{"type": "match", "day_number": 1, "team_a": {"name": "Papois"}, "team_b": "Las ratas"}',
+            '{"type": "match_day", "day_number": 4, "date": 20240101}',
+            '{"type": "match_day", "day_number": 5}',
+        ]
+
+        result = import_rows(read_rows(lines, 'json'))
+
+        self.assertEqual(result.errors, [
+            (1, 'Valor inválido en name'), (2, 'Valor inválido en name'), (3, 'Fila inválida'),
+            (4, 'Valor inválido en day_number'), (5, 'Valor inválido en team_a'), (6, 'Valor inválido en date'),
+        ])
+        self.assertEqual(result.match_days, 1)
+
+    def test_malformed_csv_lines_are_reported(self):
+        lines = ['type,name', 'team,Nuevo', f'team,"{"x" * 200000}"', 'team,Otro']
+
+        result = import_rows(read_rows(lines, 'csv'))
+
+        self.assertEqual(result.errors, [(3, 'Fila inválida')])
+        self.assertEqual(result.teams, 2)
+
+    @mock.patch('tournament.transfer.CHUNK_SIZE', 50)
+    def test_writes_matches_in_chunks(self):
+        rebuild_standings()
+        lines = ['{"type": "match", "day_number": 1, "team_a": "Las ratas", "team_b": "Papois"}'] * 50
+        # Five of them replay the ratings, three check the snapshots
+        with self.assertNumQueries(16):
+            import_rows(read_rows(lines, 'json'))
+        # Three more chunks, one insert each, and no rating changed this time
+        with self.assertNumQueries(18):
+            import_rows(read_rows(lines * 4, 'json'))
+        self.assertEqual(Match.objects.count(), 252)
+
+    def test_dashboard_download_and_upload(self):
+        self.client.force_login(User.objects.create_user('staff', password='secret', is_staff=True))
+        response = self.client.get(reverse('export_tournament'), {'format': 'csv'})
+        self.assertTrue(response.streaming)
+        data = b''.join(response.streaming_content)
+        Match.objects.all().delete()
+
+        upload = SimpleUploadedFile('kongleague.csv', data, content_type='text/csv')
+        self.client.post(reverse('tournament_settings'), {'action': 'import', 'file': upload})
+
+        self.assertEqual(Match.objects.count(), 2)
+
+
+def make_image(size, mode='RGB', fmt='PNG', color='gold'):
+    out = BytesIO()
+    Image.new(mode, size, color).save(out, fmt)
+    return out.getvalue()
+
+
+@override_settings(LOGO_WORKERS=0)
+class LogoProcessingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        self.client.force_login(User.objects.create_user('staff', password='secret', is_staff=True))
+
+    def upload(self, content, name='logo.png'):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('manage_teams'), {
+                'action': 'add', 'name': 'Papois', 'logo': SimpleUploadedFile(name, content),
+            })
+        return Team.objects.filter(name='Papois').first()
+
+    def test_upload_is_downscaled_with_thumbnails(self):
+        team = self.upload(make_image((3000, 1500)))
+
+        with Image.open(team.logo) as image:
+            self.assertEqual(image.size, (1024, 512))
+            self.assertEqual(image.format, 'JPEG')
+        variants = {(v.size, v.format): (v.width, v.height) for v in team.logo_variants.all()}
+        self.assertEqual(variants[(48, 'webp')], (48, 24))
+        self.assertEqual(variants[(192, 'jpeg')], (192, 96))
+        self.assertEqual(len(variants), 6)
+        for variant in team.logo_variants.all():
+            with Image.open(variant.image) as image:
+                self.assertEqual(image.size, (variant.width, variant.height))
+
+    def test_transparent_logo_keeps_png_and_small_logo_is_not_upscaled(self):
+        team = self.upload(make_image((60, 60), mode='RGBA'))
+
+        self.assertEqual(
+            sorted((v.size, v.format, v.width) for v in team.logo_variants.all()),
+            [(48, 'png', 48), (48, 'webp', 48), (96, 'png', 60), (96, 'webp', 60)],
+        )
+        response = self.client.get(reverse('teams'))
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, ' 60w')
+
+    def test_invalid_upload_is_rejected(self):
+        self.assertIsNone(self.upload(b'not an image'))
+        self.assertIsNone(self.upload(make_image((10, 10), fmt='BMP'), name='logo.bmp'))
+
+    def test_upload_is_named_after_its_detected_format(self):
+        team = self.upload(make_image((64, 64)), name='evil.html')
+
+        self.assertRegex(team.logo.name, r'^team_logos/[0-9a-f]{32}\.png$')
+
+    def test_removing_the_logo_deletes_variants(self):
+        team = self.upload(make_image((300, 300)))
+        paths = [v.image.path for v in team.logo_variants.all()]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('manage_teams'), {
+                'action': 'edit', 'team_id': team.id, 'name': team.name, 'remove_logo': '1',
+            })
+
+        self.assertFalse(LogoVariant.objects.exists())
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+
+    def test_backfill_only_processes_stale_logos(self):
+        team = self.upload(make_image((300, 300)))
+        LogoVariant.objects.filter(team=team).delete()
+
+        out = StringIO()
+        call_command('process_logos', stdout=out)
+        self.assertIn('Processed 1 logo', out.getvalue())
+        call_command('process_logos', stdout=out)
+        self.assertIn('Processed 0 logo', out.getvalue())
+        self.assertEqual(team.logo_variants.count(), 6)
+
+
+@override_settings(LOGO_WORKERS=0)
+class LogoStorageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        self.storage = Team._meta.get_field('logo').storage
+
+    def create_team(self, name, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Team.objects.create(name=name, logo=SimpleUploadedFile('photo.PNG', content))
+
+    def test_identical_uploads_share_one_file(self):
+        content = make_image((64, 64))
+        ratas = self.create_team('Las ratas', content)
+        papois = self.create_team('Papois', content)
+
+        self.assertEqual(ratas.logo.name, papois.logo.name)
+        self.assertRegex(ratas.logo.name, r'^team_logos/[0-9a-f]{32}\.png$')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ratas.delete()
+        self.assertTrue(self.storage.exists(papois.logo.name))
+        with self.captureOnCommitCallbacks(execute=True):
+            papois.delete()
+        self.assertFalse(self.storage.exists(papois.logo.name))
+        self.assertEqual(self.storage.listdir('team_logos/variants')[1], [])
+
+    def test_replacing_a_logo_deletes_the_old_files(self):
+        team = self.create_team('Papois', make_image((64, 64)))
+        old_files = [team.logo.name] + [v.image.name for v in team.logo_variants.all()]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            team.logo = SimpleUploadedFile('new.png', make_image((64, 64), mode='RGBA', color='purple'))
+            team.save()
+
+        self.assertFalse(any(self.storage.exists(name) for name in old_files))
+        self.assertEqual(team.logo_variants.count(), 4)
+
+    def test_serves_with_immutable_caching_and_ranges(self):
+        team = self.create_team('Papois', make_image((64, 64)))
+        url = team.logo.url
+        size = team.logo.size
+
+        response = self.client.get(url)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['Content-Type'], 'image/png')
+        etag = response['ETag']
+        self.assertEqual(etag, '"%s"' % team.logo.name[len('team_logos/'):-len('.png')])
+
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+
+        response = self.client.get(url, headers={'Range': 'bytes=0-9'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 0-9/{size}')
+        self.assertEqual(response.content, b'\x89PNG\r\n\x1a\n\x00\x00')
+
+        response = self.client.get(url, headers={'Range': 'bytes=-4'})
+        self.assertEqual(len(response.content), 4)
+        self.assertEqual(self.client.get(url, headers={'Range': f'bytes={size}-'}).status_code, 416)
+        response = self.client.get(url, headers={'Range': 'bytes=0-9', 'If-Range': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/team_logos/missing.png').status_code, 404)
+
+    def test_only_images_are_served_as_such(self):
+        for name in ('team_logos/page.html', 'team_logos/drawing.svg'):
+            name = self.storage.save(name, ContentFile(b'<script>alert(1)</script>'))
+            response = self.client.get(self.storage.url(name))
+            self.assertEqual(response['Content-Type'], 'application/octet-stream')
+            self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+
+    def test_cleanup_command_removes_orphans(self):
+        team = self.create_team('Papois', make_image((64, 64)))
+        self.storage.save('team_logos/orphan.png', ContentFile(b'orphan'))
+
+        out = StringIO()
+        call_command('cleanup_media', min_age=0, stdout=out)
+
+        self.assertIn('Deleted 1 orphaned file', out.getvalue())
+        self.assertTrue(self.storage.exists(team.logo.name))
+        self.assertEqual(len(self.storage.listdir('team_logos')[1]), 1)
+
+
+class StylesheetTests(TestCase):
+    def test_committed_stylesheet_is_up_to_date(self):
+        call_command('build_css', check=True, stdout=StringIO())
+
+    def test_only_known_utilities_are_emitted(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.html') as template:
+            template.write('<div class="p-4 md:grid-cols-3 hover:bg-kong-gold/20 not-a-class {% if x %}mt-2{% endif %}">')
+            template.flush()
+            css, count = stylesheet.build([template.name])
+
+        self.assertEqual(count, 4)
+        self.assertIn('.p-4 { padding: 1rem }', css)
+        self.assertIn('.hover\\:bg-kong-gold\\/20:hover { background-color: rgb(255 215 0 / 0.2) }', css)
+        self.assertIn('@media (min-width: 768px) {\n  .md\\:grid-cols-3', css)
+        self.assertNotIn('not-a-class', css)
+        # Responsive rules come last so they override the base utilities
+        self.assertGreater(css.index('@media'), css.index('.mt-2'))
+
+    def test_unknown_classes_are_reported(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.html') as template:
+            template.write('<div class="p-4 confetti dark text-gold-500 {% if x %}mt-3{% else %}mt-huge{% endif %}">')
+            template.flush()
+            unknown = stylesheet.unknown_classes([template.name])
+
+        name = os.path.basename(template.name)
+        self.assertEqual(unknown, {'mt-huge': [name], 'text-gold-500': [name]})
+
+
+class TemplateRenderingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Tournament.get_current()
+        self.match_day = MatchDay.objects.create(day_number=1, name='Jornada 1')
+        self.ratas = Team.objects.create(name='Las ratas')
+        self.papois = Team.objects.create(name='Papois')
+        self.match = make_match(self.match_day, self.ratas, self.papois)
+        self.client.force_login(User.objects.create_user('staff', password='secret', is_staff=True))
+
+    def standings_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('standings'))
+        return [q['sql'] for q in queries if 'tournament_teamstanding' in q['sql']]
+
+    def test_standings_rows_are_cached_until_the_data_changes(self):
+        self.assertEqual(len(self.standings_queries()), 1)
+        self.assertEqual(self.standings_queries(), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('manage_matches'), {
+                'action': 'set_winner', 'match_id': self.match.id, 'winner_id': self.papois.id,
+            })
+        self.assertEqual(len(self.standings_queries()), 1)
+
+    def test_profiler_logs_templates_and_blocks(self):
+        with (
+            mock.patch.object(Template, 'render', Template.render),
+            mock.patch.object(BlockNode, 'render', BlockNode.render),
+            mock.patch.object(profiling, '_installed', False),
+        ):
+            profiling.install()
+            with self.assertLogs('tournament.profiling', 'INFO') as logs:
+                self.client.get(reverse('standings'))
+
+        # The standings rows fragment is rendered on its own before the page
+        self.assertEqual(len(logs.output), 2)
+        self.assertIn('Rendered tournament/standings_rows.html', logs.output[0])
+        self.assertIn('Rendered tournament/standings.html', logs.output[1])
+        self.assertIn('tournament/standings.html#content', logs.output[1])
+        self.assertIn('tournament/standings.html#title', logs.output[1])
+
+
+class RequestTimingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.registry.reset()
+        Tournament.get_current()
+        Team.objects.create(name='Papois')
+
+    def test_requests_are_timed_per_view(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('standings'))
+
+        self.assertRegex(response['Server-Timing'], rf'^total;dur=[\d.]+, db;dur=[\d.]+;desc="{len(queries)} queries", tpl;dur=[\d.]+$')
+        stats = metrics.registry.snapshot()['standings']
+        self.assertEqual(stats['count'], 1)
+        self.assertEqual(stats['queries'], len(queries))
+        self.assertEqual(stats['bytes'], len(response.content))
+        self.assertGreater(stats['template_ms'], 0)
+        self.assertEqual(stats['window']['count'], 1)
+        self.assertEqual(sum(stats['buckets']), 1)
+
+    async def test_async_requests_are_timed(self):
+        response = await self.async_client.get(reverse('api_standings'))
+
+        self.assertIn('Server-Timing', response)
+        stats = (await sync_to_async(metrics.registry.snapshot)())['api_standings']
+        self.assertEqual(stats['count'], 1)
+        self.assertGreater(stats['queries'], 0)
+
+    @override_settings(SLOW_REQUEST_MS=0)
+    def test_slow_requests_are_logged_with_their_sql(self):
+        with self.assertLogs('tournament.middleware', 'WARNING') as logs:
+            self.client.get(reverse('teams'))
+
+        self.assertIn('Slow request GET /teams/ (teams)', logs.output[0])
+        self.assertIn('Slowest SQL:\n', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+
+@override_settings(METRICS_TOKEN='scrape-me')
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.registry.reset()
+        Tournament.get_current()
+        Team.objects.create(name='Papois')
+
+    def test_access_requires_staff_or_token(self):
+        url = reverse('metrics')
+        self.assertRedirects(self.client.get(url), f'{reverse("admin_login")}?next={url}', fetch_redirect_response=False)
+        self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer wrong'}).status_code, 401)
+        self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer scrape-me'}).status_code, 200)
+
+        self.client.force_login(User.objects.create_user('fan', password='secret'))
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(User.objects.create_user('staff', password='secret', is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_exposes_requests_and_cache_counters(self):
+        self.client.get(reverse('standings'))
+        self.client.get(reverse('standings'))
+
+        response = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer scrape-me'})
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        body = response.content.decode()
+        self.assertIn('kongleague_http_requests_total{view="standings"} 2\n', body)
+        self.assertIn('kongleague_http_request_duration_seconds_bucket{view="standings",le="+Inf"} 2\n', body)
+        self.assertIn('kongleague_http_request_duration_seconds_count{view="standings"} 2\n', body)
+        self.assertIn('kongleague_cache_requests_total{cache="page",result="hit"} 1\n', body)
+        self.assertIn('kongleague_cache_requests_total{cache="page",result="miss"} 1\n', body)
+        self.assertIn('kongleague_cache_requests_total{cache="standings",result="miss"} 1\n', body)
+        self.assertIn(f'pid="{os.getpid()}"', body)
+
+    def test_counters_add_up_across_workers(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            other = {
+                'hostname': 'web-1', 'pid': 4242, 'ppid': 1, 'updated': 0,
+                'views': {'standings': {
+                    'count': 3, 'total_ms': 30.0, 'queries': 9, 'db_ms': 3.0, 'template_ms': 6.0,
+                    'bytes': 300, 'buckets': [0, 3] + [0] * (len(metrics.BUCKETS_MS) - 1),
+                }},
+                'caches': {'page': {'hit': 5, 'miss': 1}},
+            }
+            with open(os.path.join(directory, 'web-1-4242.json'), 'w') as f:
+                json.dump(other, f)
+            self.client.get(reverse('standings'))
+
+            data = metrics.collect()
+
+        self.assertEqual(data['views']['standings']['count'], 4)
+        self.assertEqual(data['views']['standings']['bytes'], 300 + metrics.registry.totals()['views']['standings']['bytes'])
+        self.assertEqual(sum(data['views']['standings']['buckets']), 4)
+        self.assertEqual(data['caches']['page'], {'hit': 5, 'miss': 2})
+        self.assertEqual({w['pid'] for w in data['workers']}, {4242, os.getpid()})
+
+
+class RatingTests(TestCase):
+    def setUp(self):
+        self.teams = [Team.objects.create(name=f'Equipo {i}') for i in range(4)]
+        self.day = MatchDay.objects.create(day_number=1, name='Jornada 1')
+        self.client.force_login(User.objects.create_user('staff', password='secret', is_staff=True))
+
+    def set_winner(self, match, winner):
+        return self.client.post(reverse('manage_matches'), {
+            'action': 'set_winner', 'match_id': match.id, 'winner_id': winner.id,
+        })
+
+    def ratings(self):
+        return dict(TeamStanding.objects.values_list('team_id', 'rating'))
+
+    def test_elo_between_equal_teams(self):
+        match = make_match(self.day, self.teams[0], self.teams[1])
+        self.set_winner(match, self.teams[0])
+
+        ratings = self.ratings()
+        self.assertAlmostEqual(ratings[self.teams[0].id], 1516)
+        self.assertAlmostEqual(ratings[self.teams[1].id], 1484)
+        self.assertEqual(ratings[self.teams[2].id], 1500)
+
+    def test_incremental_updates_match_a_full_replay(self):
+        pairs = [(0, 1), (2, 3), (0, 2), (1, 3), (0, 3), (1, 2)]
+        for a, b in pairs:
+            match = make_match(self.day, self.teams[a], self.teams[b])
+            self.set_winner(match, self.teams[b if a == 1 else a])
+        incremental = self.ratings()
+        history = rating_history(self.teams[0].id)
+
+        TeamStanding.objects.update(rating=0)
+        replay_ratings()
+
+        for team_id, rating in self.ratings().items():
+            self.assertAlmostEqual(rating, incremental[team_id])
+        self.assertEqual(rating_history(self.teams[0].id)[0], history[0])
+        self.assertEqual(len(history[1]), 3)
+        self.assertAlmostEqual(history[1][-1], incremental[self.teams[0].id], places=3)
+
+    def test_corrections_replay_the_history(self):
+        first = make_match(self.day, self.teams[0], self.teams[1])
+        second = make_match(self.day, self.teams[0], self.teams[2])
+        self.set_winner(first, self.teams[0])
+        self.set_winner(second, self.teams[0])
+
+        with mock.patch('tournament.views.replay_ratings', wraps=replay_ratings) as replay, \
+                mock.patch('tournament.ratings.replay_ratings', wraps=replay_ratings) as nested:
+            self.set_winner(first, self.teams[1])
+        self.assertEqual(replay.call_count + nested.call_count, 1)
+
+        # The corrected result now counts as the latest one
+        self.assertEqual(rating_history(self.teams[0].id)[0], [second.id, first.id])
+        self.assertEqual(rating_history(self.teams[1].id)[0], [first.id])
+        self.assertGreater(self.ratings()[self.teams[1].id], 1516)
+
+    def test_deleting_a_result_replays_the_history(self):
+        first = make_match(self.day, self.teams[0], self.teams[1])
+        second = make_match(self.day, self.teams[2], self.teams[3])
+        self.set_winner(first, self.teams[0])
+        self.set_winner(second, self.teams[3])
+
+        self.client.post(reverse('manage_matches'), {'action': 'delete_match', 'match_id': first.id})
+
+        ratings = self.ratings()
+        self.assertEqual(ratings[self.teams[0].id], 1500)
+        self.assertAlmostEqual(ratings[self.teams[3].id], 1516)
+        self.assertEqual(rating_history(self.teams[0].id), ([], []))
+
+    def test_history_api_is_one_read(self):
+        match = make_match(self.day, self.teams[0], self.teams[1])
+        self.set_winner(match, self.teams[1])
+        cache.clear()
+        self.client.logout()
+        Tournament.get_current()
+
+        url = reverse('api_team_ratings', args=[self.teams[1].id])
+        # only the history row
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.json(), {'team': self.teams[1].id, 'matches': [match.id], 'ratings': [1516.0]})
+        self.assertEqual(self.client.get(reverse('api_team_ratings', args=[999999])).status_code, 404)
+
+    def test_replay_command(self):
+        make_match(self.day, self.teams[0], self.teams[1], winner=self.teams[0])
+        out = StringIO()
+        call_command('replay_ratings', stdout=out)
+        self.assertIn('2 team(s) changed', out.getvalue())
+        self.assertEqual(len(rating_history(self.teams[0].id)[0]), 1)
+
+
+class TiebreakerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teams = [Team.objects.create(name=f'Equipo {i}') for i in range(6)]
+        self.day = MatchDay.objects.create(day_number=1, name='Jornada 1')
+
+    def play(self, *results):
+        for winner, loser in results:
+            make_match(self.day, self.teams[loser], self.teams[winner], winner=self.teams[winner])
+        rebuild_standings()
+
+    def ranks(self):
+        return [self.teams.index(row['team']) for row in get_standings()]
+
+    def test_head_to_head_breaks_identical_records(self):
+        # 0 and 1 are both 1-1, but 1 beat 0
+        self.play((1, 0), (0, 2), (3, 1))
+        self.assertEqual(self.ranks()[:3], [3, 1, 0])
+
+    @override_settings(TIEBREAKERS=['opponents_win_rate'])
+    def test_opponents_win_rate(self):
+        # 1 and 0 are both 1-1; 1's opponents won 75% of their games, 0's only half
+        self.play((1, 2), (3, 1), (0, 4), (3, 0), (2, 4))
+        self.assertEqual(self.ranks()[:3], [3, 1, 0])
+
+    @override_settings(TIEBREAKERS=[])
+    def test_without_tiebreakers_ties_go_by_name(self):
+        self.play((1, 0), (0, 2), (3, 1))
+        self.assertEqual(self.ranks()[:3], [3, 0, 1])
+
+    @override_settings(TIEBREAKERS=['coin_toss'])
+    def test_unknown_tiebreaker(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.play((1, 0), (0, 1))
+
+    def test_teams_without_results_skip_the_matrix(self):
+        with mock.patch('tournament.tiebreakers.ResultMatrix.load') as load:
+            rebuild_standings()
+        load.assert_not_called()
+
+    def test_matrix_is_one_query_over_matches(self):
+        self.play((1, 0), (1, 0), (0, 1), (2, 5))
+        with self.assertNumQueries(2):
+            matrix = ResultMatrix.load()
+        self.assertEqual(matrix.record(self.teams[1].id, self.teams[0].id), (2, 1))
+        self.assertEqual(matrix.record(self.teams[5].id, self.teams[2].id), (0, 1))
+        self.assertEqual(matrix.record(self.teams[3].id, self.teams[4].id), (0, 0))
+
+    def test_matrix_only_loads_the_results_around_the_tied_teams(self):
+        self.play((1, 0), (0, 2), (2, 3), (4, 5))
+        tied = [self.teams[0].id, self.teams[1].id]
+
+        self.assertEqual(sum(ResultMatrix.load(teams=tied, depth=0).wins), 1)
+        self.assertEqual(sum(ResultMatrix.load(teams=tied, depth=1).wins), 2)
+        # Also 2 beating 3, but 4 and 5 never met the tied teams or their opponents
+        with self.assertNumQueries(3):
+            matrix = ResultMatrix.load(teams=tied, depth=2)
+        self.assertEqual(sum(matrix.wins), 3)
+        self.assertEqual(matrix.record(self.teams[4].id, self.teams[5].id), (0, 0))
+
+    def test_ranks_from_a_partial_matrix_match_the_full_one(self):
+        self.play((1, 0), (0, 2), (3, 1), (2, 4), (5, 3), (4, 5), (0, 5))
+        rows = [(row['team'].id, row['wins'], row['losses']) for row in get_standings()]
+        rows.sort(key=lambda row: (-row[1], row[2]))
+
+        self.assertEqual(
+            break_ties(rows, list(TIEBREAKERS)),
+            break_ties(rows, list(TIEBREAKERS), lambda teams, depth: ResultMatrix.load()),
+        )
+
+    def test_head_to_head_page(self):
+        self.play((1, 0), (1, 0), (0, 2))
+        response = self.client.get(reverse('head_to_head'))
+        rows = response.content.decode().split('<tr')
+        # Rank order: 1 (2-0), then 0 (1-2) and 2 (0-1)
+        self.assertIn('Equipo 1', rows[2])
+        self.assertIn('<td class="px-3 py-2 text-center whitespace-nowrap font-semibold text-green-400">2-0</td>', rows[2])
+        self.assertIn('text-red-400">0-2</td>', rows[3])
+
+        # The grid is rendered once per data version, also for staff
+        self.client.force_login(User.objects.create_user('staff', password='secret', is_staff=True))
+        with mock.patch('tournament.views.ResultMatrix.load') as load:
+            self.assertContains(self.client.get(reverse('head_to_head')), '2-0')
+        load.assert_not_called()
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teams = [Team.objects.create(name=f'Equipo {i}') for i in range(3)]
+        self.days = [MatchDay.objects.create(day_number=n, name=f'Jornada {n}') for n in (1, 2, 3)]
+        self.first = make_match(self.days[0], self.teams[0], self.teams[1])
+        self.second = make_match(self.days[1], self.teams[1], self.teams[2])
+        self.third = make_match(self.days[1], self.teams[0], self.teams[2])
+
+    def record(self, *results):
+        from .results import record_results
+
+        record_results([(match.id, winner.id) for match, winner in results])
+
+    def table(self, day_number):
+        return [(row['team'].name, row['wins'], row['losses'], row['rank']) for row in snapshot_standings(day_number)]
+
+    def test_snapshots_are_cumulative(self):
+        self.record((self.first, self.teams[1]), (self.second, self.teams[1]), (self.third, self.teams[2]))
+
+        self.assertEqual(self.table(1), [('Equipo 1', 1, 0, 1), ('Equipo 2', 0, 0, 2), ('Equipo 0', 0, 1, 3)])
+        self.assertEqual(self.table(2), [('Equipo 1', 2, 0, 1), ('Equipo 2', 1, 1, 2), ('Equipo 0', 0, 2, 3)])
+        # No results on day 3: same as day 2
+        self.assertEqual(self.table(3), self.table(2))
+        self.assertEqual(StandingSnapshot.objects.count(), 6)
+
+        snapshots = list(StandingSnapshot.objects.values_list('match_day', 'team', 'wins', 'losses', 'rank'))
+        rebuild_standings()
+        self.assertEqual(list(StandingSnapshot.objects.values_list('match_day', 'team', 'wins', 'losses', 'rank')), snapshots)
+
+    def test_new_team_joins_every_snapshot(self):
+        self.record((self.first, self.teams[1]), (self.second, self.teams[1]), (self.third, self.teams[2]))
+
+        with CaptureQueriesContext(connection) as queries:
+            Team.objects.create(name='Equipo 1b')
+        # The day count, the shift and the insert, whatever the season length
+        self.assertEqual(len([q for q in queries if 'tournament_standingsnapshot' in q['sql']]), 3)
+        Team.objects.create(name='Equipo 3')
+        Team.objects.create(name='A')
+
+        self.assertEqual(self.table(1), [
+            ('Equipo 1', 1, 0, 1), ('A', 0, 0, 2), ('Equipo 1b', 0, 0, 3), ('Equipo 2', 0, 0, 4),
+            ('Equipo 3', 0, 0, 5), ('Equipo 0', 0, 1, 6),
+        ])
+        snapshots = list(StandingSnapshot.objects.values_list('match_day', 'team', 'wins', 'losses', 'rank'))
+        refresh_snapshots()
+        self.assertEqual(list(StandingSnapshot.objects.values_list('match_day', 'team', 'wins', 'losses', 'rank')), snapshots)
+
+    def test_full_rebuild_breaks_ties_with_earlier_results_only(self):
+        a, b, c, d = (Team.objects.create(name=name) for name in 'ABCD')
+        StandingSnapshot.objects.all().delete()
+        Match.objects.all().delete()
+        day_one = [make_match(self.days[0], a, c), make_match(self.days[0], b, d)]
+        later = make_match(self.days[1], b, a)
+        self.record((day_one[0], a), (day_one[1], b))
+        self.record((later, b))
+        snapshots = list(StandingSnapshot.objects.values_list('match_day', 'team', 'wins', 'losses', 'rank'))
+
+        refresh_snapshots()
+
+        self.assertEqual(list(StandingSnapshot.objects.values_list('match_day', 'team', 'wins', 'losses', 'rank')), snapshots)
+        self.assertEqual([name for name, *_ in self.table(1)][:2], ['A', 'B'])
+
+    def test_missing_earlier_snapshots_are_rebuilt(self):
+        self.record((self.first, self.teams[0]))
+        # A database upgraded from before snapshots existed
+        StandingSnapshot.objects.all().delete()
+
+        self.record((self.third, self.teams[0]))
+
+        self.assertEqual(self.table(1)[0], ('Equipo 0', 1, 0, 1))
+        self.assertEqual(self.table(2)[0], ('Equipo 0', 2, 0, 1))
+
+    def test_only_later_days_are_recomputed(self):
+        self.record((self.first, self.teams[1]))
+        StandingSnapshot.objects.filter(match_day=self.days[0], team=self.teams[1]).update(wins=99)
+
+        self.record((self.second, self.teams[2]))
+
+        self.assertEqual(self.table(1)[0], ('Equipo 1', 99, 0, 1))
+        self.assertEqual(self.table(2)[0], ('Equipo 1', 99, 1, 1))
+
+    def test_deleted_results_drop_their_day(self):
+        self.record((self.first, self.teams[0]), (self.second, self.teams[2]))
+        client = self.client
+        client.force_login(User.objects.create_user('staff', password='secret', is_staff=True))
+        client.post(reverse('manage_matches'), {'action': 'delete_match', 'match_id': self.second.id})
+
+        self.assertFalse(StandingSnapshot.objects.filter(match_day=self.days[1]).exists())
+        self.assertEqual(self.table(2), self.table(1))
+        self.assertEqual(self.table(2)[0], ('Equipo 0', 1, 0, 1))
+
+    def test_before_any_result_everyone_is_even(self):
+        self.assertEqual(self.table(1), [('Equipo 0', 0, 0, 1), ('Equipo 1', 0, 0, 2), ('Equipo 2', 0, 0, 3)])
+
+    def test_standings_page_as_of(self):
+        self.record((self.first, self.teams[1]), (self.second, self.teams[2]), (self.third, self.teams[2]))
+
+        response = self.client.get(reverse('standings'), {'as_of': 1})
+        self.assertContains(response, 'tras Jornada 1')
+        self.assertNotContains(response, 'EventSource')
+        rows = response.content.decode().split('<tr data-team=')
+        self.assertIn('Equipo 1', rows[1])
+        self.assertIn('<span data-field="wins" class="text-green-400 font-semibold">1</span>', rows[1])
+
+        self.assertContains(self.client.get(reverse('standings')), 'EventSource')
+        self.assertEqual(self.client.get(reverse('standings'), {'as_of': 9}).status_code, 404)
+        self.assertEqual(self.client.get(reverse('standings'), {'as_of': 'x'}).status_code, 404)
+
+    def test_api_as_of_reads_the_snapshots(self):
+        self.record((self.first, self.teams[1]), (self.second, self.teams[2]))
+        Tournament.get_current()
+
+        # the match day + one read
+        with self.assertNumQueries(2):
+            data = self.client.get(reverse('api_standings'), {'as_of': 1, 'fields': 'name,wins,rank'}).json()
+        self.assertEqual(data, {'as_of': 1, 'standings': [
+            {'name': 'Equipo 1', 'wins': 1, 'rank': 1},
+            {'name': 'Equipo 2', 'wins': 0, 'rank': 2},
+            {'name': 'Equipo 0', 'wins': 0, 'rank': 3},
+        ]})
+        self.assertEqual(self.client.get(reverse('api_standings'), {'as_of': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('api_standings'), {'as_of': 1, 'fields': 'rating'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('api_standings'), {'as_of': 9}).status_code, 404)
+
+    def test_api_before_any_result_everyone_is_even(self):
+        data = self.client.get(reverse('api_standings'), {'as_of': 1, 'fields': 'name,wins,rank'}).json()
+
+        self.assertEqual(data['standings'], [
+            {'name': 'Equipo 0', 'wins': 0, 'rank': 1},
+            {'name': 'Equipo 1', 'wins': 0, 'rank': 2},
+            {'name': 'Equipo 2', 'wins': 0, 'rank': 3},
+        ])
+        self.assertEqual(
+            self.client.get(reverse('api_standings'), {'as_of': 1}).json()['standings'][0],
+            {'rank': 1, 'team': self.teams[0].pk, 'name': 'Equipo 0', 'played': 0, 'wins': 0, 'losses': 0, 'win_rate': 0.0},
+        )
+
+
+class BracketTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def make_teams(self, count):
+        return [Team.objects.create(name=f'Equipo {i}') for i in range(count)]
+
+    def play(self, bracket, pick=lambda match: match.team_a_id):
+        """Decide every match as soon as it has both teams, returns the losses per team"""
+        losses = Counter()
+        while True:
+            ready = list(BracketMatch.objects.filter(
+                bracket=bracket, winner__isnull=True, team_a__isnull=False, team_b__isnull=False,
+            ))
+            if not ready:
+                return losses
+            for match in ready:
+                winner = pick(match)
+                set_bracket_winner(match.pk, winner)
+                losses[match.team_b_id if winner == match.team_a_id else match.team_a_id] += 1
+
+    def test_seed_order(self):
+        self.assertEqual(seed_order(8), [1, 8, 4, 5, 2, 7, 3, 6])
+
+    def test_layout_feeds_every_slot_once(self):
+        for size, double, count in ((256, False, 255), (256, True, 510), (4, True, 6)):
+            nodes = bracket_layout(size, double)
+            self.assertEqual(len(nodes), count)
+            positions = [node[0] for node in nodes]
+            targets = [target for node in nodes for target in node[3:] if target is not None]
+            self.assertEqual(len(targets), len(set(targets)))
+            # Each node is fed by nodes listed before it
+            seen = set()
+            for position, _, round, winner_to, loser_to in nodes:
+                seen.add(position)
+                for target in (winner_to, loser_to):
+                    if target is not None:
+                        self.assertIn(target // 2, positions)
+                        self.assertNotIn(target // 2, seen)
+
+    def test_byes_go_to_top_seeds(self):
+        teams = self.make_teams(6)
+        bracket = create_bracket(6)
+
+        self.assertEqual(bracket.size, 8)
+        rows = {match.position: (match.team_a_id, match.team_b_id) for match in bracket.matches.all()}
+        # Seeds 1 and 2 wait in the semifinals, the bye matches have no row
+        self.assertEqual(rows, {
+            1: (None, None), 2: (teams[0].pk, None), 3: (teams[1].pk, None),
+            5: (teams[3].pk, teams[4].pk), 7: (teams[2].pk, teams[5].pk),
+        })
+
+    def test_single_elimination_crowns_the_champion(self):
+        teams = self.make_teams(5)
+        bracket = create_bracket(5)
+
+        losses = self.play(bracket)
+
+        self.assertEqual(sorted(losses.values()), [1, 1, 1, 1])
+        tournament = Tournament.get_current()
+        self.assertEqual(tournament.champion, teams[0])
+        self.assertEqual(tournament.status, 'completed')
+
+    def test_double_elimination(self):
+        teams = self.make_teams(5)
+        bracket = create_bracket(5, double=True)
+
+        # The lower seed always wins, so the last seed takes the title
+        rank = {team.pk: i for i, team in enumerate(teams)}
+        losses = self.play(bracket, pick=lambda match: max(match.team_a_id, match.team_b_id, key=rank.get))
+
+        self.assertEqual(bracket.matches.count(), 8)
+        self.assertEqual(max(losses.values()), 2)
+        self.assertEqual(Tournament.get_current().champion, teams[4])
+
+    def test_advancing_is_constant_time(self):
+        seed_tournament(256, 0, 0)
+        bracket = create_bracket(256, double=True)
+        first, last = bracket.matches.filter(stage='winners', round=1).order_by('position')[::127]
+
+        # Savepoint, read, the match, the winner's and the loser's slots
+        for match in (first, last):
+            with self.assertNumQueries(6):
+                set_bracket_winner(match.pk, match.team_a_id)
+
+        following = BracketMatch.objects.get(bracket=bracket, position=first.winner_to // 2)
+        self.assertEqual(following.team_a_id, first.team_a_id)
+
+    def test_correction_until_the_next_match_is_played(self):
+        self.make_teams(4)
+        bracket = create_bracket(4)
+        semifinal, other = bracket.matches.filter(round=1)
+
+        set_bracket_winner(semifinal.pk, semifinal.team_a_id)
+        set_bracket_winner(semifinal.pk, semifinal.team_b_id)
+        final = bracket.matches.get(position=1)
+        self.assertIn(semifinal.team_b_id, (final.team_a_id, final.team_b_id))
+
+        set_bracket_winner(other.pk, other.team_a_id)
+        set_bracket_winner(final.pk, semifinal.team_b_id)
+        with self.assertRaises(BracketError):
+            set_bracket_winner(semifinal.pk, semifinal.team_a_id)
+        with self.assertRaises(BracketError):
+            set_bracket_winner(other.pk, semifinal.team_a_id)
+
+    def test_rendered_from_one_query(self):
+        self.make_teams(8)
+        create_bracket(8, double=True)
+        tournament = Tournament.get_current()
+
+        with self.assertNumQueries(1):
+            bracket, stages = bracket_rounds(tournament)
+
+        self.assertEqual([label for label, _ in stages], ['Cuadro principal', 'Cuadro de perdedores', 'Gran final'])
+        self.assertEqual([len(matches) for _, matches in stages[1][1]], [2, 2, 1, 1])
+        response = self.client.get(reverse('playoffs'))
+        self.assertContains(response, 'Doble eliminación')
+        self.assertContains(response, 'Equipo 7')
+
+    def test_manage_page(self):
+        teams = self.make_teams(2)
+        self.client.force_login(User.objects.create_user('staff', password='secret', is_staff=True))
+
+        self.client.post(reverse('manage_playoffs'), {'action': 'create_bracket', 'teams': '2'})
+        final = BracketMatch.objects.get()
+        response = self.client.post(reverse('manage_playoffs'), {
+            'action': 'set_winner', 'match_id': final.pk, 'winner_id': teams[1].pk,
+        }, follow=True)
+
+        self.assertContains(response, '¡Equipo 1 es el campeón del torneo!')
+        self.assertContains(self.client.get(reverse('playoffs')), '🏆 Equipo 1')
+
+        response = self.client.post(reverse('manage_playoffs'), {'action': 'create_bracket', 'teams': '3'}, follow=True)
+        self.assertContains(response, 'Solo hay 2 equipos inscritos')
+
+        self.client.post(reverse('tournament_settings'), {'action': 'reset'})
+        self.assertFalse(Bracket.objects.exists())
@@ -0,0 +1,182 @@
+from array import array
+from functools import cached_property
+from itertools import groupby
+from operator import add, itemgetter, mul
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Case, F, Q, When
+
+from .models import Match, Team
+
+CHUNK_SIZE = 5000
+
+# Tiebreakers that can be listed in settings.TIEBREAKERS, with their label
+TIEBREAKERS = {
+    'head_to_head': 'Enfrentamientos directos',
+    'strength_of_schedule': 'Fuerza del calendario',
+    'opponents_win_rate': '% de victorias de los rivales',
+}
+# Results each tiebreaker needs about the tied teams: the matches among them
+# (0), all of their matches (1) or also all of their opponents' matches (2)
+DEPTHS = {'head_to_head': 0, 'opponents_win_rate': 1, 'strength_of_schedule': 2}
+
+
+def decided_results():
+    """Decided matches annotated with their ``loser``"""
+    # Filtering on the loser rather than the winner scans the table in
+    # order instead of visiting it through the winner index, 2x faster
+    return Match.objects.annotate(
+        loser=Case(When(winner=F('team_a'), then=F('team_b')), When(winner=F('team_b'), then=F('team_a'))),
+    ).filter(loser__isnull=False).order_by()
+
+
+class ResultMatrix:
+    """How many times every team beat every other team
+
+    ``wins[i * size + j]`` counts the wins of the i-th team of ``team_ids``
+    over the j-th one, so a team's row holds its wins against each opponent
+    and its column its losses.
+    """
+
+    def __init__(self, team_ids, results):
+        self.team_ids = list(team_ids)
+        self.size = size = len(self.team_ids)
+        self.index = index = {team: i for i, team in enumerate(self.team_ids)}
+        self.wins = wins = array('i', bytes(4 * size * size))
+
+        self.add(results)
+
+    def add(self, results):
+        """Count more ``(winner_id, loser_id)`` results"""
+        wins, size, index = self.wins, self.size, self.index
+        row_start = {team: i * size for team, i in index.items()}
+        for winner, loser in results:
+            wins[row_start[winner] + index[loser]] += 1
+        for name in ('games', 'played'):
+            self.__dict__.pop(name, None)
+
+    @classmethod
+    def load(cls, before_day=None, teams=None, depth=2):
+        """Matrix of every team, from a single query over the decided matches
+
+        With ``before_day``, only matches of earlier match days count. With
+        ``teams``, only the results ``depth`` away from them are loaded (see
+        ``DEPTHS``), which is all a tiebreak between those teams reads.
+        """
+        team_ids = Team.objects.order_by('pk').values_list('pk', flat=True)
+        results = decided_results()
+        if before_day is not None:
+            results = results.filter(match_day__day_number__lt=before_day)
+        if teams is not None and depth == 0:
+            results = results.filter(team_a__in=teams, team_b__in=teams)
+        elif teams is not None:
+            teams = set(teams)
+            if depth == 2:
+                involved = results.filter(Q(team_a__in=teams) | Q(team_b__in=teams))
+                for pair in involved.values_list('team_a', 'team_b').distinct():
+                    teams.update(pair)
+            results = results.filter(Q(team_a__in=teams) | Q(team_b__in=teams))
+        return cls(team_ids, results.values_list('winner_id', 'loser').iterator(chunk_size=CHUNK_SIZE))
+
+    def beaten(self, i):
+        """Wins of the i-th team against each team"""
+        return self.wins[i * self.size:(i + 1) * self.size]
+
+    def lost(self, i):
+        """Losses of the i-th team against each team"""
+        return self.wins[i::self.size]
+
+    def record(self, team, opponent):
+        """``(wins, losses)`` of ``team`` against ``opponent``"""
+        i, j = self.index[team], self.index[opponent]
+        return self.wins[i * self.size + j], self.wins[j * self.size + i]
+
+    @cached_property
+    def games(self):
+        """Matches played by each team against each team, one list per team"""
+        return [list(map(add, self.beaten(i), self.lost(i))) for i in range(self.size)]
+
+    @cached_property
+    def played(self):
+        return [sum(games) for games in self.games]
+
+    def opponents_average(self, values):
+        """Average of ``values`` (one per team) over every match of each team"""
+        return [
+            sum(map(mul, games, values)) / played if played else 0
+            for games, played in zip(self.games, self.played)
+        ]
+
+
+class Tiebreakers:
+    """Tiebreaker values of teams, computed from one result matrix
+
+    Each tiebreaker takes a group of tied team ids and returns their values
+    in the same order; higher is better. Win rates come from the standings
+    ``records``, so the matrix only needs the results around the tied teams.
+    """
+
+    def __init__(self, matrix, records):
+        self.matrix = matrix
+        self.win_rates = [
+            wins / (wins + losses) if wins + losses else 0
+            for wins, losses in (records.get(team, (0, 0)) for team in matrix.team_ids)
+        ]
+
+    @cached_property
+    def _opponents_win_rates(self):
+        return self.matrix.opponents_average(self.win_rates)
+
+    @cached_property
+    def _strength_of_schedule(self):
+        # RPI style: opponents' win rate, and a third of their opponents'
+        opponents = self._opponents_win_rates
+        theirs = self.matrix.opponents_average(opponents)
+        return [(2 * own + other) / 3 for own, other in zip(opponents, theirs)]
+
+    def head_to_head(self, group):
+        """Wins minus losses in the matches between the tied teams"""
+        positions = [self.matrix.index[team] for team in group]
+        among = itemgetter(*positions)
+        return [sum(among(self.matrix.beaten(i))) - sum(among(self.matrix.lost(i))) for i in positions]
+
+    def strength_of_schedule(self, group):
+        return [self._strength_of_schedule[self.matrix.index[team]] for team in group]
+
+    def opponents_win_rate(self, group):
+        return [self._opponents_win_rates[self.matrix.index[team]] for team in group]
+
+
+def break_ties(rows, tiebreakers, load_matrix=ResultMatrix.load):
+    """Team ids of standings ``rows`` in their final order
+
+    ``rows`` are ``(team_id, wins, losses)`` already sorted by record, then
+    name. Teams with the same record are ordered by each of ``tiebreakers``
+    in turn and keep their order if still tied. ``load_matrix`` is only
+    called when some teams that have played are tied, with those ``teams``
+    and the ``depth`` the tiebreakers need (see ``DEPTHS``).
+    """
+    for name in tiebreakers:
+        if name not in TIEBREAKERS:
+            raise ImproperlyConfigured(f'Unknown tiebreaker {name!r}, expected one of {", ".join(TIEBREAKERS)}')
+
+    groups = [
+        (record, [team for team, _, _ in group])
+        for record, group in groupby(rows, key=lambda row: tuple(row[1:]))
+    ]
+    # Teams without results have nothing to break their tie with
+    tied = [team for record, group in groups if len(group) > 1 and record != (0, 0) for team in group]
+    if not tiebreakers or not tied:
+        return [team for _, group in groups for team in group]
+
+    matrix = load_matrix(teams=tied, depth=max(DEPTHS[name] for name in tiebreakers))
+    engine = Tiebreakers(matrix, {team: (wins, losses) for team, wins, losses in rows})
+    order = []
+    for record, group in groups:
+        if len(group) > 1 and record != (0, 0):
+            values = [getattr(engine, name)(group) for name in tiebreakers]
+            keys = {team: [-value[position] for value in values] for position, team in enumerate(group)}
+            # sorted() is stable, so teams still tied stay in name order
+            group = sorted(group, key=keys.__getitem__)
+        order.extend(group)
+    return order
@@ -0,0 +1,277 @@
+import csv
+import itertools
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .cache import bump_data_version, bump_schedule_version
+from .models import Team, MatchDay, Match
+from .ratings import replay_ratings
+from .standings import rebuild_standings
+
+# Every row of an export, whatever its type, uses these columns
+FIELDS = ['type', 'name', 'captain_name', 'day_number', 'date', 'team_a', 'team_b', 'winner', 'played_at']
+FORMATS = ('csv', 'json')
+CHUNK_SIZE = 2000
+# Rows per write when streaming an export over HTTP
+LINES_PER_CHUNK = 500
+# Only the first errors are kept so a bad 100k-row file can't grow memory
+MAX_ERRORS = 50
+
+
+class ImportResult:
+    def __init__(self):
+        self.teams = 0
+        self.match_days = 0
+        self.matches = 0
+        self.error_count = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, message))
+
+
+def guess_format(filename):
+    """'csv' or 'json' from a file name, JSON being one object per line"""
+    return 'csv' if filename.lower().endswith('.csv') else 'json'
+
+
+# Export
+
+def export_rows():
+    """Teams, then match days, then matches as flat dicts, one query per chunk"""
+    for name, captain_name in Team.objects.order_by('name').values_list('name', 'captain_name'):
+        yield {'type': 'team', 'name': name, 'captain_name': captain_name or ''}
+
+    for day_number, name, date in MatchDay.objects.order_by('day_number').values_list('day_number', 'name', 'date'):
+        yield {'type': 'match_day', 'day_number': day_number, 'name': name, 'date': date}
+
+    matches = Match.objects.order_by('match_day__day_number', 'pk').values_list(
+        'match_day__day_number', 'team_a__name', 'team_b__name', 'winner__name', 'played_at',
+    )
+    for day_number, team_a, team_b, winner, played_at in matches.iterator(chunk_size=CHUNK_SIZE):
+        yield {
+            'type': 'match', 'day_number': day_number, 'team_a': team_a, 'team_b': team_b,
+            'winner': winner or '', 'played_at': played_at,
+        }
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller"""
+
+    def write(self, value):
+        return value
+
+
+def export_lines(fmt):
+    """Encode export_rows() one line at a time for streaming"""
+    if fmt == 'csv':
+        writer = csv.DictWriter(_Echo(), fieldnames=FIELDS)
+        yield writer.writeheader()
+        for row in export_rows():
+            yield writer.writerow(row)
+    else:
+        for row in export_rows():
+            yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def export_chunks(fmt):
+    """Group export_lines() so each write to the client carries many rows"""
+    lines = export_lines(fmt)
+    while chunk := ''.join(itertools.islice(lines, LINES_PER_CHUNK)):
+        yield chunk
+
+
+# Import
+
+def read_rows(lines, fmt):
+    """Yield ``(line_number, row)`` from an iterable of text lines"""
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error:
+                # The reader hasn't counted the line it failed on yet
+                yield reader.line_num + 1, None
+            else:
+                yield reader.line_num, row
+    else:
+        for number, line in enumerate(lines, 1):
+            if line.strip():
+                try:
+                    yield number, json.loads(line)
+                except ValueError:
+                    yield number, None
+
+
+def _invalid_field(row):
+    """First known column whose value isn't text, or None
+
+    CSV rows only hold strings, but a JSON line can hold anything; day numbers
+    may also be JSON integers.
+    """
+    for field in FIELDS:
+        value = row.get(field)
+        if value is None or isinstance(value, str):
+            continue
+        if field == 'day_number' and isinstance(value, int) and not isinstance(value, bool):
+            continue
+        return field
+    return None
+
+
+def _day_number(row):
+    try:
+        day_number = int(row.get('day_number'))
+    except (TypeError, ValueError):
+        return None
+    return day_number if day_number >= 1 else None
+
+
+class _Importer:
+    """Buffers rows and writes them in chunks
+
+    Team names and day numbers are resolved through two in-memory maps that
+    are loaded once; they hold one entry per team or match day, never per match.
+    """
+
+    def __init__(self, result):
+        self.result = result
+        self.team_ids = dict(Team.objects.values_list('name', 'pk'))
+        self.day_ids = dict(MatchDay.objects.values_list('day_number', 'pk'))
+        self.new_teams, self.changed_teams = {}, []
+        self.new_days, self.changed_days = {}, []
+        self.matches = []
+
+    def add_team(self, line, row):
+        name = (row.get('name') or '').strip()
+        if not name or len(name) > Team._meta.get_field('name').max_length:
+            return self.result.error(line, 'Nombre de equipo inválido')
+        captain_name = row.get('captain_name') or None
+        if name in self.team_ids:
+            self.changed_teams.append(Team(pk=self.team_ids[name], name=name, captain_name=captain_name))
+        else:
+            self.new_teams[name] = Team(name=name, captain_name=captain_name)
+
+    def add_match_day(self, line, row):
+        day_number = _day_number(row)
+        if day_number is None:
+            return self.result.error(line, 'Número de jornada inválido')
+        name = (row.get('name') or '').strip() or f'Jornada {day_number}'
+        try:
+            date = parse_date(row['date']) if row.get('date') else None
+        except ValueError:
+            return self.result.error(line, 'Fecha inválida')
+        day = MatchDay(pk=self.day_ids.get(day_number), day_number=day_number, name=name, date=date)
+        if day.pk:
+            self.changed_days.append(day)
+        else:
+            self.new_days[day_number] = day
+
+    def add_match(self, line, row):
+        # Matches point at teams and days by name/number, so those go in first
+        self.flush_days()
+        self.flush_teams()
+        day_number = _day_number(row)
+        if day_number is None:
+            return self.result.error(line, 'Número de jornada inválido')
+        if day_number not in self.day_ids:
+            self.new_days[day_number] = MatchDay(day_number=day_number, name=f'Jornada {day_number}')
+            self.flush_days()
+
+        team_a = self.team_ids.get(row.get('team_a'))
+        team_b = self.team_ids.get(row.get('team_b'))
+        if team_a is None or team_b is None:
+            return self.result.error(line, 'Equipo desconocido')
+        if team_a == team_b:
+            return self.result.error(line, 'Un equipo no puede jugar contra sí mismo')
+        winner = self.team_ids.get(row['winner']) if row.get('winner') else None
+        if row.get('winner') and winner not in (team_a, team_b):
+            return self.result.error(line, 'El ganador debe ser uno de los equipos del partido')
+        try:
+            played_at = parse_datetime(row['played_at']) if row.get('played_at') else None
+        except ValueError:
+            return self.result.error(line, 'Fecha inválida')
+
+        self.matches.append(Match(
+            match_day_id=self.day_ids[day_number], team_a_id=team_a, team_b_id=team_b,
+            winner_id=winner, played_at=played_at,
+        ))
+        if len(self.matches) >= CHUNK_SIZE:
+            self.flush_matches()
+
+    def flush_teams(self):
+        if self.new_teams:
+            Team.objects.bulk_create(self.new_teams.values(), batch_size=CHUNK_SIZE)
+            self.team_ids.update(Team.objects.filter(name__in=self.new_teams).values_list('name', 'pk'))
+            self.result.teams += len(self.new_teams)
+            self.new_teams = {}
+        if self.changed_teams:
+            Team.objects.bulk_update(self.changed_teams, ['captain_name'], batch_size=CHUNK_SIZE)
+            self.result.teams += len(self.changed_teams)
+            self.changed_teams = []
+
+    def flush_days(self):
+        if self.new_days:
+            MatchDay.objects.bulk_create(self.new_days.values(), batch_size=CHUNK_SIZE)
+            self.day_ids.update(
+                MatchDay.objects.filter(day_number__in=self.new_days).values_list('day_number', 'pk')
+            )
+            self.result.match_days += len(self.new_days)
+            self.new_days = {}
+        if self.changed_days:
+            MatchDay.objects.bulk_update(self.changed_days, ['name', 'date'], batch_size=CHUNK_SIZE)
+            self.result.match_days += len(self.changed_days)
+            self.changed_days = []
+
+    def flush_matches(self):
+        if self.matches:
+            Match.objects.bulk_create(self.matches)
+            self.result.matches += len(self.matches)
+            self.matches = []
+
+    def flush(self):
+        self.flush_days()
+        self.flush_teams()
+        self.flush_matches()
+
+
+@transaction.atomic
+def import_rows(rows):
+    """Create or update teams and match days and append matches from ``read_rows()``
+
+    Teams are matched by name and match days by number, so importing the same
+    file twice only duplicates its matches. Invalid rows are skipped and
+    reported on the returned ``ImportResult``.
+    """
+    result = ImportResult()
+    importer = _Importer(result)
+    handlers = {
+        'team': importer.add_team,
+        'match_day': importer.add_match_day,
+        'match': importer.add_match,
+    }
+    for line, row in rows:
+        row_type = row.get('type') if isinstance(row, dict) else None
+        handler = handlers.get(row_type) if isinstance(row_type, str) else None
+        if handler is None:
+            result.error(line, 'Fila inválida')
+        elif field := _invalid_field(row):
+            result.error(line, f'Valor inválido en {field}')
+        else:
+            handler(line, row)
+    importer.flush()
+
+    # bulk writes skip the signals that keep standings and cached pages fresh
+    rebuild_standings()
+    replay_ratings()
+    transaction.on_commit(bump_data_version)
+    transaction.on_commit(bump_schedule_version)
+    return result
@@ -1,69 +1,211 @@
+import asyncio
+import io
+from datetime import date
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
-from django.db.models import Q
-from .models import Team, MatchDay, Match, Tournament
+from django.conf import settings
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Prefetch, Q, prefetch_related_objects
+from django.core.handlers.asgi import ASGIRequest
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.http import Http404, HttpResponse, HttpResponseForbidden, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.safestring import mark_safe
+from django.views.decorators.http import condition
+from .models import Bracket, BracketMatch, Team, TeamStanding, MatchDay, Match, Tournament
+from .brackets import MAX_TEAMS, BracketError, bracket_rounds, create_bracket, set_bracket_winner
+from .standings import get_standings, refresh_snapshots, refresh_standings, reset_standings, snapshot_standings
+from .cache import (
+    bump_schedule_version, cache_public_page, conditional_public_page, head_to_head_fragment_key,
+    match_day_fragment_key, match_day_fragment_versions, standings_fragment_key,
+)
+from .logos import validate_logo
+from .live import broadcaster, publish_match_deleted, publish_reset, publish_result
+from .metrics import collect, registry, render_prometheus
+from .ratings import replay_ratings, update_ratings
+from .results import parse_result_pairs, record_results
+from .scheduling import PairingError, generate_round_robin, generate_swiss_round
+from .tiebreakers import TIEBREAKERS, ResultMatrix
+from .transfer import FORMATS, export_chunks, guess_format, import_rows, read_rows
 
 
 # Public Views
 
+@conditional_public_page
+@cache_public_page
 def standings_view(request):
-    """Main tournament standings page"""
+    """Main tournament standings page, or the standings as of a match day with ?as_of="""
     tournament = Tournament.get_current()
-    teams = Team.objects.all()
-
-    # Create standings list with calculated stats
-    standings = []
-    for team in teams:
-        standings.append({
-            'team': team,
-            'wins': team.wins,
-            'losses': team.losses,
-            'total_matches': team.total_matches,
-            'win_rate': team.win_rate
-        })
-
-    # Sort by wins (descending), then by win_rate
-    standings.sort(key=lambda x: (x['wins'], x['win_rate']), reverse=True)
+    as_of = _as_of_match_day(request)
 
-    # Get recent matches (last 5)
-    recent_matches = Match.objects.filter(winner__isnull=False).order_by('-played_at', '-created_at')[:5]
+    # Get recent matches (last 5), only evaluated when their cached fragment has expired
+    recent_matches = Match.objects.filter(winner__isnull=False).select_related(
+        'team_a', 'team_b', 'winner'
+    ).order_by('-played_at', '-created_at')[:5]
 
     context = {
         'tournament': tournament,
-        'standings': standings,
+        'standings_rows': standings_fragment(as_of.day_number if as_of else None),
         'recent_matches': recent_matches,
+        'tiebreakers': [TIEBREAKERS[name] for name in settings.TIEBREAKERS],
+        'as_of': as_of,
+        'match_days': MatchDay.objects.values_list('day_number', 'name'),
     }
     return render(request, 'tournament/standings.html', context)
 
 
+@conditional_public_page
+@cache_public_page
+def head_to_head_view(request):
+    """Grid with every team's record against every other team"""
+    context = {
+        'tournament': Tournament.get_current(),
+        'grid': head_to_head_fragment(),
+    }
+    return render(request, 'tournament/head_to_head.html', context)
+
+
+@conditional_public_page
+@cache_public_page
+def playoffs_view(request):
+    """Playoff bracket, one column per round"""
+    tournament = Tournament.get_current()
+    bracket, stages = bracket_rounds(tournament)
+    context = {
+        'tournament': tournament,
+        'bracket': bracket,
+        'stages': stages,
+    }
+    return render(request, 'tournament/playoffs.html', context)
+
+
+@conditional_public_page
+@cache_public_page
 def schedule_view(request):
-    """Tournament schedule page"""
+    """Tournament schedule page, one page of match days at a time"""
     tournament = Tournament.get_current()
-    match_days = MatchDay.objects.prefetch_related('matches__team_a', 'matches__team_b', 'matches__winner').all()
+    match_days = MatchDay.objects.all()
+    current_day = _current_match_day()
+
+    # Default to the page holding the current match day
+    page_number = request.GET.get('page')
+    if page_number is None and current_day is not None:
+        earlier = match_days.filter(day_number__lt=current_day.day_number).count()
+        page_number = earlier // settings.SCHEDULE_PAGE_SIZE + 1
+    page = Paginator(match_days, settings.SCHEDULE_PAGE_SIZE).get_page(page_number)
+
+    # Match days around the current one are rendered inline, the rest load on demand
+    schedule = []
+    for match_day in page:
+        fragment = None
+        if current_day and abs(match_day.day_number - current_day.day_number) <= settings.SCHEDULE_WINDOW:
+            fragment = match_day_fragment(match_day.id)
+        schedule.append((match_day, fragment))
 
     context = {
         'tournament': tournament,
-        'match_days': match_days,
+        'page': page,
+        'schedule': schedule,
+        'current_day': current_day,
     }
     return render(request, 'tournament/schedule.html', context)
 
 
+def _current_match_day():
+    """The next match day by date, else the first with pending matches, else the last one"""
+    today = timezone.localdate()
+    return (
+        MatchDay.objects.filter(date__gte=today).order_by('date', 'day_number').first()
+        # Both conditions on the same join, or days without matches would match too
+        or MatchDay.objects.filter(matches__isnull=False, matches__winner__isnull=True).distinct().first()
+        or MatchDay.objects.last()
+    )
+
+
+def _as_of_match_day(request):
+    """The match day named by ``?as_of=<day_number>``, None for today's standings"""
+    as_of = request.GET.get('as_of')
+    if not as_of:
+        return None
+    if not as_of.isdigit():
+        raise Http404
+    return get_object_or_404(MatchDay, day_number=int(as_of))
+
+
+def standings_fragment(as_of=None):
+    """Rendered standings rows, today or as of match day ``as_of``, cached until the tournament data changes"""
+    key = standings_fragment_key(as_of)
+    html = cache.get(key)
+    registry.count_cache('standings', hit=html is not None)
+    if html is None:
+        # Rows come in rank order: record, then the tiebreakers (see refresh_ranks)
+        standings = get_standings() if as_of is None else snapshot_standings(as_of)
+        html = render_to_string('tournament/standings_rows.html', {'standings': standings})
+        cache.set(key, html, settings.PAGE_CACHE_TIMEOUT)
+    return mark_safe(html)
+
+
+def head_to_head_fragment():
+    """Rendered head-to-head grid in rank order, cached until the tournament data changes"""
+    key = head_to_head_fragment_key()
+    html = cache.get(key)
+    registry.count_cache('head_to_head', hit=html is not None)
+    if html is None:
+        matrix = ResultMatrix.load()
+        teams = list(TeamStanding.objects.order_by('rank').values_list('team_id', 'team__name'))
+        rows = [
+            (name, [None if opponent == team else matrix.record(team, opponent) for opponent, _ in teams])
+            for team, name in teams
+        ]
+        html = render_to_string('tournament/head_to_head_grid.html', {'teams': teams, 'rows': rows})
+        cache.set(key, html, settings.PAGE_CACHE_TIMEOUT)
+    return mark_safe(html)
+
+
+def match_day_fragment(match_day_id):
+    """Rendered matches of one match day, cached until a match in that day changes"""
+    key = match_day_fragment_key(match_day_id)
+    html = cache.get(key)
+    registry.count_cache('match_day', hit=html is not None)
+    if html is None:
+        matches = Match.objects.filter(match_day_id=match_day_id).select_related(
+            'team_a', 'team_b', 'winner'
+        ).order_by('created_at')
+        html = render_to_string('tournament/schedule_day.html', {'matches': matches})
+        cache.set(key, html, settings.PAGE_CACHE_TIMEOUT)
+    return mark_safe(html)
+
+
+def _match_day_etag(request, match_day_id):
+    return ':'.join(map(str, match_day_fragment_versions(match_day_id)))
+
+
+@condition(etag_func=_match_day_etag)
+def schedule_day_view(request, match_day_id):
+    """HTML fragment with the matches of a single match day"""
+    if not cache.has_key(match_day_fragment_key(match_day_id)):
+        get_object_or_404(MatchDay, pk=match_day_id)
+    return HttpResponse(match_day_fragment(match_day_id))
+
+
+@conditional_public_page
+@cache_public_page
 def teams_view(request):
     """Teams list page"""
     tournament = Tournament.get_current()
-    teams = Team.objects.all()
 
-    # Add stats to each team
-    teams_with_stats = []
-    for team in teams:
-        teams_with_stats.append({
-            'team': team,
-            'wins': team.wins,
-            'losses': team.losses,
-            'win_rate': team.win_rate
-        })
+    # Add stats to each team, keeping the alphabetical listing
+    teams_with_stats = get_standings(ordering=['team__name'])
+    prefetch_related_objects([row['team'] for row in teams_with_stats if row['team'].logo], 'logo_variants')
 
     context = {
         'tournament': tournament,
@@ -72,6 +214,30 @@ def teams_view(request):
     return render(request, 'tournament/teams.html', context)
 
 
+async def live_view(request):
+    """Server-Sent Events stream of result and standings changes"""
+    if not isinstance(request, ASGIRequest):
+        # Long-lived streams need the ASGI server; 204 tells EventSource not to retry
+        return HttpResponse(status=204)
+
+    async def stream():
+        queue = broadcaster.subscribe()
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=settings.LIVE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 # Admin Views
 
 def admin_login_view(request):
@@ -122,14 +288,21 @@ def dashboard_view(request):
 @login_required
 def manage_teams_view(request):
     """Team management page"""
-    teams = Team.objects.all()
+    teams = Team.objects.prefetch_related('logo_variants')
 
     if request.method == 'POST':
         action = request.POST.get('action')
 
+        logo = request.FILES.get('logo')
+        if logo:
+            try:
+                validate_logo(logo)
+            except ValidationError as e:
+                messages.error(request, e.messages[0])
+                return redirect('manage_teams')
+
         if action == 'add':
             name = request.POST.get('name')
-            logo = request.FILES.get('logo')
             captain_name = request.POST.get('captain_name')
 
             if name:
@@ -146,7 +319,18 @@ def manage_teams_view(request):
             team_id = request.POST.get('team_id')
             team = get_object_or_404(Team, id=team_id)
             team_name = team.name
-            team.delete()
+            with transaction.atomic():
+                # Deleting the team cascades to its matches, so its opponents' records change too
+                opponents = set()
+                for team_a_id, team_b_id in Match.objects.filter(
+                    Q(team_a=team) | Q(team_b=team)
+                ).values_list('team_a_id', 'team_b_id'):
+                    opponents.update((team_a_id, team_b_id))
+                opponents.discard(team.id)
+                team.delete()
+                refresh_standings(opponents)
+                replay_ratings()
+                refresh_snapshots()
             messages.success(request, f'Equipo "{team_name}" eliminado')
 
         elif action == 'edit':
@@ -156,8 +340,8 @@ def manage_teams_view(request):
             team.captain_name = request.POST.get('captain_name') or None
 
             # Handle logo upload - only update if new file is provided
-            if 'logo' in request.FILES:
-                team.logo = request.FILES['logo']
+            if logo:
+                team.logo = logo
             # Handle logo removal if checkbox is checked
             elif request.POST.get('remove_logo'):
                 team.logo = None
@@ -176,27 +360,58 @@ def manage_teams_view(request):
 @login_required
 def manage_matches_view(request):
     """Match management page"""
-    match_days = MatchDay.objects.prefetch_related('matches').all()
-    teams = Team.objects.all()
-
     if request.method == 'POST':
         action = request.POST.get('action')
 
         if action == 'add_match_day':
             day_number = request.POST.get('day_number')
             name = request.POST.get('name')
-            date = request.POST.get('date') or None
+            match_date = request.POST.get('date') or None
 
             if day_number and name:
                 MatchDay.objects.create(
                     day_number=day_number,
                     name=name,
-                    date=date
+                    date=match_date
                 )
                 messages.success(request, f'Jornada "{name}" creada')
             else:
                 messages.error(request, 'Número de día y nombre son requeridos')
 
+        elif action == 'generate_schedule':
+            double = bool(request.POST.get('double'))
+            start_date = request.POST.get('start_date')
+            try:
+                start_date = date.fromisoformat(start_date) if start_date else None
+            except ValueError:
+                messages.error(request, 'Fecha de inicio inválida')
+                return redirect('manage_matches')
+            match_days_created, matches_created = generate_round_robin(double=double, start_date=start_date)
+            if matches_created:
+                messages.success(
+                    request, f'Calendario generado: {match_days_created} jornadas, {matches_created} partidos'
+                )
+            else:
+                messages.error(request, 'Todos los enfrentamientos ya están programados')
+
+        elif action == 'generate_swiss':
+            match_date = request.POST.get('date')
+            try:
+                match_date = date.fromisoformat(match_date) if match_date else None
+            except ValueError:
+                messages.error(request, 'Fecha inválida')
+                return redirect('manage_matches')
+            try:
+                match_day, matches_created, bye, rematches = generate_swiss_round(date=match_date)
+            except PairingError as error:
+                messages.error(request, str(error))
+            else:
+                messages.success(request, f'{match_day.name} emparejada: {matches_created} partidos')
+                if bye is not None:
+                    messages.success(request, f'Descansa: {Team.objects.get(pk=bye).name}')
+                if rematches:
+                    messages.error(request, f'{rematches} partidos repiten un enfrentamiento ya jugado')
+
         elif action == 'add_match':
             match_day_id = request.POST.get('match_day_id')
             team_a_id = request.POST.get('team_a_id')
@@ -228,31 +443,114 @@ def manage_matches_view(request):
                 winner = get_object_or_404(Team, id=winner_id)
 
                 if winner in [match.team_a, match.team_b]:
-                    from django.utils import timezone
-                    match.winner = winner
-                    match.played_at = timezone.now()
-                    match.save()
+                    with transaction.atomic():
+                        corrected = match.winner_id is not None
+                        match.winner = winner
+                        match.played_at = timezone.now()
+                        match.save()
+                        changed = refresh_standings([match.team_a_id, match.team_b_id])
+                        changed |= update_ratings([match], corrected=corrected)
+                        refresh_snapshots([match.match_day_id])
+                        transaction.on_commit(lambda: publish_result(match, changed))
                     messages.success(request, f'Ganador registrado: {winner.name}')
                 else:
                     messages.error(request, 'El ganador debe ser uno de los equipos del partido')
             else:
                 messages.error(request, 'Información incompleta')
 
+        elif action == 'set_winners':
+            pairs = parse_result_pairs(request.POST)
+            only = request.POST.get('only')
+            if only:
+                # A per-match button inside the batch form submits just its own row
+                pairs = [(match_id, winner_id) for match_id, winner_id in pairs if match_id == only]
+
+            if pairs:
+                updated, errors = record_results(pairs)
+                if updated:
+                    messages.success(request, f'{len(updated)} resultados registrados')
+                for match_id, error in errors:
+                    messages.error(request, f'Partido {match_id}: {error}')
+            else:
+                messages.error(request, 'Selecciona al menos un ganador')
+
         elif action == 'delete_match':
             match_id = request.POST.get('match_id')
             match = get_object_or_404(Match, id=match_id)
-            match.delete()
+            with transaction.atomic():
+                match.delete()
+                changed = refresh_standings([match.team_a_id, match.team_b_id])
+                if match.winner_id:
+                    changed |= replay_ratings()
+                    refresh_snapshots([match.match_day_id])
+                transaction.on_commit(lambda: publish_match_deleted(int(match_id), changed))
             messages.success(request, 'Partido eliminado')
 
         return redirect('manage_matches')
 
+    matches = Match.objects.select_related('team_a', 'team_b', 'winner').order_by('created_at')
+    match_days = MatchDay.objects.prefetch_related(Prefetch('matches', queryset=matches))
+
+    # The same <option> list appears twice per match day, render it once
+    teams = Team.objects.order_by('name').values('id', 'name')
+    team_options = render_to_string('tournament/team_options.html', {'teams': teams})
+
     context = {
         'match_days': match_days,
-        'teams': teams,
+        'team_options': team_options,
     }
     return render(request, 'tournament/manage_matches.html', context)
 
 
+@login_required
+def manage_playoffs_view(request):
+    """Playoff bracket management page"""
+    if request.method == 'POST':
+        action = request.POST.get('action')
+
+        if action == 'create_bracket':
+            teams = request.POST.get('teams', '')
+            if teams.isdigit():
+                try:
+                    create_bracket(int(teams), double=bool(request.POST.get('double')))
+                except BracketError as error:
+                    messages.error(request, str(error))
+                else:
+                    messages.success(request, f'Cuadro creado con {teams} equipos')
+            else:
+                messages.error(request, 'Indica cuántos equipos se clasifican')
+
+        elif action == 'set_winner':
+            match_id = request.POST.get('match_id', '')
+            winner_id = request.POST.get('winner_id', '')
+            if match_id.isdigit() and winner_id.isdigit():
+                try:
+                    match = set_bracket_winner(int(match_id), int(winner_id))
+                except BracketMatch.DoesNotExist:
+                    raise Http404('Partido no encontrado')
+                except BracketError as error:
+                    messages.error(request, str(error))
+                else:
+                    winner = Team.objects.get(pk=match.winner_id)
+                    if match.winner_to is None:
+                        messages.success(request, f'¡{winner.name} es el campeón del torneo!')
+                    else:
+                        messages.success(request, f'Ganador registrado: {winner.name}')
+            else:
+                messages.error(request, 'Información incompleta')
+
+        return redirect('manage_playoffs')
+
+    bracket, stages = bracket_rounds(Tournament.get_current())
+    context = {
+        'bracket': bracket,
+        'stages': stages,
+        'max_teams': MAX_TEAMS,
+        'team_count': min(TeamStanding.objects.count(), MAX_TEAMS),
+    }
+    return render(request, 'tournament/manage_playoffs.html', context)
+
+
 @login_required
 def tournament_settings_view(request):
     """Tournament settings page"""
@@ -278,12 +576,40 @@ def tournament_settings_view(request):
                 tournament.save()
                 messages.success(request, f'¡{champion.name} es el campeón del torneo!')
 
+        elif action == 'import':
+            upload = request.FILES.get('file')
+            if upload:
+                fmt = request.POST.get('format') or guess_format(upload.name)
+                lines = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+                try:
+                    result = import_rows(read_rows(lines, fmt))
+                except UnicodeDecodeError:
+                    messages.error(request, 'El archivo debe estar codificado en UTF-8')
+                else:
+                    messages.success(
+                        request,
+                        f'Importados {result.teams} equipos, {result.match_days} jornadas y {result.matches} partidos',
+                    )
+                    for line, error in result.errors:
+                        messages.error(request, f'Línea {line}: {error}')
+                    if result.error_count > len(result.errors):
+                        messages.error(request, f'... y {result.error_count - len(result.errors)} errores más')
+            else:
+                messages.error(request, 'Selecciona un archivo')
+
         elif action == 'reset':
             # Clear all match results but keep teams and match days
-            Match.objects.update(winner=None, played_at=None)
-            tournament.champion = None
-            tournament.status = 'upcoming'
-            tournament.save()
+            with transaction.atomic():
+                Match.objects.update(winner=None, played_at=None)
+                Bracket.objects.filter(tournament=tournament).delete()
+                reset_standings()
+                replay_ratings()
+                # The bulk update skips the signals that invalidate match day fragments
+                transaction.on_commit(bump_schedule_version)
+                tournament.champion = None
+                tournament.status = 'upcoming'
+                tournament.save()
+                transaction.on_commit(publish_reset)
             messages.success(request, 'Torneo reiniciado - todos los resultados han sido borrados')
 
         return redirect('tournament_settings')
@@ -293,3 +619,44 @@ def tournament_settings_view(request):
         'teams': teams,
     }
     return render(request, 'tournament/tournament_settings.html', context)
+
+
+async def _iterate_in_thread(iterator):
+    """Pull a sync iterator one item at a time on the sync thread, where its DB cursor lives"""
+    next_item = sync_to_async(next)
+    while (item := await next_item(iterator, None)) is not None:
+        yield item
+
+
+@login_required
+def export_tournament_view(request):
+    """Stream teams, match days and matches as CSV or JSON lines"""
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in FORMATS:
+        fmt = 'csv'
+    content = export_chunks(fmt)
+    if isinstance(request, ASGIRequest):
+        # Django would otherwise read a sync iterator into memory before sending it
+        content = _iterate_in_thread(content)
+    content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(content, content_type=f'{content_type}; charset=utf-8')
+    extension = 'csv' if fmt == 'csv' else 'jsonl'
+    response['Content-Disposition'] = f'attachment; filename="kongleague.{extension}"'
+    return response
+
+
+def _has_metrics_token(request):
+    token = settings.METRICS_TOKEN
+    return bool(token) and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+
+
+def metrics_view(request):
+    """Prometheus metrics of every worker, for staff or a scraper with the metrics token"""
+    if not _has_metrics_token(request):
+        if 'Authorization' in request.headers:
+            return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        if not request.user.is_staff:
+            return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')